@@ -4,6 +4,12 @@ import os
 # Add the project root to the sys.path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Cold starts serve the first request sooner without the provider warm-up thread;
+# AI provider SDKs are imported on first use instead
+os.environ.setdefault('AI_WARM_PROVIDERS', '0')
+# A serverless instance cannot keep a model loading after its response; CodeBERT loads on first use
+os.environ.setdefault('CODEBERT_PRELOAD', '0')
+
 from src.app import app
 
 # This is for Vercel
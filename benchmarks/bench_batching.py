@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: review throughput per provider quota, batched vs. one call per snippet
+Small functions (5-30 lines) from the corpus are submitted concurrently, like
+a bot reviewing many snippets. A simulated provider answers in
+ROUND_TRIP_SECONDS plus SECONDS_PER_OUTPUT_TOKEN per completion token.
+Usage: python benchmarks/bench_batching.py [snippet count]
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+
+from src.analyzer.ai_reviewer import GEMINI_PROMPT_TEMPLATE, MAX_COMPLETION_TOKENS
+from src.analyzer.code_units import extract_units
+from src.analyzer.rate_limiter import DEFAULT_RATE_LIMITS
+from src.analyzer.review_batcher import (
+    COMPLETION_TOKENS_PER_SNIPPET,
+    ReviewBatcher,
+    build_batch_prompt,
+    parse_batch_response,
+    snippet_ids
+)
+from src.utils.file_loader import load_code_from_directory
+from src.utils.tokens import estimate_tokens
+
+ROUND_TRIP_SECONDS = 0.4
+SECONDS_PER_OUTPUT_TOKEN = 0.0005
+REVIEW_TEXT = """SUMMARY: Does one thing.
+SUGGESTIONS:
+- Add type hints
+- Add a docstring
+ISSUES: None
+QUALITY_RATING: 7
+RECOMMENDATION: Fine."""
+
+
+class SimulatedProvider:
+    """Counts requests and tokens and sleeps like a remote model would"""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt, completion_tokens):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += estimate_tokens(prompt)
+            self.completion_tokens += completion_tokens
+        time.sleep(ROUND_TRIP_SECONDS + completion_tokens * SECONDS_PER_OUTPUT_TOKEN)
+
+    def review_single(self, code):
+        self.complete(GEMINI_PROMPT_TEMPLATE.format(code=code), estimate_tokens(REVIEW_TEXT))
+        return {'summary': 'Does one thing.'}
+
+    def review_batch(self, snippets):
+        self.complete(build_batch_prompt(snippets), estimate_tokens(REVIEW_TEXT) * len(snippets))
+        response = "\n\n".join(f"=== REVIEW {snippet_id} ===\n{REVIEW_TEXT}"
+                               for snippet_id in snippet_ids(len(snippets)))
+        reviews = parse_batch_response(response)
+        return [reviews.get(snippet_id) for snippet_id in snippet_ids(len(snippets))]
+
+
+def small_snippets(count):
+    """Functions of 5-30 lines from the repository"""
+    snippets = []
+    for code in load_code_from_directory(os.path.join(project_root, "src")).values():
+        for unit in extract_units(code):
+            if 5 <= unit['end_line'] - unit['start_line'] + 1 <= 30:
+                snippets.append(unit['source'])
+    return (snippets * (count // max(len(snippets), 1) + 1))[:count]
+
+
+def run(snippets, batched):
+    """Review every snippet concurrently; returns (provider, seconds)"""
+    provider = SimulatedProvider()
+    batcher = ReviewBatcher(provider.review_batch, provider.review_single) if batched else None
+    review = batcher.review if batched else provider.review_single
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(snippets)) as pool:
+        list(pool.map(review, snippets))
+    return provider, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    snippets = small_snippets(count)
+    print(f"{len(snippets)} snippets, avg {sum(map(estimate_tokens, snippets)) // len(snippets)} tokens; "
+          f"batch completion budget {COMPLETION_TOKENS_PER_SNIPPET}/snippet "
+          f"(single: {MAX_COMPLETION_TOKENS})\n")
+
+    header = f"{'mode':<10}{'requests':>9}{'prompt tok':>12}{'output tok':>12}{'wall s':>8}"
+    for provider_name, (rpm, tpm) in DEFAULT_RATE_LIMITS.items():
+        if rpm:
+            header += f"{provider_name + ' /min':>14}"
+    print(header)
+    print("-" * len(header))
+
+    for mode in ("unbatched", "batched"):
+        provider, seconds = run(snippets, batched=(mode == "batched"))
+        row = (f"{mode:<10}{provider.requests:>9}{provider.prompt_tokens:>12}"
+               f"{provider.completion_tokens:>12}{seconds:>8.2f}")
+        # Snippets per minute the provider's default quota allows at this cost
+        for provider_name, (rpm, tpm) in DEFAULT_RATE_LIMITS.items():
+            if rpm:
+                per_request = len(snippets) / provider.requests
+                per_token = len(snippets) / (provider.prompt_tokens + provider.completion_tokens)
+                row += f"{min(rpm * per_request, tpm * per_token):>14.0f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
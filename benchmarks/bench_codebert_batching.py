@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CodeBERT analysis throughput and latency, one forward pass per request
+vs. dynamic micro-batching
+Concurrent clients analyze functions from the repository. Without --model, a
+randomly initialized model with the CodeBERT architecture (models/my-codebert
+config; --layers to shrink it) stands in, since the timing does not depend on
+the weights.
+Usage: python benchmarks/bench_codebert_batching.py [--clients 16] [--requests 256]
+       [--model path] [--layers 12] [--configs 8:2,16:5,32:10]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+# Every mode must run the model, not read results stored by an earlier one
+os.environ['CODEBERT_EMBEDDING_CACHE'] = '0'
+
+from src.analyzer.code_units import extract_units
+from src.analyzer.codebert_batcher import CodeBertBatcher
+from src.analyzer.custom_models import CodeBertAnalyzer
+from src.utils.constants import CODEBERT_MODEL_DIR
+from src.utils.file_loader import load_code_from_directory
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def function_corpus(count):
+    """Source of functions and classes from the repository, repeated up to count"""
+    sources = [unit['source'] for code in load_code_from_directory(os.path.join(project_root, "src")).values()
+               for unit in extract_units(code)]
+    return (sources * (count // max(len(sources), 1) + 1))[:count]
+
+
+def random_codebert(directory, layers):
+    """Save a randomly initialized CodeBERT-architecture model; returns its path"""
+    from transformers import AutoConfig, AutoModel, AutoTokenizer
+    config_dir = os.path.join(project_root, CODEBERT_MODEL_DIR)
+    config = AutoConfig.from_pretrained(config_dir, num_hidden_layers=layers)
+    AutoModel.from_config(config).save_pretrained(directory)
+    AutoTokenizer.from_pretrained(config_dir).save_pretrained(directory)
+    return directory
+
+
+def run(analyze, codes, clients):
+    """Analyze every code string from concurrent clients; returns (latencies, seconds)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def one(code):
+        start = time.perf_counter()
+        analyze(code)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one, codes))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CodeBERT micro-batching")
+    parser.add_argument('--clients', type=int, default=16, help="Concurrent requests")
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--model', help="CodeBERT model directory or id (default: random weights)")
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    parser.add_argument('--configs', default="8:2,16:5,32:10",
+                        help="Batcher settings to compare, as max_batch_size:max_wait_ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(tmp, args.layers)
+        analyzer = CodeBertAnalyzer(model_path)
+        codes = function_corpus(args.requests)
+        lengths = [len(analyzer.token_ids(code)) for code in codes]
+        print(f"{len(codes)} requests from {args.clients} clients, "
+              f"{sum(lengths) // len(lengths)} tokens avg (max {max(lengths)}), device {analyzer.device}\n")
+
+        header = f"{'mode':<22}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'batch':>7}{'padding':>9}"
+        print(header)
+        print("-" * len(header))
+
+        analyzer.analyze_code(codes[0])  # warm up
+        latencies, seconds = run(analyzer.analyze_code, codes, args.clients)
+        print(f"{'unbatched':<22}{len(codes) / seconds:>8.1f}{percentile(latencies, 50) * 1000:>9.0f}"
+              f"{percentile(latencies, 95) * 1000:>9.0f}{percentile(latencies, 99) * 1000:>9.0f}"
+              f"{1:>7.1f}{0:>9.0%}")
+
+        for setting in args.configs.split(","):
+            max_batch_size, max_wait_ms = setting.split(":")
+            batcher = CodeBertBatcher(analyzer, max_batch_size=int(max_batch_size), max_wait_ms=float(max_wait_ms))
+            latencies, seconds = run(batcher.analyze_code, codes, args.clients)
+            stats = batcher.stats()
+            print(f"{'batched ' + setting:<22}{len(codes) / seconds:>8.1f}{percentile(latencies, 50) * 1000:>9.0f}"
+                  f"{percentile(latencies, 95) * 1000:>9.0f}{percentile(latencies, 99) * 1000:>9.0f}"
+                  f"{stats['avg_batch_size']:>7.1f}{stats['padding_ratio']:>9.0%}")
+
+
+if __name__ == '__main__':
+    main()
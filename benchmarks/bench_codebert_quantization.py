@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CodeBERT fp32 vs. int8 dynamic quantization on CPU
+Reports load time (first quantization and from the cached artifact), weight
+memory, resident memory growth, per-input latency and how far int8 embeddings
+drift from fp32 (cosine similarity) on functions from the repository.
+Without --model, a randomly initialized model with the CodeBERT architecture
+stands in; timing and memory match the real model, drift is only indicative.
+Usage: python benchmarks/bench_codebert_quantization.py [--model path] [--requests 64] [--layers 12]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+# Every input must run through the model
+os.environ['CODEBERT_EMBEDDING_CACHE'] = '0'
+
+from bench_codebert_batching import function_corpus, percentile, random_codebert
+from src.analyzer.custom_models import CodeBertAnalyzer
+from src.analyzer.model_registry import get_model_registry, parameter_bytes
+
+
+def resident_mb():
+    """Resident set size of this process in MB (Linux; 0 elsewhere)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def load(model_path, backend):
+    """Load an analyzer; returns (analyzer, seconds, resident MB added)"""
+    before = resident_mb()
+    start = time.perf_counter()
+    analyzer = CodeBertAnalyzer(model_path, backend=backend)
+    return analyzer, time.perf_counter() - start, resident_mb() - before
+
+
+def latencies(analyzer, codes):
+    """Seconds per embed() call, one input at a time"""
+    analyzer.embed(codes[0])  # warm up
+    seconds = []
+    for code in codes:
+        start = time.perf_counter()
+        analyzer.embed(code)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark int8 CodeBERT inference")
+    parser.add_argument('--model', help="CodeBERT model directory (default: random weights)")
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(os.path.join(tmp, "codebert"), args.layers)
+        codes = function_corpus(args.requests)
+        registry = get_model_registry()
+
+        fp32, fp32_load, fp32_rss = load(model_path, "fp32")
+        int8, int8_first_load, int8_rss = load(model_path, "int8")
+        del int8
+        registry.unload(model_path, backend="int8")
+        int8, int8_load, _ = load(model_path, "int8")
+
+        rows = []
+        for name, analyzer, load_seconds, rss in (("fp32", fp32, fp32_load, fp32_rss),
+                                                  ("int8", int8, int8_load, int8_rss)):
+            seconds = latencies(analyzer, codes)
+            rows.append((name, load_seconds, parameter_bytes(analyzer.model) / 2 ** 20, rss,
+                         percentile(seconds, 50) * 1000, percentile(seconds, 95) * 1000,
+                         len(seconds) / sum(seconds)))
+
+        print(f"{len(codes)} inputs, one at a time, {os.cpu_count()} CPU(s); "
+              f"first int8 load (quantize + cache): {int8_first_load:.1f}s\n")
+        header = f"{'backend':<9}{'load s':>8}{'weights MB':>12}{'RSS +MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'inputs/s':>10}"
+        print(header)
+        print("-" * len(header))
+        for name, load_seconds, weights, rss, p50, p95, rate in rows:
+            print(f"{name:<9}{load_seconds:>8.1f}{weights:>12.0f}{rss:>9.0f}{p50:>9.1f}{p95:>9.1f}{rate:>10.1f}")
+
+        cosines = sorted(float(fp32.embed(code) @ int8.embed(code)) for code in codes)
+        score_drift = [abs(fp32.analyze_code(code)['complexity_score'] - int8.analyze_code(code)['complexity_score'])
+                       for code in codes]
+        print(f"\nEmbedding cosine int8 vs fp32: mean {sum(cosines) / len(cosines):.4f}, "
+              f"p5 {percentile(cosines, 5):.4f}, min {cosines[0]:.4f}")
+        print(f"Complexity score drift: mean {sum(score_drift) / len(score_drift):.3f}, max {max(score_drift):.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CodeBERT eager inference vs. TorchScript traces and torch.compile
+graphs per sequence-length bucket, under different intra-op thread counts
+Functions from the repository are analyzed by concurrent clients, one forward
+pass per request. Reports the warm-up (trace/compile) time at load, latency
+percentiles and throughput. Without --model, a randomly initialized model with
+the CodeBERT architecture stands in, since the timing does not depend on the
+weights. torch.compile takes minutes to warm up on small machines, so it only
+runs with --compile.
+Usage: python benchmarks/bench_codebert_runtime.py [--model path] [--layers 12]
+       [--requests 128] [--max-tokens 512] [--clients 1,4] [--threads 1,4] [--compile]
+Set CODEBERT_SEQ_BUCKETS (e.g. 32,64,128) to compare bucket layouts.
+"""
+
+import os
+import sys
+import logging
+import argparse
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+# Every input must run through the model
+os.environ['CODEBERT_EMBEDDING_CACHE'] = '0'
+
+import torch
+
+from bench_codebert_batching import function_corpus, percentile, random_codebert, run
+from src.analyzer.custom_models import CodeBertAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark traced/compiled CodeBERT inference")
+    parser.add_argument('--model', help="CodeBERT model directory (default: random weights)")
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    parser.add_argument('--requests', type=int, default=128)
+    parser.add_argument('--max-tokens', type=int, default=512, help="Only inputs up to this many tokens")
+    parser.add_argument('--clients', default="1,4", help="Concurrent clients to compare")
+    parser.add_argument('--threads', default=f"1,{os.cpu_count()}", help="Intra-op thread counts to compare")
+    parser.add_argument('--compile', action='store_true', help="Include torch.compile")
+    args = parser.parse_args()
+
+    runtimes = ["eager", "trace"] + (["compile"] if args.compile else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(tmp, args.layers)
+        codes = function_corpus(args.requests * 4)
+
+        analyzers = {}
+        for runtime in runtimes:
+            analyzer = CodeBertAnalyzer(model_path, runtime=runtime)
+            analyzers[runtime] = analyzer
+            if analyzer.encoder is not None:
+                print(f"{runtime} warm-up at load: {analyzer.encoder.warmup_seconds:.1f}s")
+        codes = [code for code in codes if len(analyzers["eager"].token_ids(code)) <= args.max_tokens][:args.requests]
+        lengths = [len(analyzers["eager"].token_ids(code)) for code in codes]
+        print(f"{len(codes)} requests, {sum(lengths) // len(lengths)} tokens avg (max {max(lengths)}), "
+              f"{os.cpu_count()} CPU(s)\n")
+
+        header = f"{'runtime':<10}{'threads':>8}{'clients':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+        print(header)
+        print("-" * len(header))
+        for threads in [int(value) for value in args.threads.split(",")]:
+            torch.set_num_threads(threads)
+            for clients in [int(value) for value in args.clients.split(",")]:
+                for runtime, analyzer in analyzers.items():
+                    analyzer.analyze_code(codes[0])  # warm up
+                    latencies, seconds = run(analyzer.analyze_code, codes, clients)
+                    print(f"{runtime:<10}{threads:>8}{clients:>8}{len(codes) / seconds:>8.1f}"
+                          f"{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 95) * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
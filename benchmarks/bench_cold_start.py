@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serverless cold start, from interpreter launch to the first "/" response
+Every run is a fresh interpreter started with -X importtime, like a new Vercel
+instance importing api/index.py. Reports the median import and first-response
+times, the modules with the largest cumulative import time, and the cost of the
+heavy dependencies that are only imported on first use.
+Usage: python benchmarks/bench_cold_start.py [runs] [--top 15]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in the child interpreter; prints its timings as JSON on the last stdout line
+COLD_START_SCRIPT = """
+import json, logging, sys, time
+start = time.perf_counter()
+import api.index
+imported = time.perf_counter()
+logging.disable(logging.CRITICAL)
+response = api.index.app.test_client().get('/')
+served = time.perf_counter()
+heavy = [name for name in sys.argv[1:] if name in sys.modules]
+print(json.dumps({'import': imported - start, 'first_response': served - start,
+                  'status': response.status_code, 'heavy_loaded': heavy}))
+"""
+
+# Imported lazily by the app: on the first review, CodeBERT use or semantic cache lookup
+HEAVY_MODULES = ['google.generativeai', 'openai', 'anthropic', 'torch', 'transformers', 'numpy']
+
+
+def parse_importtime(stderr):
+    """Cumulative import time in seconds of each module from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            modules[name] = int(cumulative) / 1e6
+    return modules
+
+
+def cold_start():
+    """One fresh interpreter; returns (timings, module import times)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", COLD_START_SCRIPT] + HEAVY_MODULES,
+                            cwd=project_root, env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def import_cost(module):
+    """Seconds a fresh interpreter spends importing one module (None if not installed)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=project_root, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return parse_importtime(result.stderr).get(module)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of the serverless entry point")
+    parser.add_argument('runs', nargs='?', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Modules to list by cumulative import time")
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    timings = [t for t, _ in runs]
+    modules = runs[-1][1]
+
+    print(f"{args.runs} cold starts of api/index.py (status {timings[-1]['status']})\n")
+    print(f"{'phase':<18}{'median s':>10}{'min s':>10}{'max s':>10}")
+    for phase in ('import', 'first_response'):
+        values = [t[phase] for t in timings]
+        print(f"{phase:<18}{statistics.median(values):>10.3f}{min(values):>10.3f}{max(values):>10.3f}")
+
+    print(f"\nLargest imports (cumulative, last run)\n{'module':<50}{'seconds':>10}")
+    for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<50}{seconds:>10.3f}")
+
+    print(f"\nDeferred dependencies (import cost paid on first use)\n{'module':<24}{'seconds':>10}  at cold start")
+    loaded = set(timings[-1]['heavy_loaded'])
+    for module in HEAVY_MODULES:
+        seconds = import_cost(module)
+        cost = f"{seconds:>10.3f}" if seconds is not None else f"{'n/a':>10}"
+        print(f"{module:<24}{cost}  {'loaded' if module in loaded else 'deferred'}")
+
+
+if __name__ == '__main__':
+    main()
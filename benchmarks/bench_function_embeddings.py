@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-function CodeBERT scores and embeddings of whole modules, one
+analyze_code()/embed() call per function vs. analyze_functions() (one tokenizer
+call, length-sorted batched forward passes)
+Runs over the repository's own modules. Both sides window units longer than
+512 tokens, so they produce the same results; the score-only row (one call per
+unit, no embedding) is a lower bound for the per-call loop. Without --model, a randomly initialized
+model with the CodeBERT architecture stands in, since the timing does not
+depend on the weights.
+Usage: python benchmarks/bench_function_embeddings.py [--model path] [--layers 12]
+       [--files 10] [--batch-sizes 4,8,16]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+# Every unit must run through the model
+os.environ['CODEBERT_EMBEDDING_CACHE'] = '0'
+
+from bench_codebert_batching import random_codebert
+from src.analyzer.code_units import extract_units
+from src.analyzer.custom_models import CodeBertAnalyzer
+from src.utils.file_loader import load_code_from_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched per-function CodeBERT analysis")
+    parser.add_argument('--model', help="CodeBERT model directory (default: random weights)")
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    parser.add_argument('--files', type=int, default=10, help="Modules of the repository to analyze")
+    parser.add_argument('--batch-sizes', default="4,8,16", help="analyze_functions batch sizes to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(tmp, args.layers)
+        analyzer = CodeBertAnalyzer(model_path)
+        modules = sorted(load_code_from_directory(os.path.join(project_root, "src")).items())[:args.files]
+        codes = [code for _, code in modules]
+        units = sum(len(extract_units(code, include_classes=True)) for code in codes)
+        print(f"{len(codes)} modules, {units} functions/methods/classes\n")
+
+        header = f"{'mode':<24}{'seconds':>9}{'units/s':>9}"
+        print(header)
+        print("-" * len(header))
+        analyzer.analyze_code("def warm_up():\n    pass")
+
+        def per_unit(embed):
+            start = time.perf_counter()
+            for code in codes:
+                for unit in extract_units(code, include_classes=True):
+                    analyzer.analyze_code(unit['source'], long_input=True)
+                    if embed:
+                        analyzer.embed(unit['source'], long_input=True)
+            return time.perf_counter() - start
+
+        for label, embed in (("per unit, score+embed", True), ("per unit, score only", False)):
+            seconds = per_unit(embed)
+            print(f"{label:<24}{seconds:>9.2f}{units / seconds:>9.1f}")
+
+        for batch_size in [int(value) for value in args.batch_sizes.split(",")]:
+            start = time.perf_counter()
+            for code in codes:
+                analyzer.analyze_functions(code, batch_size=batch_size)
+            seconds = time.perf_counter() - start
+            print(f"{f'analyze_functions({batch_size})':<24}{seconds:>9.2f}{units / seconds:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
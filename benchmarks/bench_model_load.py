@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CodeBERT load time and memory, transformers from_pretrained vs. the
+memory-mapped safetensors loader, and how much of the weights forked workers share
+Every load runs in a fresh interpreter. Anonymous memory is private to a
+process; file-backed pages of the memory-mapped weights sit in the page cache
+once, however many workers map them (PSS splits them between the workers).
+Without --model, a randomly initialized model with the CodeBERT architecture
+stands in.
+Usage: python benchmarks/bench_model_load.py [--model path] [--layers 12] [--workers 4]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+
+from bench_codebert_batching import random_codebert
+
+LOAD_SCRIPT = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+
+def memory():
+    values = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values
+
+import torch
+from transformers import AutoModel
+from src.analyzer.model_loader import load_model
+
+before = memory()
+start = time.perf_counter()
+model = AutoModel.from_pretrained({model!r}).eval() if {mode!r} == "from_pretrained" else load_model({model!r})
+loaded = time.perf_counter() - start
+with torch.no_grad():
+    model(torch.tensor([[0, 100, 200, 2]]))
+first = time.perf_counter() - start
+
+pids = []
+for _ in range({workers}):
+    pid = os.fork()
+    if pid == 0:
+        with torch.no_grad():
+            model(torch.tensor([[0, 100, 200, 2]]))
+        time.sleep(2)
+        os._exit(0)
+    pids.append(pid)
+time.sleep(1)
+pss = memory()["Pss"]
+for pid in pids:
+    with open(f"/proc/{{pid}}/smaps_rollup") as f:
+        pss += next(int(line.split()[1]) / 1024 for line in f if line.startswith("Pss:"))
+for pid in pids:
+    os.waitpid(pid, 0)
+
+after = memory()
+print(json.dumps({{"load": loaded, "first": first, "anon": after["Anonymous"] - before["Anonymous"],
+                   "file": after["Pss_File"] - before["Pss_File"], "pss": pss}}))
+"""
+
+
+def measure(model_path, mode, workers):
+    """Load in a fresh interpreter (and fork workers); returns its measurements"""
+    script = LOAD_SCRIPT.format(root=project_root, model=model_path, mode=mode, workers=workers)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory-mapped CodeBERT loading")
+    parser.add_argument('--model', help="Model directory with model.safetensors (default: random weights)")
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    parser.add_argument('--workers', type=int, default=4, help="Forked workers sharing the loaded model")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(tmp, args.layers)
+        size = os.path.getsize(os.path.join(model_path, "model.safetensors")) / 2 ** 20
+        print(f"{size:.0f} MB of weights, {args.workers} forked workers\n")
+
+        header = f"{'loader':<17}{'load s':>8}{'first s':>9}{'anon MB':>9}{'file MB':>9}{'total PSS MB':>14}"
+        print(header)
+        print("-" * len(header))
+        for mode in ("from_pretrained", "mmap"):
+            stats = measure(model_path, mode, args.workers)
+            print(f"{mode:<17}{stats['load']:>8.2f}{stats['first']:>9.2f}{stats['anon']:>9.0f}"
+                  f"{stats['file']:>9.0f}{stats['pss']:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: web workers that each load CodeBERT vs. workers sharing one model server
+Forked worker processes analyze functions from the repository, a few threads
+each. Reports throughput, latency percentiles, the resident memory of each
+worker and the server's average batch size (requests from all workers share
+forward passes). Without --model, a randomly initialized model with the
+CodeBERT architecture stands in.
+Usage: python benchmarks/bench_model_server.py [--model path] [--layers 12]
+       [--workers 4] [--threads 4] [--requests 256]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+# Every request must run through the model
+os.environ['CODEBERT_EMBEDDING_CACHE'] = '0'
+
+from bench_codebert_batching import function_corpus, percentile, random_codebert, run
+from bench_codebert_quantization import resident_mb
+
+
+def worker(model_path, socket_path, codes, threads, results):
+    """One web worker: analyze its share of the corpus, report latencies and memory"""
+    from src.analyzer.model_server import ModelServerClient
+    if socket_path:
+        analyze = ModelServerClient(socket_path).analyze_code
+    else:
+        from src.analyzer.codebert_batcher import analyze_with_codebert
+        from src.analyzer.custom_models import CodeBertAnalyzer
+        analyzer = CodeBertAnalyzer(model_path)
+        analyze = lambda code: analyze_with_codebert(analyzer, code)
+    analyze(codes[0])  # warm up
+    latencies, seconds = run(analyze, codes, threads)
+    results.put((latencies, seconds, resident_mb()))
+
+
+def measure(model_path, socket_path, codes, workers, threads):
+    """Run the workers concurrently; returns (req/s once loaded, latencies, mean worker RSS)"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    shares = [codes[i::workers] for i in range(workers)]
+    processes = [context.Process(target=worker, args=(model_path, socket_path, share, threads, results))
+                 for share in shares]
+    for process in processes:
+        process.start()
+    outputs = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    latencies = [latency for output in outputs for latency in output[0]]
+    seconds = max(output[1] for output in outputs)
+    return len(codes) / seconds, latencies, sum(output[2] for output in outputs) / workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the out-of-process CodeBERT server")
+    parser.add_argument('--model', help="CodeBERT model directory (default: random weights)")
+    parser.add_argument('--layers', type=int, default=12, help="Layers of the random stand-in model")
+    parser.add_argument('--workers', type=int, default=4, help="Web worker processes")
+    parser.add_argument('--threads', type=int, default=4, help="Request threads per worker")
+    parser.add_argument('--requests', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or random_codebert(os.path.join(tmp, "codebert"), args.layers)
+        codes = function_corpus(args.requests)
+        socket_path = os.path.join(tmp, "codebert.sock")
+        server = subprocess.Popen([sys.executable, "-m", "src.analyzer.model_server", "--socket", socket_path,
+                                   "--model", model_path], cwd=project_root, stderr=subprocess.DEVNULL)
+        try:
+            from src.analyzer.model_server import ModelServerClient
+            client = ModelServerClient(socket_path)
+            while client.readiness()['status'] != 'ready':
+                time.sleep(0.5)
+
+            print(f"{len(codes)} requests from {args.workers} workers x {args.threads} threads, "
+                  f"{os.cpu_count()} CPU(s)\n")
+            header = f"{'mode':<14}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'worker RSS MB':>15}{'batch':>7}"
+            print(header)
+            print("-" * len(header))
+            for mode, path in (("in-process", None), ("model server", socket_path)):
+                rate, latencies, rss = measure(model_path, path, codes, args.workers, args.threads)
+                batch = client.readiness().get('batching', {}).get('avg_batch_size', 0.0) if path else "-"
+                print(f"{mode:<14}{rate:>8.1f}{percentile(latencies, 50) * 1000:>9.0f}"
+                      f"{percentile(latencies, 95) * 1000:>9.0f}{rss:>15.0f}{batch:>7}")
+            with open(f"/proc/{server.pid}/status") as f:
+                server_rss = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS:"))
+            print(f"\nModel server RSS: {server_rss:.0f} MB (once per host)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prompt tokens for whole-file vs. pruned AI reviews
+Two scenarios per file: every flagged function, and a typical edit touching
+two functions (first and last) of the file.
+Usage: python benchmarks/bench_prompt_pruning.py [paths...]
+"""
+
+import os
+import sys
+import logging
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+
+from src.analyzer.ai_reviewer import GEMINI_PROMPT_TEMPLATE
+from src.analyzer.code_units import extract_units
+from src.analyzer.prompt_builder import build_pruned_prompt
+from src.utils.file_loader import load_code_from_directory, load_code_from_file
+from src.utils.tokens import estimate_tokens
+
+DEFAULT_CORPUS = ["src", "data/sample_code", "examples.py", "train_models.py"]
+
+
+def load_corpus(paths):
+    """Collect the Python files of the benchmark corpus"""
+    files = {}
+    for path in paths:
+        path = os.path.join(project_root, path) if not os.path.isabs(path) else path
+        if os.path.isdir(path):
+            files.update(load_code_from_directory(path))
+        elif os.path.exists(path):
+            files[path] = load_code_from_file(path)
+    return files
+
+
+def simulated_edit(code):
+    """Lines of a typical small edit: the first line of the first and last function"""
+    units = extract_units(code)
+    return sorted({units[0]['def_line'], units[-1]['def_line']}) if units else []
+
+
+def pruned_tokens(code, full_tokens, changed_lines=None):
+    """Prompt tokens actually sent (whole file when pruning does not apply)"""
+    pruned = build_pruned_prompt(code, changed_lines=changed_lines)
+    return pruned['prompt_tokens'] if pruned else full_tokens
+
+
+def main():
+    files = load_corpus(sys.argv[1:] or DEFAULT_CORPUS)
+    totals = {'full': 0, 'flagged': 0, 'changed': 0}
+
+    print(f"{'file':<46} {'full':>7} {'flagged':>8} {'changed':>8}")
+    print("-" * 72)
+    for path, code in sorted(files.items()):
+        full_tokens = estimate_tokens(GEMINI_PROMPT_TEMPLATE.format(code=code))
+        flagged = pruned_tokens(code, full_tokens)
+        changed = pruned_tokens(code, full_tokens, simulated_edit(code))
+
+        totals['full'] += full_tokens
+        totals['flagged'] += flagged
+        totals['changed'] += changed
+        print(f"{os.path.relpath(path, project_root):<46} {full_tokens:>7} {flagged:>8} {changed:>8}")
+
+    print("-" * 72)
+    print(f"{'TOTAL':<46} {totals['full']:>7} {totals['flagged']:>8} {totals['changed']:>8}")
+    for scenario in ('flagged', 'changed'):
+        reduction = 100 * (1 - totals[scenario] / totals['full']) if totals['full'] else 0
+        print(f"Prompt token reduction ({scenario}): {reduction:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: similar-function search over per-function embeddings, exact
+(NumPy brute force) vs. the IVF-partitioned index
+Synthetic unit vectors of CodeBERT's size, clustered like embeddings of related
+code, are indexed file by file. Reports build time, query latency percentiles
+and the IVF's recall@k against exact search at several n_probe values.
+Usage: python benchmarks/bench_similarity_index.py [--functions 100000] [--dim 768]
+       [--queries 200] [--k 10] [--n-probe 4,8,16]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+logging.disable(logging.INFO)
+
+import numpy as np
+
+from bench_codebert_batching import percentile
+from src.analyzer.similarity_index import SimilarityIndex
+
+FUNCTIONS_PER_FILE = 20
+
+
+def embeddings(rng, count, centers):
+    """Unit vectors scattered around random cluster centers"""
+    vectors = centers[rng.integers(0, len(centers), size=count)]
+    vectors = vectors + rng.normal(scale=0.5 / np.sqrt(centers.shape[1]), size=vectors.shape)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def build(vectors, exact_limit):
+    """Index vectors file by file; returns the index and the build seconds"""
+    index = SimilarityIndex(exact_limit=exact_limit)
+    start = time.perf_counter()
+    for f, first in enumerate(range(0, len(vectors), FUNCTIONS_PER_FILE)):
+        index.add_file(f"pkg/module{f}.py", [
+            {'qualname': f"func{i}", 'kind': 'function', 'start_line': 10 * i + 1, 'end_line': 10 * i + 8,
+             'embedding': vector} for i, vector in enumerate(vectors[first:first + FUNCTIONS_PER_FILE])
+        ])
+    return index, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact vs. IVF similar-function search")
+    parser.add_argument('--functions', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--n-probe', default="4,8,16", help="IVF lists scanned per query to compare")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(args.functions // 50, 1), args.dim))
+    vectors = embeddings(rng, args.functions, centers)
+    queries = embeddings(rng, args.queries, centers)
+
+    exact, exact_build = build(vectors, exact_limit=args.functions)
+    ivf, ivf_build = build(vectors, exact_limit=min(args.functions - 1, 20000))
+    print(f"{args.functions} functions x {args.dim} dims, {ivf.stats()['lists']} IVF lists; "
+          f"build {exact_build:.1f}s exact, {ivf_build:.1f}s IVF (incl. training)\n")
+
+    def locations(matches):
+        return {(m['path'], m['qualname']) for m in matches}
+
+    truth, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(locations(exact.search(query, k=args.k)))
+        latencies.append(time.perf_counter() - start)
+
+    header = f"{'search':<14}{'p50 ms':>9}{'p95 ms':>9}{f'recall@{args.k}':>12}"
+    print(header)
+    print("-" * len(header))
+    print(f"{'exact':<14}{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 95) * 1000:>9.2f}{1.0:>12.3f}")
+    for n_probe in [int(value) for value in args.n_probe.split(",")]:
+        ivf.n_probe = n_probe
+        latencies, found = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found += len(locations(ivf.search(query, k=args.k)) & expected)
+            latencies.append(time.perf_counter() - start)
+        print(f"{f'ivf ({n_probe})':<14}{percentile(latencies, 50) * 1000:>9.2f}"
+              f"{percentile(latencies, 95) * 1000:>9.2f}{found / (len(queries) * args.k):>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Load test: drive /api/analyze at a target request rate and report throughput
+and latency percentiles
+Requests are sent open-loop (on schedule, whether or not earlier ones have
+finished) with files from the corpus. Without --url the app is started
+in-process against the mock providers (benchmarks/mock_providers.py) with the
+response cache and rate limits off, so no API quota is used. --record saves
+the provider traffic to a cassette; --replay serves a cassette instead of
+the mocks, for reproducible runs (the request sequence is deterministic, so
+the same --rps/--duration/--corpus sends the prompts that were recorded).
+Usage: python benchmarks/load_test.py [--rps 5] [--duration 30] [--url http://host:5000]
+       [--model gemini-pro] [--mock-latency lognormal:0.8,0.5] [--mock-error-rate 0.02]
+       [--record cassette.jsonl.gz | --replay cassette.jsonl.gz [--time-scale 1.0]]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mock_providers import PROVIDERS, MockProviderServer, ProviderProfile
+from src.utils.file_loader import load_code_from_directory, load_code_from_file
+
+DEFAULT_CORPUS = ["data/sample_code", "src/analyzer", "examples.py"]
+
+
+def load_corpus(paths):
+    """Code strings of the corpus files"""
+    files = {}
+    for path in paths:
+        path = os.path.join(project_root, path) if not os.path.isabs(path) else path
+        if os.path.isdir(path):
+            files.update(load_code_from_directory(path))
+        elif os.path.exists(path):
+            files[path] = load_code_from_file(path)
+    return [code for code in files.values() if code.strip()]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def start_local_app(mock_latency, mock_error_rate, keep_rate_limits, record=None, replay=None, time_scale=1.0):
+    """Start mock providers (unless replaying) and the app in-process; returns (app url, mock server)"""
+    mocks = None
+    if replay:
+        os.environ.update({'AI_CASSETTE_MODE': 'replay', 'AI_CASSETTE_PATH': replay,
+                           'AI_CASSETTE_TIME_SCALE': str(time_scale)})
+    else:
+        profiles = {name: ProviderProfile(latency=mock_latency, error_rate=mock_error_rate) for name in PROVIDERS}
+        mocks = MockProviderServer(profiles=profiles).start()
+        os.environ.update(mocks.environment())
+        if record:
+            os.environ.update({'AI_CASSETTE_MODE': 'record', 'AI_CASSETTE_PATH': record})
+    os.environ['AI_CACHE_ENABLED'] = '0'
+    if not keep_rate_limits:
+        for name in PROVIDERS:
+            os.environ[f"AI_RATE_LIMIT_{name.upper()}_RPM"] = '0'
+            os.environ[f"AI_RATE_LIMIT_{name.upper()}_TPM"] = '0'
+
+    # Provider SDKs read their configuration at import time
+    from werkzeug.serving import make_server
+    from src.app import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    httpd = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, name="app-under-test", daemon=True).start()
+    return f"http://127.0.0.1:{httpd.server_port}", mocks
+
+
+def send(url, payload, timeout):
+    """POST one analysis; returns (status, seconds)"""
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 'conn-error'
+    return status, time.perf_counter() - start
+
+
+def run_load(url, corpus, rps, duration, model, timeout, allow_duplicates, max_outstanding):
+    """Send requests at the target rate for duration seconds; returns (results, elapsed)"""
+    results = []
+    lock = threading.Lock()
+
+    def one(i):
+        code = corpus[i % len(corpus)]
+        if not allow_duplicates:
+            # Identical requests would be coalesced or cached by the app
+            code += f"\n# load-test request {i}\n"
+        status, seconds = send(url, {'code': code, 'model': model, 'timeout': timeout}, timeout + 5)
+        with lock:
+            results.append((status, seconds))
+
+    total = int(rps * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+        for i in range(total):
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, i)
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed, rps):
+    """Print throughput, status counts and latency percentiles"""
+    ok = [seconds for status, seconds in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"\nTarget rate       {rps:.2f} req/s")
+    print(f"Requests          {len(results)} in {elapsed:.1f}s")
+    print(f"Throughput        {len(ok) / elapsed:.2f} successful req/s")
+    print(f"Status codes      {', '.join(f'{k}: {v}' for k, v in sorted(statuses.items(), key=str))}")
+    print(f"\n{'latency':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    print(f"{'seconds':<10}{percentile(ok, 50):>9.3f}{percentile(ok, 95):>9.3f}"
+          f"{percentile(ok, 99):>9.3f}{max(ok) if ok else float('nan'):>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/analyze")
+    parser.add_argument('--url', help="Base URL of a running app (default: start one against mocks)")
+    parser.add_argument('--rps', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of load")
+    parser.add_argument('--model', default="gemini-pro")
+    parser.add_argument('--corpus', nargs='*', default=DEFAULT_CORPUS)
+    parser.add_argument('--timeout', type=float, default=60.0, help="Per-request analysis timeout")
+    parser.add_argument('--max-outstanding', type=int, default=256)
+    parser.add_argument('--allow-duplicates', action='store_true',
+                        help="Send corpus files unchanged (lets the app coalesce and cache)")
+    parser.add_argument('--mock-latency', default="lognormal:0.8,0.5")
+    parser.add_argument('--mock-error-rate', type=float, default=0.0)
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help="Keep the app's provider rate limits when running against mocks")
+    parser.add_argument('--record', help="Record provider traffic of the in-process app to this cassette")
+    parser.add_argument('--replay', help="Serve provider responses from this cassette instead of mocks")
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help="Replayed provider timing multiplier (0 for instant)")
+    args = parser.parse_args()
+
+    mocks = None
+    base_url = args.url
+    if not base_url:
+        base_url, mocks = start_local_app(args.mock_latency, args.mock_error_rate, args.keep_rate_limits,
+                                          record=args.record, replay=args.replay, time_scale=args.time_scale)
+        source = f"cassette {args.replay}" if args.replay else f"mock providers at {mocks.url}"
+        print(f"App under test at {base_url}, {source}")
+
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} corpus files, {args.rps} req/s for {args.duration}s, model {args.model}")
+
+    results, elapsed = run_load(f"{base_url}/api/analyze", corpus, args.rps, args.duration, args.model,
+                                args.timeout, args.allow_duplicates, args.max_outstanding)
+    report(results, elapsed, args.rps)
+
+    if mocks:
+        print(f"\nMock provider calls: {json.dumps(mocks.stats())}")
+        mocks.stop()
+
+
+if __name__ == '__main__':
+    main()
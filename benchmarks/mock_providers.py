@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the AI providers, for load tests and offline CI
+One server speaks the Gemini (REST), OpenAI chat completions, Anthropic
+messages and Ollama /api/generate protocols, streaming included, with
+configurable latency, error rate and canned responses per provider.
+
+Point the app at it with:
+    GEMINI_BASE_URL=http://127.0.0.1:8090  GEMINI_API_KEY=mock
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1  OPENAI_API_KEY=mock
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8090  ANTHROPIC_API_KEY=mock
+    OLLAMA_HOST=http://127.0.0.1:8090
+
+Usage: python benchmarks/mock_providers.py [--port 8090] [--latency lognormal:0.8,0.5]
+       [--error-rate 0.02] [--responses file] [--config profiles.json]
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = """SUMMARY: Defines a small helper and uses it once.
+SUGGESTIONS:
+- Add type hints to the function signature
+- Add a docstring describing the return value
+- Validate the input before using it
+ISSUES: No obvious bugs
+QUALITY_RATING: 7/10
+RECOMMENDATION: Good to merge after adding documentation."""
+
+# Providers a profile can be set for
+PROVIDERS = ('gemini', 'openai', 'claude', 'ollama')
+# Responses are streamed in pieces of about this many characters
+STREAM_PIECE_CHARS = 24
+
+
+def parse_latency(spec):
+    """Latency sampler from "fixed:S", "uniform:LO,HI" or "lognormal:MEDIAN,SIGMA" (seconds)"""
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',')] if args else []
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        median, sigma = values
+        return lambda: random.lognormvariate(0, sigma) * median
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class ProviderProfile:
+    """How one mocked provider behaves"""
+
+    def __init__(self, latency="fixed:0.2", error_rate=0.0, error_statuses=(500, 503, 429),
+                 responses=None):
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.responses = responses or [DEFAULT_RESPONSE]
+
+    def sample(self):
+        """(latency seconds, error status or None, response text) for one request"""
+        status = random.choice(self.error_statuses) if random.random() < self.error_rate else None
+        return max(0.0, self.latency()), status, random.choice(self.responses)
+
+
+class MockProviderServer:
+    """Threaded HTTP server for all four provider protocols"""
+
+    def __init__(self, host="127.0.0.1", port=0, profiles=None):
+        """Create the server (port 0 picks a free port); call start() or serve_forever()"""
+        self.profiles = {name: ProviderProfile() for name in PROVIDERS}
+        self.profiles.update(profiles or {})
+        self.requests = {name: 0 for name in PROVIDERS}
+        self.errors = {name: 0 for name in PROVIDERS}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.httpd.daemon_threads = True
+        # Clients dropping keep-alive connections (e.g. at exit) are not errors
+        self.httpd.handle_error = lambda request, client_address: None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """Environment variables that send every provider SDK to this server"""
+        return {
+            'GEMINI_API_KEY': 'mock', 'GEMINI_BASE_URL': self.url,
+            'OPENAI_API_KEY': 'mock', 'OPENAI_BASE_URL': f"{self.url}/v1",
+            'ANTHROPIC_API_KEY': 'mock', 'ANTHROPIC_BASE_URL': self.url,
+            'OLLAMA_HOST': self.url,
+        }
+
+    def start(self):
+        """Serve on a background thread"""
+        threading.Thread(target=self.httpd.serve_forever, name="mock-providers", daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {name: {'requests': self.requests[name], 'errors': self.errors[name]} for name in PROVIDERS}
+
+    def _count(self, provider, error):
+        with self._lock:
+            self.requests[provider] += 1
+            if error:
+                self.errors[provider] += 1
+
+
+def _pieces(text):
+    return [text[i:i + STREAM_PIECE_CHARS] for i in range(0, len(text), STREAM_PIECE_CHARS)] or [""]
+
+
+def _handler_for(server):
+    """Request handler class bound to a MockProviderServer"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        # -------- routing --------
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path.startswith('/v1beta/models'):
+                self._send_json(200, {'models': [{
+                    'name': 'models/gemini-2.5-flash',
+                    'supportedGenerationMethods': ['generateContent', 'streamGenerateContent'],
+                }]})
+            elif path == '/api/tags':
+                self._send_json(200, {'models': [{'name': 'llama2'}]})
+            else:
+                self._send_json(404, {'error': f"Unknown path {path}"})
+
+        def do_POST(self):
+            path = self.path.split('?')[0]
+            body = self._read_json()
+            if path.startswith('/v1beta/models/'):
+                self._gemini(stream=path.endswith(':streamGenerateContent'))
+            elif path == '/v1/chat/completions':
+                self._openai(body)
+            elif path == '/v1/messages':
+                self._anthropic(body)
+            elif path == '/api/generate':
+                self._ollama(body)
+            else:
+                self._send_json(404, {'error': f"Unknown path {path}"})
+
+        # -------- protocols --------
+
+        def _gemini(self, stream):
+            text = self._begin('gemini', lambda status: {'error': {'code': status, 'message': 'mock error'}})
+            if text is None:
+                return
+
+            def chunk(piece, last):
+                candidate = {'content': {'parts': [{'text': piece}], 'role': 'model'}, 'index': 0}
+                if last:
+                    candidate['finishReason'] = 'STOP'
+                return {'candidates': [candidate]}
+
+            if not stream:
+                self._send_json(200, chunk(text, True))
+                return
+            # The REST transport streams a JSON array of responses
+            pieces = _pieces(text)
+            self._stream('application/json',
+                         ["["] + [("," if i else "") + json.dumps(chunk(p, i == len(pieces) - 1))
+                                  for i, p in enumerate(pieces)] + ["]"])
+
+        def _openai(self, body):
+            text = self._begin('openai', lambda status: {'error': {'message': 'mock error', 'type': 'server_error'}})
+            if text is None:
+                return
+            model = body.get('model', 'gpt-4')
+            base = {'id': 'chatcmpl-mock', 'created': int(time.time()), 'model': model}
+            if not body.get('stream'):
+                self._send_json(200, dict(base, object='chat.completion', choices=[{
+                    'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop',
+                }], usage={'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}))
+                return
+            events = [dict(base, object='chat.completion.chunk', choices=[{
+                'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]) for piece in _pieces(text)]
+            events.append(dict(base, object='chat.completion.chunk', choices=[{
+                'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+            self._stream('text/event-stream',
+                         [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"])
+
+        def _anthropic(self, body):
+            text = self._begin('claude', lambda status: {
+                'type': 'error', 'error': {'type': 'api_error', 'message': 'mock error'}})
+            if text is None:
+                return
+            message = {'id': 'msg_mock', 'type': 'message', 'role': 'assistant',
+                       'model': body.get('model', 'claude'), 'stop_sequence': None,
+                       'usage': {'input_tokens': 0, 'output_tokens': 0}}
+            if not body.get('stream'):
+                self._send_json(200, dict(message, content=[{'type': 'text', 'text': text}],
+                                          stop_reason='end_turn'))
+                return
+            events = [('message_start', {'type': 'message_start',
+                                         'message': dict(message, content=[], stop_reason=None)}),
+                      ('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                               'content_block': {'type': 'text', 'text': ''}})]
+            events += [('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                'delta': {'type': 'text_delta', 'text': piece}})
+                       for piece in _pieces(text)]
+            events += [('content_block_stop', {'type': 'content_block_stop', 'index': 0}),
+                       ('message_delta', {'type': 'message_delta',
+                                          'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                          'usage': {'output_tokens': 0}}),
+                       ('message_stop', {'type': 'message_stop'})]
+            self._stream('text/event-stream',
+                         [f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events])
+
+        def _ollama(self, body):
+            text = self._begin('ollama', lambda status: {'error': 'mock error'})
+            if text is None:
+                return
+            model = body.get('model', 'llama2')
+            if not body.get('stream', True):
+                self._send_json(200, {'model': model, 'response': text, 'done': True})
+                return
+            lines = [json.dumps({'model': model, 'response': piece, 'done': False}) + "\n"
+                     for piece in _pieces(text)]
+            lines.append(json.dumps({'model': model, 'response': '', 'done': True}) + "\n")
+            self._stream('application/x-ndjson', lines)
+
+        # -------- helpers --------
+
+        def _begin(self, provider, error_body):
+            """Sample the profile; sends the error response itself and returns None on failure"""
+            latency, status, text = server.profiles[provider].sample()
+            server._count(provider, status is not None)
+            self._latency = latency
+            if status is not None:
+                time.sleep(latency)
+                self._send_json(status, error_body(status))
+                return None
+            return text
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                return json.loads(raw) if raw else {}
+            except ValueError:
+                return {}
+
+        def _send_json(self, status, payload):
+            time.sleep(getattr(self, '_latency', 0.0))
+            self._latency = 0.0
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, content_type, parts):
+            """Send parts with chunked encoding, spread evenly over the sampled latency"""
+            delay = self._latency / max(len(parts), 1)
+            self._latency = 0.0
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for part in parts:
+                time.sleep(delay)
+                data = part.encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def load_responses(path):
+    """Canned responses from a file, separated by lines containing only ---"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [r.strip() for r in f.read().split("\n---\n") if r.strip()]
+
+
+def build_profiles(args):
+    """Per-provider profiles from the command line defaults and an optional JSON config
+
+    The config maps provider names to {"latency": spec, "error_rate": x,
+    "error_statuses": [...], "responses": file}; missing keys use the defaults.
+    """
+    defaults = {'latency': args.latency, 'error_rate': args.error_rate,
+                'responses': load_responses(args.responses) if args.responses else None}
+    overrides = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    profiles = {}
+    for name in PROVIDERS:
+        settings = dict(defaults)
+        settings.update(overrides.get(name, {}))
+        if isinstance(settings.get('responses'), str):
+            settings['responses'] = load_responses(settings['responses'])
+        profiles[name] = ProviderProfile(**settings)
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini/OpenAI/Anthropic/Ollama servers")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', default="lognormal:0.8,0.5",
+                        help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument('--responses', help="File of canned responses separated by --- lines")
+    parser.add_argument('--config', help="JSON file with per-provider overrides")
+    args = parser.parse_args()
+
+    server = MockProviderServer(args.host, args.port, build_profiles(args))
+    print(f"Mock providers listening on {server.url}")
+    for key, value in server.environment().items():
+        print(f"  export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{json.dumps(server.stats(), indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,64 +1,65 @@
 import logging
 import os
-import google.generativeai as genai
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from src.analyzer.cassettes import recorded_call, recorded_stream
+from src.analyzer.chunked_review import review_in_chunks
+from src.analyzer.model_loader import ModelNotReady
+from src.analyzer.prompt_builder import (
+    REVIEW_FORMAT_INSTRUCTIONS,
+    build_pruned_prompt,
+    map_review_to_source
+)
+from src.analyzer.provider_router import ProviderRouter, ProviderUnavailable
+from src.analyzer.provider_registry import (
+    CLAUDE_MODEL,
+    OPENAI_MODEL,
+    get_provider_registry,
+    needs_reresolve
+)
+from src.analyzer.rate_limiter import get_rate_limiter
+from src.analyzer.response_cache import get_response_cache
+from src.analyzer.review_batcher import (
+    COMPLETION_TOKENS_PER_SNIPPET,
+    ReviewBatcher,
+    build_batch_prompt,
+    parse_batch_response,
+    snippet_ids
+)
+from src.analyzer.semantic_cache import get_semantic_cache
+from src.analyzer.stream_parser import StreamingReviewParser
+from src.utils.constants import DEFAULT_CHUNK_TOKENS
+from src.utils.tokens import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini API
+# The Gemini SDK itself is imported and configured by the provider registry on first use
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("Gemini API configured successfully")
-else:
+if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY environment variable not set. AI review will use fallback.")
 
-def review_code_with_ai(code: str, model_name: str = "gemini-pro") -> dict:
-    """Provides AI-driven code review using Google Gemini or other models.
+# Router provider for each selectable model name
+MODEL_PROVIDERS = {
+    'gemini-pro': 'gemini',
+    'gpt-4': 'openai',
+    'claude': 'claude',
+    'ollama': 'ollama',
+}
+PROVIDER_ORDER = ['gemini', 'openai', 'claude', 'ollama']
 
-    Args:
-        code (str): The code string to review.
-        model_name (str): The name of the AI model to use.
+_router = None
+_router_lock = threading.Lock()
+_batchers = {}
+_batchers_lock = threading.Lock()
 
-    Returns:
-        dict: A dictionary containing AI review result or fallback if API not available.
-    """
-    
-    # Use Gemini if API key is available
-    if GEMINI_API_KEY and model_name == "gemini-pro":
-        return _review_with_gemini(code)
-    elif model_name == "gpt-4":
-        return _review_with_openai(code)
-    elif model_name == "claude":
-        return _review_with_claude(code)
-    else:
-        return _fallback_review(code, model_name)
+# Bump whenever a prompt template changes so cached responses are not reused
+PROMPT_VERSION = "1"
 
+# Completion budget per review; also counted against tokens/min limits
+MAX_COMPLETION_TOKENS = 500
 
-def _review_with_gemini(code: str) -> dict:
-    """Use Google Gemini API for code review."""
-    try:
-        logger.info("Requesting AI review from Gemini...")
-        
-        # Use the latest available Gemini model
-        model_names = ['gemini-2.5-flash', 'gemini-2.5-pro', 'gemini-2.0-flash', 'gemini-pro']
-        model = None
-        used_model = None
-        
-        for model_name in model_names:
-            try:
-                model = genai.GenerativeModel(model_name)
-                used_model = model_name
-                logger.info(f"Using model: {model_name}")
-                break
-            except Exception as e:
-                logger.debug(f"Model {model_name} not available: {e}")
-                continue
-        
-        if not model:
-            logger.warning("No Gemini model available, using fallback")
-            return _fallback_review(code, "gemini-pro")
-        
-        prompt = f"""Please review this Python code and provide:
+GEMINI_PROMPT_TEMPLATE = """Please review this Python code and provide:
 1. A brief summary of what the code does
 2. 3-5 specific improvement suggestions (be concise)
 3. Any potential bugs or issues
@@ -70,153 +71,509 @@ Code to review:
 {code}
 ```
 
-Format your response as follows:
-SUMMARY: [brief summary]
-SUGGESTIONS: [bullet points]
-ISSUES: [potential bugs or concerns]
-QUALITY_RATING: [1-10]
-RECOMMENDATION: [brief recommendation]"""
-
-        response = model.generate_content(prompt)
-        review_text = response.text
-        
-        # Parse the response
-        review_dict = _parse_gemini_response(review_text)
-        review_dict["model_used"] = f"Gemini {used_model.split('-')[-1].title()}"
-        
-        logger.info("Gemini review completed successfully")
-        return review_dict
-        
+""" + REVIEW_FORMAT_INSTRUCTIONS
+
+CHAT_PROMPT_TEMPLATE = """Review this Python code and provide:
+1. Summary of what it does
+2. 3-5 improvement suggestions
+3. Any bugs or issues
+4. Code quality rating (1-10)
+
+Code:
+```python
+{code}
+```"""
+
+
+def review_code_with_ai(code: str, model_name: str = "gemini-pro", prune: bool = False,
+                        changed_lines: list = None, chunked: bool = False,
+                        chunk_tokens: int = DEFAULT_CHUNK_TOKENS, batch: bool = False) -> dict:
+    """Provides AI-driven code review using Google Gemini or other models.
+
+    Args:
+        code (str): The code string to review.
+        model_name (str): The name of the AI model to use, or "auto" to let the
+            router pick the fastest healthy provider.
+        prune (bool): Send only flagged or changed functions (with minimal context)
+            instead of the whole file.
+        changed_lines (list, optional): Line numbers changed since the last review;
+            functions touching them are included when pruning.
+        chunked (bool): Split large files into function/class chunks of at most
+            chunk_tokens tokens, review them concurrently and merge the results.
+            Cannot be combined with prune or changed_lines.
+        chunk_tokens (int): Token budget per chunk in chunked mode.
+        batch (bool): Share one provider call with other small snippets submitted
+            at about the same time (ignored when pruning).
+
+    Returns:
+        dict: A dictionary containing AI review result or fallback if API not available.
+
+    Raises:
+        ValueError: chunked was combined with prune or changed_lines.
+    """
+    if chunked:
+        if prune or changed_lines:
+            raise ValueError("Chunked review cannot be combined with prune or changed_lines")
+        return review_in_chunks(code, model_name, review_code_with_ai, max_tokens=chunk_tokens)
+
+    pruned = build_pruned_prompt(code, changed_lines=changed_lines) if prune else None
+    prompt = pruned['prompt'] if pruned else None
+
+    if model_name != "auto" and model_name not in MODEL_PROVIDERS:
+        return _fallback_review(code, model_name)
+
+    # Near-duplicates of an earlier submission (renamed variables, reformatting) reuse its review
+    semantic_cache = get_semantic_cache() if not pruned else None
+    if semantic_cache:
+        try:
+            cached = semantic_cache.lookup(code, model_name)
+        except ModelNotReady:
+            # The embedding model is still loading: review without the cache
+            cached = semantic_cache = None
+        if cached:
+            return cached
+
+    if batch and not pruned:
+        review = get_review_batcher(model_name).review(code)
+    else:
+        # The chosen provider goes first; slow or failing providers fail over to the others
+        try:
+            review = get_provider_router().review(code, prompt, preferred=MODEL_PROVIDERS.get(model_name))
+        except ProviderUnavailable as e:
+            logger.warning(f"No AI provider could review the code: {e}")
+            return _fallback_review(code, model_name)
+
+    if pruned:
+        review = map_review_to_source(review, pruned)
+    elif semantic_cache and not review.get('incomplete') and "(Fallback)" not in str(review.get('model_used')):
+        semantic_cache.add(code, model_name, review)
+    return review
+
+
+def stream_review_with_ai(code: str, model_name: str = "gemini-pro", prune: bool = False,
+                          changed_lines: list = None) -> Iterator[Dict]:
+    """Streams an AI code review, yielding each section as soon as the model has written it.
+
+    Chunked mode is not available here since chunks finish out of order.
+
+    Args:
+        code (str): The code string to review.
+        model_name (str): The name of the AI model to use, or "auto".
+        prune (bool): Send only flagged or changed functions instead of the whole file.
+        changed_lines (list, optional): Line numbers changed since the last review.
+
+    Yields:
+        dict: {'event': 'provider'} once a provider starts answering, then section
+            events ('summary', 'suggestion', 'issues', 'quality_rating',
+            'recommendation') as they arrive, and finally {'event': 'done'}
+            carrying the complete review dict.
+    """
+    pruned = build_pruned_prompt(code, changed_lines=changed_lines) if prune else None
+    prompt = pruned['prompt'] if pruned else None
+
+    review = None
+    if model_name == "auto" or model_name in MODEL_PROVIDERS:
+        parser = StreamingReviewParser()
+        provider = None
+        try:
+            for provider_name, piece in get_provider_router().stream(
+                    code, prompt, preferred=MODEL_PROVIDERS.get(model_name)):
+                if provider is None:
+                    provider = provider_name
+                    yield {'event': 'provider', 'data': provider}
+                yield from parser.feed(piece)
+            yield from parser.close()
+            review = dict(parser.sections, model_used=_model_label(provider), provider=provider)
+        except Exception as e:
+            if provider is None:
+                logger.warning(f"No AI provider could stream a review: {e}")
+            else:
+                # Sections already sent stay valid; report the rest as missing
+                logger.error(f"AI review stream from {provider} broke off: {e}")
+                yield {'event': 'error', 'data': str(e)}
+                review = dict(parser.sections, model_used=_model_label(provider), provider=provider,
+                              incomplete=True)
+
+    if review is None:
+        review = _fallback_review(code, model_name)
+        yield from _review_events(review)
+
+    if pruned:
+        review = map_review_to_source(review, pruned)
+    yield {'event': 'done', 'data': review}
+
+
+def review_batch_with_ai(snippets: List[str], model_name: str = "gemini-pro") -> List[Optional[dict]]:
+    """Reviews several small snippets with a single provider call.
+
+    Args:
+        snippets (list): Code strings to review.
+        model_name (str): The name of the AI model to use, or "auto".
+
+    Returns:
+        list: One review dict per snippet, None where the response left a snippet out.
+
+    Raises:
+        ProviderUnavailable: If no provider could answer.
+    """
+    prompt = build_batch_prompt(snippets)
+    result = get_provider_router().review(prompt, prompt, preferred=MODEL_PROVIDERS.get(model_name), options={
+        'parse': lambda text: {'reviews': parse_batch_response(text)},
+        'max_tokens': COMPLETION_TOKENS_PER_SNIPPET * len(snippets),
+    })
+
+    reviews = []
+    for snippet_id in snippet_ids(len(snippets)):
+        review = result['reviews'].get(snippet_id)
+        reviews.append(dict(review, model_used=result['model_used'], provider=result['provider'], batched=True)
+                       if review else None)
+    return reviews
+
+
+def get_review_batcher(model_name: str) -> ReviewBatcher:
+    """Get singleton instance (one batcher per model)"""
+    with _batchers_lock:
+        if model_name not in _batchers:
+            _batchers[model_name] = ReviewBatcher(
+                lambda snippets: review_batch_with_ai(snippets, model_name),
+                lambda code: review_code_with_ai(code, model_name)
+            )
+        return _batchers[model_name]
+
+
+def batching_stats() -> Dict:
+    """Counters of every batcher created so far."""
+    with _batchers_lock:
+        batchers = dict(_batchers)
+    return {model_name: batcher.stats() for model_name, batcher in batchers.items()}
+
+
+def _review_events(review: dict) -> List[Dict]:
+    """Section events for a review that is already complete."""
+    events = [{'event': 'summary', 'data': review['summary']}]
+    events.extend({'event': 'suggestion', 'data': suggestion} for suggestion in review['suggestions'])
+    for section in ('issues', 'quality_rating', 'recommendation'):
+        events.append({'event': section, 'data': review[section]})
+    return events
+
+
+def _review_with_gemini(code: str, prompt: str = None) -> dict:
+    """Use Google Gemini API for code review."""
+    try:
+        return _call_gemini(code, prompt)
     except Exception as e:
         logger.error(f"Gemini API error: {e}")
         return _fallback_review(code, "gemini-pro")
 
 
+def _call_gemini(code: str, prompt: str = None, parse=None, max_tokens: int = MAX_COMPLETION_TOKENS) -> dict:
+    """Review code with Gemini; raises on failure so the router can fail over."""
+    # Shared model handle, resolved once and refreshed periodically by the registry
+    model, used_model = get_provider_registry().gemini_model()
+    if not model:
+        raise ProviderUnavailable("No Gemini model available")
+
+    logger.info("Requesting AI review from Gemini...")
+    request_prompt = prompt or GEMINI_PROMPT_TEMPLATE.format(code=code)
+
+    try:
+        # Cached responses skip both the API call and parsing
+        review_dict = _cached_review(
+            'gemini', used_model, prompt or code, request_prompt,
+            lambda: recorded_call('gemini', used_model, request_prompt,
+                                  lambda: model.generate_content(request_prompt).text),
+            parse=parse, completion_tokens=max_tokens
+        )
+    except ProviderUnavailable:
+        raise
+    except Exception as e:
+        # The key may have been revoked or the resolved model retired; resolve again on the next request
+        if needs_reresolve(e):
+            get_provider_registry().invalidate('gemini')
+        raise
+    review_dict["model_used"] = f"Gemini {used_model.split('-')[-1].title()}"
+
+    logger.info("Gemini review completed successfully")
+    return review_dict
+
+
+def _cached_review(provider: str, model: str, content: str, request_prompt: str, generate,
+                   parse=None, completion_tokens: int = MAX_COMPLETION_TOKENS) -> dict:
+    """Return the cached parsed review for a request, or generate, parse and cache it.
+
+    Cache misses wait for the provider's rate limit before calling it.
+
+    Args:
+        provider (str): Provider name used in the cache key and rate limit.
+        model (str): The resolved model name.
+        content (str): The code (or custom prompt) that identifies the request.
+        request_prompt (str): The prompt actually sent, for token estimation.
+        generate (callable): Calls the provider and returns the raw response text.
+        parse (callable, optional): Turns the raw text into a dict (default: review sections).
+        completion_tokens (int): Completion budget counted against the rate limit.
+    """
+    cache = get_response_cache()
+    key = cache.make_key(provider, model, PROMPT_VERSION, content) if cache else None
+
+    if key:
+        cached = cache.get(key)
+        if cached:
+            logger.info(f"AI review cache hit ({provider}/{model})")
+            return dict(cached['parsed'], cache_hit=True)
+
+    get_rate_limiter(provider).acquire(estimate_tokens(request_prompt) + completion_tokens)
+    review_text = generate()
+    sections = (parse or _parse_gemini_response)(review_text)
+
+    if key:
+        cache.put(key, provider, model, review_text, sections)
+    return sections
+
+
+def _cached_stream(provider: str, model: str, content: str, request_prompt: str, stream) -> Iterator[str]:
+    """Streaming counterpart of _cached_review: yields a cached completion in one piece,
+    or streams it from the provider and caches it once complete.
+
+    Args:
+        provider (str): Provider name used in the cache key and rate limit.
+        model (str): The resolved model name.
+        content (str): The code (or custom prompt) that identifies the request.
+        request_prompt (str): The prompt actually sent, for token estimation.
+        stream (callable): Calls the provider and returns an iterator of text pieces.
+    """
+    cache = get_response_cache()
+    key = cache.make_key(provider, model, PROMPT_VERSION, content) if cache else None
+
+    if key:
+        cached = cache.get(key)
+        if cached:
+            logger.info(f"AI review cache hit ({provider}/{model})")
+            yield cached['raw']
+            return
+
+    get_rate_limiter(provider).acquire(estimate_tokens(request_prompt) + MAX_COMPLETION_TOKENS)
+    pieces = []
+    for piece in stream():
+        if piece:
+            pieces.append(piece)
+            yield piece
+
+    if key:
+        review_text = "".join(pieces)
+        cache.put(key, provider, model, review_text, _parse_gemini_response(review_text))
+
+
 def _parse_gemini_response(text: str) -> dict:
     """Parse Gemini response into structured format."""
-    sections = {
-        'summary': '',
-        'suggestions': [],
-        'issues': '',
-        'quality_rating': 'N/A',
-        'recommendation': '',
-    }
-    
-    lines = text.split('\n')
-    current_section = None
-    
-    for line in lines:
-        line = line.strip()
-        
-        if line.startswith('SUMMARY:'):
-            sections['summary'] = line.replace('SUMMARY:', '').strip()
-        elif line.startswith('SUGGESTIONS:'):
-            current_section = 'suggestions'
-        elif line.startswith('ISSUES:'):
-            current_section = 'issues'
-            sections['issues'] = line.replace('ISSUES:', '').strip()
-        elif line.startswith('QUALITY_RATING:'):
-            sections['quality_rating'] = line.replace('QUALITY_RATING:', '').strip()
-        elif line.startswith('RECOMMENDATION:'):
-            sections['recommendation'] = line.replace('RECOMMENDATION:', '').strip()
-        elif line.startswith('- ') or line.startswith('• '):
-            if current_section == 'suggestions':
-                sections['suggestions'].append(line[2:].strip())
-    
-    return sections
+    parser = StreamingReviewParser()
+    parser.feed(text)
+    parser.close()
+    return parser.sections
 
 
-def _review_with_openai(code: str) -> dict:
-    """Use OpenAI GPT-4 API for code review."""
-    try:
-        from openai import OpenAI
-        
-        logger.info("Requesting AI review from OpenAI...")
-        
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            logger.warning("OPENAI_API_KEY not set, using fallback")
-            return _fallback_review(code, "gpt-4")
-        
-        client = OpenAI(api_key=api_key)
-        
+def _call_openai(code: str, prompt: str = None, parse=None, max_tokens: int = MAX_COMPLETION_TOKENS) -> dict:
+    """Review code with OpenAI GPT-4; raises on failure so the router can fail over."""
+    client = get_provider_registry().openai_client()
+    if not client:
+        raise ProviderUnavailable("OPENAI_API_KEY not set")
+
+    logger.info("Requesting AI review from OpenAI...")
+    request_prompt = prompt or CHAT_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
         response = client.chat.completions.create(
-            model="gpt-4",
+            model=OPENAI_MODEL,
             messages=[
                 {
                     "role": "user",
-                    "content": f"""Review this Python code and provide:
-1. Summary of what it does
-2. 3-5 improvement suggestions
-3. Any bugs or issues
-4. Code quality rating (1-10)
-
-Code:
-```python
-{code}
-```"""
+                    "content": request_prompt
                 }
             ],
             temperature=0.7,
-            max_tokens=500
+            max_tokens=max_tokens
         )
-        
-        review_text = response.choices[0].message.content
-        sections = _parse_gemini_response(review_text)
-        sections['model_used'] = 'GPT-4'
-        
-        logger.info("OpenAI review completed successfully")
-        return sections
-        
-    except Exception as e:
-        logger.error(f"OpenAI API error: {e}")
-        return _fallback_review(code, "gpt-4")
+        return response.choices[0].message.content
 
+    sections = _cached_review('openai', OPENAI_MODEL, prompt or code, request_prompt,
+                              lambda: recorded_call('openai', OPENAI_MODEL, request_prompt, generate),
+                              parse=parse, completion_tokens=max_tokens)
+    sections['model_used'] = 'GPT-4'
 
-def _review_with_claude(code: str) -> dict:
-    """Use Anthropic Claude API for code review."""
-    try:
-        import anthropic
-        
-        logger.info("Requesting AI review from Claude...")
-        
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            logger.warning("ANTHROPIC_API_KEY not set, using fallback")
-            return _fallback_review(code, "claude")
-        
-        client = anthropic.Anthropic(api_key=api_key)
-        
+    logger.info("OpenAI review completed successfully")
+    return sections
+
+
+def _call_claude(code: str, prompt: str = None, parse=None, max_tokens: int = MAX_COMPLETION_TOKENS) -> dict:
+    """Review code with Anthropic Claude; raises on failure so the router can fail over."""
+    client = get_provider_registry().anthropic_client()
+    if not client:
+        raise ProviderUnavailable("ANTHROPIC_API_KEY not set")
+
+    logger.info("Requesting AI review from Claude...")
+    request_prompt = prompt or CHAT_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
         message = client.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=500,
+            model=CLAUDE_MODEL,
+            max_tokens=max_tokens,
             messages=[
                 {
                     "role": "user",
-                    "content": f"""Review this Python code and provide:
-1. Summary of what it does
-2. 3-5 improvement suggestions
-3. Any bugs or issues
-4. Code quality rating (1-10)
-
-Code:
-```python
-{code}
-```"""
+                    "content": request_prompt
                 }
             ]
         )
-        
-        review_text = message.content[0].text
-        sections = _parse_gemini_response(review_text)
-        sections['model_used'] = 'Claude 3 Opus'
-        
-        logger.info("Claude review completed successfully")
-        return sections
-        
+        return message.content[0].text
+
+    sections = _cached_review('claude', CLAUDE_MODEL, prompt or code, request_prompt,
+                              lambda: recorded_call('claude', CLAUDE_MODEL, request_prompt, generate),
+                              parse=parse, completion_tokens=max_tokens)
+    sections['model_used'] = 'Claude 3 Opus'
+
+    logger.info("Claude review completed successfully")
+    return sections
+
+
+def _call_ollama(code: str, prompt: str = None, parse=None, max_tokens: int = MAX_COMPLETION_TOKENS) -> dict:
+    """Review code with the local Ollama model; raises on failure so the router can fail over."""
+    local_model = get_provider_registry().local_model()
+    if not local_model:
+        raise ProviderUnavailable("Local model server not available")
+
+    logger.info(f"Requesting AI review from local model {local_model.model_name}...")
+    request_prompt = prompt or GEMINI_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
+        result = local_model.analyze_code(code, prompt=request_prompt)
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+        return result['analysis']
+
+    sections = _cached_review('ollama', local_model.model_name, prompt or code, request_prompt, generate,
+                              parse=parse, completion_tokens=max_tokens)
+    sections['model_used'] = f"Ollama {local_model.model_name}"
+
+    logger.info("Local model review completed successfully")
+    return sections
+
+
+def _stream_gemini(code: str, prompt: str = None) -> Iterator[str]:
+    """Stream a Gemini review's text; raises like _call_gemini."""
+    model, used_model = get_provider_registry().gemini_model()
+    if not model:
+        raise ProviderUnavailable("No Gemini model available")
+
+    logger.info("Streaming AI review from Gemini...")
+    request_prompt = prompt or GEMINI_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
+        for chunk in model.generate_content(request_prompt, stream=True):
+            yield chunk.text
+
+    try:
+        yield from _cached_stream('gemini', used_model, prompt or code, request_prompt,
+                                  lambda: recorded_stream('gemini', used_model, request_prompt, generate))
+    except ProviderUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Claude API error: {e}")
-        return _fallback_review(code, "claude")
+        if needs_reresolve(e):
+            get_provider_registry().invalidate('gemini')
+        raise
+
+
+def _stream_openai(code: str, prompt: str = None) -> Iterator[str]:
+    """Stream an OpenAI review's text; raises like _call_openai."""
+    client = get_provider_registry().openai_client()
+    if not client:
+        raise ProviderUnavailable("OPENAI_API_KEY not set")
+
+    logger.info("Streaming AI review from OpenAI...")
+    request_prompt = prompt or CHAT_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": request_prompt}],
+            temperature=0.7,
+            max_tokens=MAX_COMPLETION_TOKENS,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    yield from _cached_stream('openai', OPENAI_MODEL, prompt or code, request_prompt,
+                              lambda: recorded_stream('openai', OPENAI_MODEL, request_prompt, generate))
+
+
+def _stream_claude(code: str, prompt: str = None) -> Iterator[str]:
+    """Stream a Claude review's text; raises like _call_claude."""
+    client = get_provider_registry().anthropic_client()
+    if not client:
+        raise ProviderUnavailable("ANTHROPIC_API_KEY not set")
+
+    logger.info("Streaming AI review from Claude...")
+    request_prompt = prompt or CHAT_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
+        with client.messages.stream(
+            model=CLAUDE_MODEL,
+            max_tokens=MAX_COMPLETION_TOKENS,
+            messages=[{"role": "user", "content": request_prompt}]
+        ) as stream:
+            yield from stream.text_stream
+
+    yield from _cached_stream('claude', CLAUDE_MODEL, prompt or code, request_prompt,
+                              lambda: recorded_stream('claude', CLAUDE_MODEL, request_prompt, generate))
+
+
+def _stream_ollama(code: str, prompt: str = None) -> Iterator[str]:
+    """Stream the local model's review text; raises like _call_ollama."""
+    local_model = get_provider_registry().local_model()
+    if not local_model:
+        raise ProviderUnavailable("Local model server not available")
+
+    logger.info(f"Streaming AI review from local model {local_model.model_name}...")
+    request_prompt = prompt or GEMINI_PROMPT_TEMPLATE.format(code=code)
+
+    def generate():
+        result = local_model.analyze_code(code, prompt=request_prompt, stream=True)
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+        yield from result['stream']
+
+    yield from _cached_stream('ollama', local_model.model_name, prompt or code, request_prompt, generate)
+
+
+def _model_label(provider: str) -> str:
+    """Display name of the model behind a provider."""
+    registry = get_provider_registry()
+    if provider == 'gemini':
+        _, used_model = registry.gemini_model()
+        return f"Gemini {used_model.split('-')[-1].title()}" if used_model else "Gemini"
+    if provider == 'ollama':
+        local_model = registry.local_model()
+        return f"Ollama {local_model.model_name}" if local_model else "Ollama"
+    return {'openai': 'GPT-4', 'claude': 'Claude 3 Opus'}.get(provider, provider)
+
+
+def get_provider_router() -> ProviderRouter:
+    """Get singleton instance"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter({
+                'gemini': _call_gemini,
+                'openai': _call_openai,
+                'claude': _call_claude,
+                'ollama': _call_ollama,
+            }, order=PROVIDER_ORDER, streamers={
+                'gemini': _stream_gemini,
+                'openai': _stream_openai,
+                'claude': _stream_claude,
+                'ollama': _stream_ollama,
+            })
+    return _router
 
 
 def _fallback_review(code: str, model_name: str) -> dict:
@@ -0,0 +1,209 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.analyzer.provider_router import ProviderUnavailable
+from src.utils.constants import CASSETTE_DIR, DEFAULT_CASSETTE_FILE
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+
+
+class CassetteMiss(ProviderUnavailable):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """Records provider requests/responses with their timing to a gzip JSONL file, or replays them.
+
+    Entries are keyed on provider and prompt. A request recorded several times
+    is replayed in the order it was recorded.
+    """
+
+    def __init__(self, path: str, mode: str, time_scale: float = 1.0):
+        """Open a cassette.
+
+        Args:
+            path (str): Cassette file (.jsonl.gz). Recording appends to it.
+            mode (str): "record" or "replay".
+            time_scale (float): Replay delays are multiplied by this (0 for none).
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._positions: Dict[str, int] = {}
+        self._file = None
+
+        if mode == 'replay':
+            for entry in self._load(path):
+                self._entries.setdefault(entry['key'], []).append(entry)
+            logger.info(f"Replaying {sum(map(len, self._entries.values()))} provider responses from {path}")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = gzip.open(path, 'at', encoding='utf-8')
+            atexit.register(self.close)
+            logger.info(f"Recording provider responses to {path}")
+
+    @staticmethod
+    def make_key(provider: str, prompt: str) -> str:
+        """Identify a request by provider and the exact prompt sent."""
+        return hashlib.sha256(f"{provider}|{prompt}".encode('utf-8')).hexdigest()
+
+    def call(self, provider: str, model: str, prompt: str, call: Callable[[], str]) -> str:
+        """Record or replay a blocking provider call that returns the completion text."""
+        key = self.make_key(provider, prompt)
+        if self.mode == 'replay':
+            entry = self._next(key, provider)
+            self._sleep(entry['latency'])
+            if entry.get('error'):
+                raise RuntimeError(entry['error'])
+            return entry['response']
+
+        start = time.perf_counter()
+        try:
+            response = call()
+        except ProviderUnavailable:
+            raise
+        except Exception as e:
+            self._write(key, provider, model, time.perf_counter() - start, error=str(e))
+            raise
+        self._write(key, provider, model, time.perf_counter() - start, response=response)
+        return response
+
+    def stream(self, provider: str, model: str, prompt: str, stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Record or replay a streamed provider call, keeping the arrival time of every piece."""
+        key = self.make_key(provider, prompt)
+        if self.mode == 'replay':
+            entry = self._next(key, provider)
+            start = time.perf_counter()
+            for offset, piece in entry['pieces']:
+                self._sleep(offset - (time.perf_counter() - start) / (self.time_scale or 1))
+                yield piece
+            self._sleep(entry['latency'] - (time.perf_counter() - start) / (self.time_scale or 1))
+            if entry.get('error'):
+                raise RuntimeError(entry['error'])
+            return
+
+        start = time.perf_counter()
+        pieces = []
+        try:
+            for piece in stream():
+                pieces.append([round(time.perf_counter() - start, 4), piece])
+                yield piece
+        except ProviderUnavailable:
+            raise
+        except Exception as e:
+            self._write(key, provider, model, time.perf_counter() - start, pieces=pieces, error=str(e))
+            raise
+        self._write(key, provider, model, time.perf_counter() - start,
+                    response="".join(piece for _, piece in pieces), pieces=pieces)
+
+    def stats(self) -> Dict:
+        """Counters for this process."""
+        with self._lock:
+            return {'mode': self.mode, 'path': self.path, 'recorded': self.recorded,
+                    'replayed': self.replayed, 'misses': self.misses}
+
+    def close(self):
+        """Finish the cassette file (recording only)."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _next(self, key: str, provider: str) -> Dict:
+        """The next recorded entry for a request, cycling when it was replayed as often as recorded."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded {provider} response for this prompt in {self.path}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.replayed += 1
+            return entries[position % len(entries)]
+
+    def _sleep(self, seconds: float):
+        if self.time_scale and seconds > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _write(self, key: str, provider: str, model: str, latency: float, response: str = None,
+               pieces: Optional[List] = None, error: str = None):
+        entry = {'key': key, 'provider': provider, 'model': model, 'latency': round(latency, 4),
+                 'response': response, 'pieces': pieces, 'error': error, 'recorded_at': time.time()}
+        with self._lock:
+            if self._file:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+                self.recorded += 1
+
+    @staticmethod
+    def _load(path: str) -> Iterator[Dict]:
+        """Entries of a cassette file; a truncated tail (interrupted recording) is ignored."""
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, zlib.error, ValueError) as e:
+            logger.warning(f"Cassette {path} ends early: {e}")
+
+
+# Singleton instance
+_cassette = None
+_cassette_initialized = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the process-wide cassette configured from the environment, or None when off.
+
+    Environment:
+        AI_CASSETTE_MODE: "record", "replay" or "off" (default).
+        AI_CASSETTE_PATH: Cassette file (default cassettes/providers.jsonl.gz).
+        AI_CASSETTE_TIME_SCALE: Multiplier for replayed timing (default 1, 0 for instant).
+    """
+    global _cassette, _cassette_initialized
+    with _cassette_lock:
+        if not _cassette_initialized:
+            _cassette_initialized = True
+            mode = os.getenv('AI_CASSETTE_MODE', 'off')
+            if mode not in CASSETTE_MODES:
+                logger.warning(f"Ignoring unknown AI_CASSETTE_MODE={mode}")
+            elif mode != 'off':
+                path = os.getenv('AI_CASSETTE_PATH', os.path.join(os.getcwd(), CASSETTE_DIR, DEFAULT_CASSETTE_FILE))
+                _cassette = Cassette(path, mode, time_scale=float(os.getenv('AI_CASSETTE_TIME_SCALE', '1')))
+    return _cassette
+
+
+def replaying() -> bool:
+    """Whether provider responses come from a cassette (so no credentials or server are needed)."""
+    cassette = get_cassette()
+    return cassette is not None and cassette.mode == 'replay'
+
+
+def recorded_call(provider: str, model: str, prompt: str, call: Callable[[], str]) -> str:
+    """Run a blocking provider call through the active cassette, if any."""
+    cassette = get_cassette()
+    return cassette.call(provider, model, prompt, call) if cassette else call()
+
+
+def recorded_stream(provider: str, model: str, prompt: str, stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+    """Run a streamed provider call through the active cassette, if any."""
+    cassette = get_cassette()
+    return cassette.stream(provider, model, prompt, stream) if cassette else stream()
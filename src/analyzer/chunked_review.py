@@ -0,0 +1,208 @@
+import ast
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.analyzer.prompt_builder import map_review_to_source
+from src.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Maximum concurrent review calls per provider, shared by every request in the process
+PROVIDER_CONCURRENCY = {
+    'gemini-pro': 4,
+    'gpt-4': 4,
+    'claude': 2,
+}
+DEFAULT_CONCURRENCY = 2
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+def split_into_chunks(code: str, max_tokens: int) -> List[Dict]:
+    """Splits Python source into function/class chunks that fit a token budget.
+
+    Adjacent small top-level units are packed together; classes that are too big
+    are split into their methods and anything still too big is cut by lines.
+
+    Args:
+        code (str): The Python code string to split.
+        max_tokens (int): Token budget per chunk.
+
+    Returns:
+        list: Chunks with 'name', 'start_line', 'end_line' and 'source'.
+    """
+    lines = code.splitlines()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return _split_by_lines(lines, 1, len(lines), '<module>', max_tokens)
+
+    units = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+        name = getattr(node, 'name', '<module>')
+        if name == '<module>' and units and units[-1]['name'] == '<module>':
+            # Consecutive module-level statements (imports, constants) form one unit
+            start = units.pop()['start_line']
+        units.extend(_fit_unit(node, name, start, node.end_lineno, lines, max_tokens))
+
+    chunks = []
+    for unit in units:
+        previous = chunks[-1] if chunks else None
+        if previous and estimate_tokens(_source(lines, previous['start_line'], unit['end_line'])) <= max_tokens:
+            previous['end_line'] = unit['end_line']
+            previous['name'] = f"{previous['name']}, {unit['name']}"
+        else:
+            chunks.append(dict(unit))
+
+    for chunk in chunks:
+        chunk['source'] = _source(lines, chunk['start_line'], chunk['end_line'])
+    return chunks
+
+
+def review_in_chunks(code: str, model_name: str, review_fn: Callable[[str, str], Dict],
+                     max_tokens: int, max_concurrency: int = None) -> Dict:
+    """Reviews a large file chunk by chunk in parallel and merges the partial reviews.
+
+    Args:
+        code (str): The code string to review.
+        model_name (str): The AI model to use.
+        review_fn (callable): Reviews one chunk: review_fn(code, model_name) -> dict.
+        max_tokens (int): Token budget per chunk.
+        max_concurrency (int, optional): Overrides the provider's concurrency cap.
+
+    Returns:
+        dict: A single review in the usual summary/suggestions/issues/quality_rating shape.
+    """
+    chunks = split_into_chunks(code, max_tokens)
+    if len(chunks) <= 1:
+        return review_fn(code, model_name)
+
+    limit = max_concurrency or PROVIDER_CONCURRENCY.get(model_name, DEFAULT_CONCURRENCY)
+    semaphore = _provider_semaphore(model_name, limit)
+    logger.info(f"Reviewing {len(chunks)} chunks with {model_name} (concurrency {limit})")
+
+    def review_chunk(chunk: Dict) -> Dict:
+        with semaphore:
+            review = review_fn(chunk['source'], model_name)
+        segment = {'qualname': chunk['name'], 'start_line': chunk['start_line'], 'end_line': chunk['end_line']}
+        # The chunk is sent without a gutter: the model counts lines from its first line
+        return map_review_to_source(review, {'segments': [segment]}, relative=True)
+
+    # No more threads than calls allowed in flight: a large file must not fan out to one thread per chunk
+    with ThreadPoolExecutor(max_workers=min(len(chunks), limit)) as executor:
+        reviews = list(executor.map(review_chunk, chunks))
+
+    return merge_reviews(chunks, reviews)
+
+
+def merge_reviews(chunks: List[Dict], reviews: List[Dict]) -> Dict:
+    """Merges per-chunk reviews, deduplicating suggestions and averaging ratings.
+
+    Suggestions are only merged when they are identical up to case, punctuation
+    and whitespace: near-identical ones usually point at different functions or
+    lines (e.g. "Rename function_0" and "Rename function_1") and are all kept.
+    """
+    suggestions = []
+    seen = set()
+    for review in reviews:
+        for suggestion in review.get('suggestions', []):
+            key = _normalize(suggestion)
+            if key not in seen:
+                seen.add(key)
+                suggestions.append(suggestion)
+
+    issues = [f"[{chunk['name']}] {review['issues']}" for chunk, review in zip(chunks, reviews)
+              if review.get('issues') and review['issues'].strip().lower() not in ('none', 'n/a', '-')]
+
+    ratings = [(_parse_rating(r.get('quality_rating')), estimate_tokens(c['source']))
+               for c, r in zip(chunks, reviews)]
+    ratings = [(value, weight) for value, weight in ratings if value is not None]
+    if ratings:
+        average = sum(value * weight for value, weight in ratings) / sum(weight for _, weight in ratings)
+        quality_rating = f"{average:.1f}"
+    else:
+        quality_rating = reviews[0].get('quality_rating', 'N/A')
+
+    summaries = [f"{chunk['name']}: {review['summary']}" for chunk, review in zip(chunks, reviews)
+                 if review.get('summary')]
+    recommendations = list(dict.fromkeys(r['recommendation'] for r in reviews if r.get('recommendation')))
+
+    return {
+        'summary': f"Reviewed in {len(chunks)} parts. " + " ".join(summaries),
+        'suggestions': suggestions,
+        'issues': "\n".join(issues),
+        'quality_rating': quality_rating,
+        'recommendation': " ".join(recommendations),
+        'model_used': reviews[0].get('model_used', 'N/A'),
+        'issue_lines': sorted({line for r in reviews for line in r.get('issue_lines', [])}),
+        'chunks': [{'name': c['name'], 'start_line': c['start_line'], 'end_line': c['end_line'],
+                    'quality_rating': r.get('quality_rating', 'N/A')} for c, r in zip(chunks, reviews)],
+    }
+
+
+def _fit_unit(node: ast.AST, name: str, start: int, end: int, lines: List[str], max_tokens: int) -> List[Dict]:
+    """Return the node as one unit, or split it when it exceeds the budget."""
+    if estimate_tokens(_source(lines, start, end)) <= max_tokens:
+        return [{'name': name, 'start_line': start, 'end_line': end}]
+
+    if isinstance(node, ast.ClassDef) and node.body:
+        units = []
+        body_start = node.body[0].lineno
+        if body_start > start:
+            units.append({'name': name, 'start_line': start, 'end_line': body_start - 1})
+        for child in node.body:
+            child_start = min([child.lineno] + [d.lineno for d in getattr(child, 'decorator_list', [])])
+            child_name = f"{name}.{getattr(child, 'name', '<body>')}"
+            units.extend(_fit_unit(child, child_name, child_start, child.end_lineno, lines, max_tokens))
+        return units
+
+    return _split_by_lines(lines, start, end, name, max_tokens)
+
+
+def _split_by_lines(lines: List[str], start: int, end: int, name: str, max_tokens: int) -> List[Dict]:
+    """Cut an oversized span into consecutive line ranges within the budget."""
+    units = []
+    chunk_start = start
+    tokens = 0
+    for line_no in range(start, end + 1):
+        line_tokens = estimate_tokens(lines[line_no - 1] + "\n")
+        if tokens and tokens + line_tokens > max_tokens:
+            units.append({'name': f"{name} (part {len(units) + 1})", 'start_line': chunk_start, 'end_line': line_no - 1})
+            chunk_start, tokens = line_no, 0
+        tokens += line_tokens
+    units.append({'name': f"{name} (part {len(units) + 1})" if units else name,
+                  'start_line': chunk_start, 'end_line': end})
+    return units
+
+
+def _source(lines: List[str], start: int, end: int) -> str:
+    """Source text of an inclusive 1-based line range."""
+    return "\n".join(lines[start - 1:end])
+
+
+def _provider_semaphore(model_name: str, limit: int) -> threading.BoundedSemaphore:
+    """Get the process-wide concurrency limiter for a provider."""
+    with _semaphores_lock:
+        key = (model_name, limit)
+        if key not in _semaphores:
+            _semaphores[key] = threading.BoundedSemaphore(limit)
+        return _semaphores[key]
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and strip punctuation/whitespace differences (digits and identifiers are kept)."""
+    return " ".join(re.sub(r'[^\w\s]', ' ', str(text).lower()).split())
+
+
+def _parse_rating(rating) -> Optional[float]:
+    """Extract the numeric score from ratings like '7', '7/10' or '7.5 out of 10'."""
+    match = re.search(r'\d+(?:\.\d+)?', str(rating or ''))
+    if not match:
+        return None
+    value = float(match.group())
+    return value if 0 <= value <= 10 else None
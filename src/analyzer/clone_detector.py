@@ -0,0 +1,356 @@
+import atexit
+import bisect
+import hashlib
+import json
+import keyword
+import logging
+import os
+import threading
+import tokenize
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from src.analyzer.code_units import extract_units
+from src.utils.tokens import python_tokens
+
+logger = logging.getLogger(__name__)
+
+# Consecutive normalized tokens per shingle
+DEFAULT_SHINGLE_SIZE = 5
+# LSH banding of the MinHash signature: bands x rows hash values. Pairs are
+# candidates when one band matches in full, which for 16 x 8 happens with
+# probability 1 - (1 - J^8)^16: ~0.97 at Jaccard 0.8, ~0.09 at 0.5.
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 8
+# Estimated Jaccard similarity of shingle sets from which two functions are clones
+DEFAULT_CLONE_THRESHOLD = 0.8
+# Functions shorter than this many tokens (accessors, one-liners) are not compared
+DEFAULT_MIN_TOKENS = 40
+# Candidate pairs whose signatures are compared at once
+CANDIDATES_PER_CHUNK = 2 ** 18
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Multiplier of the rolling shingle hash
+SHINGLE_BASE = 1000003
+
+# Token types normalized to a placeholder, so renamed copies still match
+PLACEHOLDERS = {tokenize.NUMBER: "NUM", tokenize.STRING: "STR"}
+for _name in ("FSTRING_START", "FSTRING_MIDDLE", "FSTRING_END"):
+    if hasattr(tokenize, _name):
+        PLACEHOLDERS[getattr(tokenize, _name)] = "STR"
+
+
+def normalize_token(token_type: int, string: str) -> str:
+    """Token as compared by the clone detector: identifiers and literals lose their value."""
+    if token_type == tokenize.NAME:
+        return string if keyword.iskeyword(string) else "ID"
+    if token_type in PLACEHOLDERS:
+        return PLACEHOLDERS[token_type]
+    if token_type == tokenize.INDENT:
+        return "INDENT"
+    if token_type == tokenize.NEWLINE:
+        return "NEWLINE"
+    return string
+
+
+class CloneDetector:
+    """Finds near-duplicate functions from their Python tokens, without a model.
+
+    Each function's normalized token stream (see normalize_token) is cut into
+    overlapping shingles and summarized by a MinHash signature, whose matching
+    positions estimate the Jaccard similarity of two functions' shingle sets.
+    Signatures are split into LSH bands; only functions whose signatures agree
+    on a whole band are compared, so finding clones sorts the functions once
+    per band instead of comparing every pair.
+
+    Signatures are kept per file and persisted, so a repeated scan only
+    tokenizes the files that changed.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_CLONE_THRESHOLD, bands: int = DEFAULT_BANDS,
+                 rows: int = DEFAULT_ROWS, shingle_size: int = DEFAULT_SHINGLE_SIZE,
+                 min_tokens: int = DEFAULT_MIN_TOKENS, path: Optional[str] = None):
+        """Initialize the detector, loading saved signatures from path when the file exists.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of a clone pair.
+            bands (int): LSH bands.
+            rows (int): Signature values per band (bands * rows MinHash permutations).
+            shingle_size (int): Tokens per shingle.
+            min_tokens (int): Smallest function (in tokens) that is compared.
+            path (str, optional): .npz file the signatures are persisted to.
+        """
+        import numpy as np
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.path = path
+        self.num_perm = bands * rows
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=self.num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._entries = []  # per row: location dict, or None when free
+        self._free = []
+        self._files = {}    # path -> {'hash': ..., 'rows': [...]}
+        self._unsaved = False
+
+        if path and os.path.exists(path):
+            self._load(path)
+        if path:
+            atexit.register(self.save)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entry['rows']) for entry in self._files.values())
+
+    def update(self, files: Dict[str, str], root: Optional[str] = None) -> Dict:
+        """Bring the signatures up to date with a set of files.
+
+        Only files whose content changed since they were last seen are
+        tokenized again.
+
+        Args:
+            files (dict): Source code keyed by file path.
+            root (str, optional): Directory the files were scanned from; known
+                files under it that are missing from files are dropped.
+
+        Returns:
+            dict: Counts of 'indexed', 'unchanged' and 'removed' files.
+        """
+        counts = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        for path, code in files.items():
+            file_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+            with self._lock:
+                known = self._files.get(path)
+            if known and known['hash'] == file_hash:
+                counts['unchanged'] += 1
+                continue
+            self.add_file(path, code, file_hash=file_hash)
+            counts['indexed'] += 1
+
+        if root is not None:
+            prefix = os.path.join(root, '')
+            with self._lock:
+                gone = [path for path in self._files if path.startswith(prefix) and path not in files]
+            for path in gone:
+                self.remove_file(path)
+            counts['removed'] = len(gone)
+        return counts
+
+    def add_file(self, path: str, code: str, file_hash: Optional[str] = None):
+        """Compute the signatures of a file's functions, replacing any earlier ones."""
+        functions = self.signatures(code)
+        with self._lock:
+            self._remove_rows(path)
+            rows = []
+            for function in functions:
+                signature = function.pop('signature')
+                row = self._allocate()
+                self._signatures[row] = signature
+                self._entries[row] = dict(function, path=path)
+                rows.append(row)
+            self._files[path] = {'hash': file_hash, 'rows': rows}
+            self._unsaved = True
+
+    def remove_file(self, path: str) -> bool:
+        """Drop the signatures of a file; False if it was not known."""
+        with self._lock:
+            removed = self._remove_rows(path)
+            self._unsaved = self._unsaved or removed
+            return removed
+
+    def signatures(self, code: str) -> List[Dict]:
+        """MinHash signatures of the functions and methods of a module.
+
+        The module is tokenized once; each function takes the tokens within its
+        line range. Functions below min_tokens are left out.
+
+        Returns:
+            list: Dicts with 'qualname', 'kind', 'start_line', 'end_line',
+                'tokens' and 'signature' (uint32 array). Empty if the code does
+                not parse.
+        """
+        units = extract_units(code)
+        if not units:
+            return []
+        try:
+            tokens = [(line, normalize_token(token_type, string))
+                      for token_type, string, line in python_tokens(code) if token_type != tokenize.DEDENT]
+        except (tokenize.TokenError, SyntaxError) as e:
+            logger.warning(f"Could not tokenize for clone detection: {e}")
+            return []
+        lines = [line for line, _ in tokens]
+
+        functions = []
+        for unit in units:
+            first = bisect.bisect_left(lines, unit['start_line'])
+            last = bisect.bisect_right(lines, unit['end_line'])
+            stream = [token for _, token in tokens[first:last]]
+            if len(stream) < max(self.min_tokens, self.shingle_size):
+                continue
+            functions.append({
+                'qualname': unit['qualname'],
+                'kind': unit['kind'],
+                'start_line': unit['start_line'],
+                'end_line': unit['end_line'],
+                'tokens': len(stream),
+                'signature': self._minhash(stream),
+            })
+        return functions
+
+    def clones(self, paths: Optional[Iterable[str]] = None, threshold: Optional[float] = None) -> List[Dict]:
+        """Pairs of near-duplicate functions.
+
+        Args:
+            paths (iterable, optional): Only report pairs of functions in these files.
+            threshold (float, optional): Overrides the detector's threshold.
+
+        Returns:
+            list: {'a', 'b', 'similarity'} dicts (a and b are locations with
+                'path', 'qualname', 'kind', lines and 'tokens'), most similar first.
+        """
+        import numpy as np
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            if paths is None:
+                rows = [row for row, entry in enumerate(self._entries) if entry is not None]
+            else:
+                rows = [row for path in set(paths) for row in self._files.get(path, {}).get('rows', [])]
+            pairs = self._candidate_pairs(np.array(sorted(rows), dtype=np.int64))
+            found = []
+            for start in range(0, len(pairs), CANDIDATES_PER_CHUNK):
+                chunk = pairs[start:start + CANDIDATES_PER_CHUNK]
+                similarity = (self._signatures[chunk[:, 0]] == self._signatures[chunk[:, 1]]).mean(axis=1)
+                for (a, b), value in zip(chunk[similarity >= threshold], similarity[similarity >= threshold]):
+                    found.append({'a': dict(self._entries[a]), 'b': dict(self._entries[b]),
+                                  'similarity': round(float(value), 3)})
+        for pair in found:
+            # Report each pair in source order
+            if (pair['a']['path'], pair['a']['start_line']) > (pair['b']['path'], pair['b']['start_line']):
+                pair['a'], pair['b'] = pair['b'], pair['a']
+        return sorted(found, key=lambda pair: (-pair['similarity'], pair['a']['path'], pair['a']['start_line']))
+
+    def report(self, paths: Optional[Iterable[str]] = None) -> Dict:
+        """Clone pairs with a summary, as included in analysis results."""
+        pairs = self.clones(paths)
+        return {
+            'threshold': self.threshold,
+            'functions_compared': len(self) if paths is None else self._count(paths),
+            'clone_pairs': len(pairs),
+            'clones': pairs,
+        }
+
+    def save(self):
+        """Write the signatures of every known file to disk."""
+        import numpy as np
+        if not self.path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            rows = [row for row, entry in enumerate(self._entries) if entry is not None]
+            data = {
+                'signatures': self._signatures[rows],
+                'entries': np.array(json.dumps([self._entries[row] for row in rows])),
+                'files': np.array(json.dumps({path: entry['hash'] for path, entry in self._files.items()})),
+                'params': np.array([self.num_perm, self.shingle_size, self.min_tokens]),
+            }
+            self._unsaved = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **data)
+        os.replace(tmp_path, self.path)
+
+    def _minhash(self, stream: List[str]):
+        """MinHash signature of a token stream's shingle set."""
+        import numpy as np
+        token_hashes = np.array([zlib.crc32(token.encode('utf-8')) for token in stream], dtype=np.uint64)
+        # Rolling polynomial hash of every run of shingle_size tokens (uint64 arithmetic wraps)
+        count = len(stream) - self.shingle_size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles = shingles * np.uint64(SHINGLE_BASE) + token_hashes[offset:offset + count]
+        shingles = np.unique((shingles ^ (shingles >> np.uint64(32))) & np.uint64(MAX_HASH))
+        # Universal hashing (a * x + b) mod p, one permutation per column
+        hashed = (shingles[:, None] * self._a + self._b) % np.uint64(MERSENNE_PRIME) & np.uint64(MAX_HASH)
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _candidate_pairs(self, rows):
+        """Distinct (a, b) row pairs, a < b, whose signatures agree on at least one band."""
+        import numpy as np
+        if len(rows) < 2:
+            return np.zeros((0, 2), dtype=np.int64)
+        signatures = self._signatures[rows].astype(np.uint64)
+        codes = []
+        pair_indices = {}  # group size -> (first, second) positions of its pairs
+        for band in range(self.bands):
+            # Functions with equal band keys are adjacent once sorted
+            keys = np.zeros(len(rows), dtype=np.uint64)
+            for column in signatures[:, band * self.rows:(band + 1) * self.rows].T:
+                keys = keys * np.uint64(SHINGLE_BASE) + column
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]])
+            for run in np.flatnonzero(np.diff(starts) > 1):
+                group = order[starts[run]:starts[run + 1]]
+                if len(group) not in pair_indices:
+                    pair_indices[len(group)] = np.triu_indices(len(group), 1)
+                first, second = pair_indices[len(group)]
+                codes.append(rows[group[first]] * len(self._entries) + rows[group[second]])
+        if not codes:
+            return np.zeros((0, 2), dtype=np.int64)
+        codes = np.unique(np.concatenate(codes))
+        return np.stack([codes // len(self._entries), codes % len(self._entries)], axis=1)
+
+    def _allocate(self) -> int:
+        import numpy as np
+        if self._free:
+            return self._free.pop()
+        if len(self._entries) == len(self._signatures):
+            # Double the capacity
+            grown = np.zeros((max(1024, 2 * len(self._signatures)), self.num_perm), dtype=np.uint32)
+            grown[:len(self._signatures)] = self._signatures
+            self._signatures = grown
+        self._entries.append(None)
+        return len(self._entries) - 1
+
+    def _remove_rows(self, path: str) -> bool:
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return False
+        for row in entry['rows']:
+            self._entries[row] = None
+            self._free.append(row)
+        return True
+
+    def _count(self, paths: Iterable[str]) -> int:
+        with self._lock:
+            return sum(len(self._files[path]['rows']) for path in set(paths) if path in self._files)
+
+    def _load(self, path: str):
+        """Restore saved signatures (ignored when computed with other parameters)."""
+        import numpy as np
+        try:
+            with np.load(path) as data:
+                if list(data['params']) != [self.num_perm, self.shingle_size, self.min_tokens]:
+                    logger.info(f"Ignoring clone signatures in {path}: computed with other parameters")
+                    return
+                signatures = data['signatures']
+                entries = json.loads(str(data['entries']))
+                hashes = json.loads(str(data['files']))
+            for indexed_path, file_hash in hashes.items():
+                self._files[indexed_path] = {'hash': file_hash, 'rows': []}
+            for signature, entry in zip(signatures, entries):
+                row = self._allocate()
+                self._signatures[row] = signature
+                self._entries[row] = entry
+                self._files[entry['path']]['rows'].append(row)
+            logger.info(f"Loaded clone signatures of {len(entries)} functions from {path}")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load clone signatures {path}: {e}")
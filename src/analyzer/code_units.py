@@ -0,0 +1,85 @@
+import ast
+import hashlib
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def extract_units(code: str, include_classes: bool = False) -> List[Dict]:
+    """Extracts function and method units from Python source using the AST.
+
+    Methods are qualified with their class name (e.g. ``Parser.parse``).
+    Functions nested inside other functions stay part of their parent unit.
+
+    Args:
+        code (str): The Python code string to split.
+        include_classes (bool): Also return a unit (kind 'class') for every
+            class, spanning its whole body including its methods.
+
+    Returns:
+        list: One dict per unit with 'name', 'qualname', 'kind', 'start_line',
+            'def_line', 'end_line', 'source' and 'hash'. Empty if the code
+            does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        logger.warning(f"Could not extract code units: {e}")
+        return []
+
+    lines = code.splitlines()
+    units = []
+    _collect_units(tree.body, lines, prefix="", units=units, include_classes=include_classes)
+    units.sort(key=lambda unit: unit['start_line'])
+    return units
+
+
+def _collect_units(body: list, lines: List[str], prefix: str, units: List[Dict], include_classes: bool = False):
+    """Walk module/class bodies and record every function (and optionally class) they define."""
+    for node in body:
+        if isinstance(node, FUNCTION_NODES):
+            units.append(_make_unit(node, lines, prefix, 'method' if prefix else 'function'))
+        elif isinstance(node, ast.ClassDef):
+            if include_classes:
+                units.append(_make_unit(node, lines, prefix, 'class'))
+            _collect_units(node.body, lines, f"{prefix}{node.name}.", units, include_classes)
+
+
+def _make_unit(node: ast.AST, lines: List[str], prefix: str, kind: str) -> Dict:
+    """Build the unit dict for a single function or class node."""
+    start_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+    end_line = node.end_lineno
+    source = "\n".join(lines[start_line - 1:end_line])
+    return {
+        'name': node.name,
+        'qualname': f"{prefix}{node.name}",
+        'kind': kind,
+        'start_line': start_line,
+        'def_line': node.lineno,
+        'end_line': end_line,
+        'source': source,
+        'hash': hash_source(source),
+    }
+
+
+def module_unit(code: str) -> Dict:
+    """Wraps a whole module as a single unit (used when it defines no functions)."""
+    line_count = max(len(code.splitlines()), 1)
+    return {
+        'name': '<module>',
+        'qualname': '<module>',
+        'kind': 'module',
+        'start_line': 1,
+        'def_line': 1,
+        'end_line': line_count,
+        'source': code,
+        'hash': hash_source(code),
+    }
+
+
+def hash_source(source: str) -> str:
+    """Returns a stable content hash for a piece of source code."""
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
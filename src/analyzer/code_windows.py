@@ -0,0 +1,90 @@
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.analyzer.code_units import extract_units
+
+logger = logging.getLogger(__name__)
+
+# Tokens shared by consecutive sliding windows, so no token is only seen at a window edge
+DEFAULT_WINDOW_OVERLAP = 128
+WINDOW_MODES = ('sliding', 'functions')
+
+
+def line_starts(code: str) -> List[int]:
+    """Character offset at which each line (1-based index - 1) starts."""
+    starts = [0]
+    for i, char in enumerate(code):
+        if char == "\n":
+            starts.append(i + 1)
+    return starts
+
+
+def token_windows(code: str, offsets: Optional[List[Tuple[int, int]]], token_count: int,
+                  window_tokens: int, overlap: int = DEFAULT_WINDOW_OVERLAP,
+                  mode: str = 'sliding') -> List[Dict]:
+    """Cut a tokenized file into windows the model can take.
+
+    Args:
+        code (str): The source the tokens come from.
+        offsets (list, optional): (start, end) character offsets of every token;
+            without them windows carry no line numbers and "functions" mode
+            falls back to sliding windows.
+        token_count (int): Number of tokens of the file.
+        window_tokens (int): Most tokens per window (excluding special tokens).
+        overlap (int): Tokens shared by consecutive windows in "sliding" mode.
+        mode (str): "sliding" for fixed, overlapping windows; "functions" to end
+            windows at function boundaries (no overlap), cutting only functions
+            longer than a window.
+
+    Returns:
+        list: Windows as dicts with 'start' and 'end' token indices (end
+            exclusive) and 'start_line'/'end_line' (None without offsets).
+    """
+    if mode not in WINDOW_MODES:
+        raise ValueError(f"Unknown window mode: {mode}")
+    if token_count == 0:
+        return []
+
+    starts = line_starts(code)
+    boundaries = _function_boundaries(code, offsets, starts) if mode == 'functions' and offsets else []
+    step = max(window_tokens - overlap, 1) if mode == 'sliding' else window_tokens
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window_tokens, token_count)
+        if boundaries and end < token_count:
+            # End at the last function boundary that fits, if any
+            cut = bisect.bisect_right(boundaries, end) - 1
+            if cut >= 0 and boundaries[cut] > start:
+                end = boundaries[cut]
+        windows.append(_window(start, end, offsets, starts))
+        if end >= token_count:
+            return windows
+        start = end if boundaries else start + step
+
+
+def _function_boundaries(code: str, offsets: List[Tuple[int, int]], starts: List[int]) -> List[int]:
+    """Token indices at which a function or method starts."""
+    token_starts = [start for start, _ in offsets]
+    boundaries = set()
+    for unit in extract_units(code):
+        index = bisect.bisect_left(token_starts, starts[unit['start_line'] - 1])
+        if 0 < index < len(offsets):
+            boundaries.add(index)
+    return sorted(boundaries)
+
+
+def _window(start: int, end: int, offsets: Optional[List[Tuple[int, int]]], starts: List[int]) -> Dict:
+    """Window dict with the lines its tokens span."""
+    if not offsets:
+        return {'start': start, 'end': end, 'start_line': None, 'end_line': None}
+    first_char = offsets[start][0]
+    last_char = max(offsets[end - 1][1] - 1, first_char)
+    return {
+        'start': start,
+        'end': end,
+        'start_line': bisect.bisect_right(starts, first_char),
+        'end_line': bisect.bisect_right(starts, last_char),
+    }
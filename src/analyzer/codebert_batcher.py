@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from src.analyzer.custom_models import MAX_INPUT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Most inputs per forward pass
+DEFAULT_MAX_BATCH_SIZE = 16
+# How long the oldest queued input waits for others before its batch runs
+DEFAULT_MAX_WAIT_MS = 5.0
+# Inputs are only batched with others of similar length (in tokens), to limit padding
+DEFAULT_BUCKET_WIDTH = 64
+
+
+class CodeBertBatcher:
+    """Collects concurrent CodeBERT analyses and runs them as batched forward passes.
+
+    Inputs are tokenized in the caller's thread and queued by token-length
+    bucket. A single inference thread runs a bucket once it holds
+    max_batch_size inputs or its oldest input has waited max_wait_ms, so
+    larger batches and longer waits trade latency for throughput.
+    """
+
+    def __init__(self, analyzer, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, bucket_width: int = DEFAULT_BUCKET_WIDTH):
+        """Initialize the batcher.
+
+        Args:
+            analyzer (CodeBertAnalyzer): Model used for tokenizing and the batched forward passes.
+            max_batch_size (int): Most inputs per forward pass.
+            max_wait_ms (float): Longest an input waits for its batch to fill.
+            bucket_width (int): Token-length range of inputs batched together.
+        """
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.bucket_width = bucket_width
+        self.batches = 0
+        self.items = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.queue_seconds = 0.0
+        self._buckets: Dict[int, List] = {}  # bucket -> [(token ids, future, arrival time)]
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def submit(self, code: str) -> Future:
+        """Queue code for analysis.
+
+        Returns:
+            Future: Resolves to the analyze_code result dict.
+        """
+        try:
+            ids = self.analyzer.token_ids(code)
+        except Exception as e:
+            future = Future()
+            future.set_result({"error": str(e)})
+            return future
+        return self.submit_ids(ids)
+
+    def submit_ids(self, ids: List[int]) -> Future:
+        """Queue already tokenized input (from the analyzer's token_ids) for analysis.
+
+        Returns:
+            Future: Resolves to the analyze_code result dict.
+        """
+        future = Future()
+        with self._cond:
+            self._buckets.setdefault(len(ids) // self.bucket_width, []).append((ids, future, time.monotonic()))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="codebert-batcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    def analyze_code(self, code: str, timeout: Optional[float] = None) -> Dict:
+        """Analyze code, sharing a forward pass with concurrent requests."""
+        return self.submit(code).result(timeout)
+
+    def stats(self) -> Dict:
+        """Batching counters."""
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'padding_ratio': round(1 - self.real_tokens / self.padded_tokens, 3) if self.padded_tokens else 0.0,
+                'avg_queue_ms': round(self.queue_seconds / self.items * 1000, 2) if self.items else 0.0,
+                'pending': sum(map(len, self._buckets.values())),
+            }
+
+    def _run(self):
+        """Inference loop: run the next due batch, waiting while none is."""
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                while batch is None:
+                    self._cond.wait(self._time_to_next_deadline())
+                    batch = self._next_batch()
+            self._run_batch(batch)
+
+    def _next_batch(self) -> Optional[List]:
+        """Take a full bucket, or else the bucket whose oldest input is due (None if neither)."""
+        if not self._buckets:
+            return None
+        full = next((key for key, items in self._buckets.items() if len(items) >= self.max_batch_size), None)
+        oldest = min(self._buckets, key=lambda key: self._buckets[key][0][2])
+        key = full if full is not None else oldest
+        if full is None and time.monotonic() < self._buckets[oldest][0][2] + self.max_wait:
+            return None
+
+        items = self._buckets[key]
+        batch, self._buckets[key] = items[:self.max_batch_size], items[self.max_batch_size:]
+        if not self._buckets[key]:
+            del self._buckets[key]
+        return batch
+
+    def _time_to_next_deadline(self) -> Optional[float]:
+        """Seconds until the oldest queued input is due (None when the queue is empty)."""
+        if not self._buckets:
+            return None
+        oldest = min(items[0][2] for items in self._buckets.values())
+        return max(oldest + self.max_wait - time.monotonic(), 0.0)
+
+    def _run_batch(self, batch: List):
+        """One forward pass for the batch; scatter the results to the waiting callers."""
+        start = time.monotonic()
+        try:
+            results = self.analyzer.analyze_token_ids([ids for ids, _, _ in batch])
+        except Exception as e:
+            logger.error(f"CodeBERT batch of {len(batch)} failed: {e}")
+            results = [{"error": str(e)} for _ in batch]
+
+        with self._cond:
+            self.batches += 1
+            self.items += len(batch)
+            self.real_tokens += sum(len(ids) for ids, _, _ in batch)
+            self.padded_tokens += len(batch) * max(len(ids) for ids, _, _ in batch)
+            self.queue_seconds += sum(start - arrival for _, _, arrival in batch)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+# Batchers per model
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_codebert_batcher(analyzer) -> CodeBertBatcher:
+    """Get the batcher of an analyzer's (shared) model, tuned from the environment.
+
+    Batchers are keyed by the model object, not its name: analyzers share one
+    only when they run on the same weights.
+
+    Environment:
+        CODEBERT_MAX_BATCH_SIZE: Most inputs per forward pass (default 16).
+        CODEBERT_MAX_WAIT_MS: Longest an input waits for its batch to fill (default 5).
+        CODEBERT_BUCKET_WIDTH: Token-length range of inputs batched together (default 64).
+    """
+    with _batchers_lock:
+        batcher = _batchers.get(id(analyzer.model))
+        # The batcher's analyzer holds its model, so the id is not reused while it is cached;
+        # it may have switched to private weights since (fine-tuning), though
+        if batcher is None or batcher.analyzer.model is not analyzer.model:
+            batcher = CodeBertBatcher(
+                analyzer,
+                max_batch_size=int(os.getenv('CODEBERT_MAX_BATCH_SIZE', DEFAULT_MAX_BATCH_SIZE)),
+                max_wait_ms=float(os.getenv('CODEBERT_MAX_WAIT_MS', DEFAULT_MAX_WAIT_MS)),
+                bucket_width=int(os.getenv('CODEBERT_BUCKET_WIDTH', DEFAULT_BUCKET_WIDTH))
+            )
+            _batchers[id(analyzer.model)] = batcher
+    return batcher
+
+
+def analyze_with_codebert(analyzer, code: str) -> Dict:
+    """Analyze code as the CodeBERT endpoint does: batched with concurrent requests, or window by window if long."""
+    ids = analyzer.token_ids(code)
+    if len(ids) >= MAX_INPUT_TOKENS:
+        # Too long for one input: analyze the whole file window by window
+        return analyzer.analyze_file(code, per_window=True)
+    if not analyzer.shared:
+        # Private (e.g. fine-tuned) weights: nothing to share a forward pass with
+        try:
+            return analyzer.analyze_token_ids([ids])[0]
+        except Exception as e:
+            logger.error(f"CodeBERT analysis error: {e}")
+            return {"error": str(e)}
+    # Concurrent requests share batched forward passes
+    return get_codebert_batcher(analyzer).submit_ids(ids).result()
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers within one process are serialized
+    fcntl = None
+
+from src.analyzer.model_registry import model_version
+from src.utils.constants import CACHE_DIR, EMBEDDING_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.bin"
+INDEX_FILE = "index.txt"
+META_FILE = "meta.json"
+LOCK_FILE = "store.lock"
+STORE_DTYPES = ('float16', 'float32')
+
+
+def content_key(data) -> str:
+    """Content hash identifying an input (str, bytes or a sequence of token ids)."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    elif not isinstance(data, bytes):
+        data = b",".join(str(int(item)).encode('ascii') for item in data)
+    return hashlib.sha256(data).hexdigest()
+
+
+class EmbeddingStore:
+    """Persistent content hash -> vector store backed by a memory-mapped matrix.
+
+    Vectors are appended as raw rows to one binary file and the key of each
+    row to a small text index, so writes never rewrite earlier data. Reads
+    return read-only views into the memory map: a vector stored earlier, by
+    this or another process, costs a page-cache read instead of a forward
+    pass. Appends from several processes are serialized with a file lock, and
+    keys appended by other processes are picked up from the index tail on a
+    miss. Keys written more than once leave dead rows behind until compact().
+    """
+
+    def __init__(self, directory: str, dim: int, dtype: str = 'float16'):
+        """Open (or create) a store.
+
+        Args:
+            directory (str): Directory holding the store files.
+            dim (int): Vector length. A store written with another dim or dtype
+                is discarded and started over.
+            dtype (str): "float16" (half the disk and page cache) or "float32".
+        """
+        import numpy as np
+
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+        self.directory = directory
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = dim * self.dtype.itemsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._index_pos = 0
+        self._rows = 0
+        self._map = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._check_meta()
+        self._load_index()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, VECTORS_FILE)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, LOCK_FILE)
+
+    def get(self, key: str):
+        """Stored vector for a key as a read-only (zero-copy) array, or None."""
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                # Another process may have stored it since the index was read
+                self._load_index()
+                row = self._index.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self._map is None or row >= len(self._map):
+                self._remap()
+            return self._map[row]
+
+    def put(self, key: str, vector):
+        """Append a vector (no-op if the key is already stored)."""
+        self.put_many({key: vector})
+
+    def put_many(self, vectors: Dict[str, object]):
+        """Append several vectors with one write to each file."""
+        import numpy as np
+
+        with self._lock, open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                # Catch up with other writers, so their keys are not appended again
+                self._load_index()
+                new = [(key, vector) for key, vector in vectors.items() if key not in self._index]
+                if not new:
+                    return
+                rows = np.stack([np.asarray(vector, dtype=self.dtype).reshape(self.dim) for _, vector in new])
+                # Vectors first: an index line must never point past the end of the vector file
+                with open(self.vectors_path, 'ab') as f:
+                    first_row = os.fstat(f.fileno()).st_size // self.row_bytes
+                    f.truncate(first_row * self.row_bytes)  # drop a row torn by a crashed writer
+                    f.write(rows.tobytes())
+                with open(self.index_path, 'a', encoding='ascii') as f:
+                    f.write("".join(f"{key} {first_row + i}\n" for i, (key, _) in enumerate(new)))
+                for i, (key, _) in enumerate(new):
+                    self._index[key] = first_row + i
+                self._rows = first_row + len(new)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def compact(self, keep: Optional[Iterable[str]] = None) -> int:
+        """Rewrite the store without dead rows (and without keys outside keep, if given).
+
+        Not safe while other processes write to the same store.
+
+        Returns:
+            int: Rows removed.
+        """
+        import numpy as np
+
+        with self._lock:
+            keep = set(keep) if keep is not None else None
+            live = [(key, row) for key, row in self._index.items() if keep is None or key in keep]
+            self._remap()
+            rows = np.array(self._map[[row for _, row in live]]) if live else np.zeros((0, self.dim), self.dtype)
+            removed = self._rows - len(live)
+
+            tmp_vectors, tmp_index = f"{self.vectors_path}.tmp", f"{self.index_path}.tmp"
+            with open(tmp_vectors, 'wb') as f:
+                f.write(rows.tobytes())
+            with open(tmp_index, 'w', encoding='ascii') as f:
+                f.write("".join(f"{key} {i}\n" for i, (key, _) in enumerate(live)))
+            self._map = None
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_index, self.index_path)
+            self._index = {key: i for i, (key, _) in enumerate(live)}
+            self._index_pos = os.path.getsize(self.index_path)
+            self._rows = len(live)
+
+        logger.info(f"Compacted embedding store {self.directory}: {removed} rows removed")
+        return removed
+
+    def stats(self) -> Dict:
+        """Store size and hit counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'keys': len(self._index),
+                'rows': self._rows,
+                'dead_rows': self._rows - len(self._index),
+                'bytes': self._rows * self.row_bytes,
+                'dtype': self.dtype.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def _remap(self):
+        """Map every complete row currently in the vector file."""
+        import numpy as np
+
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        rows = size // self.row_bytes
+        self._map = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(rows, self.dim)) if rows else None
+
+    def _check_meta(self):
+        """Start over if the store was written for another vector shape."""
+        meta = {'dim': self.dim, 'dtype': self.dtype.name}
+        meta_path = os.path.join(self.directory, META_FILE)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                if json.load(f) == meta:
+                    return
+            logger.warning(f"Embedding store {self.directory} has another shape, starting over")
+        except (OSError, ValueError):
+            pass
+        for name in (VECTORS_FILE, INDEX_FILE):
+            if os.path.exists(os.path.join(self.directory, name)):
+                os.remove(os.path.join(self.directory, name))
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def _load_index(self):
+        """Read the key index lines added since the last call.
+
+        Rows not (yet) fully in the vector file are skipped, and a line still
+        being written is left for the next call.
+        """
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        complete_rows = size // self.row_bytes
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                f.seek(self._index_pos)
+                tail = f.read()
+            end = tail.rfind(b"\n") + 1
+            for line in tail[:end].decode('ascii', errors='ignore').splitlines():
+                parts = line.split()
+                if len(parts) == 2 and parts[1].isdigit() and int(parts[1]) < complete_rows:
+                    self._index[parts[0]] = int(parts[1])
+            self._index_pos += end
+        self._rows = complete_rows
+
+
+# Stores per model
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(model_name: str, dim: int, backend: str = 'fp32') -> Optional[EmbeddingStore]:
+    """Get the process-wide embedding store of a model, or None if disabled.
+
+    Each model backend gets its own store, since their outputs differ slightly.
+
+    Environment:
+        CODEBERT_EMBEDDING_CACHE: "0" disables the store (enabled by default).
+        CODEBERT_EMBEDDING_PATH: Root directory (default .cache/embeddings); each
+            model gets its own subdirectory.
+        CODEBERT_EMBEDDING_DTYPE: "float16" (default) or "float32".
+    """
+    if os.getenv('CODEBERT_EMBEDDING_CACHE', '1') == '0':
+        return None
+    with _stores_lock:
+        store = _stores.get((model_name, dim, backend))
+        if store is None:
+            root = os.getenv('CODEBERT_EMBEDDING_PATH', os.path.join(os.getcwd(), CACHE_DIR, EMBEDDING_STORE_DIR))
+            name = re.sub(r'[^A-Za-z0-9._-]+', '_', model_name).strip('_')
+            suffix = "" if backend == 'fp32' else f"-{backend}"
+            directory = os.path.join(root, f"{name}-{model_version(model_name)}{suffix}")
+            try:
+                store = EmbeddingStore(directory, dim, dtype=os.getenv('CODEBERT_EMBEDDING_DTYPE', 'float16'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding store disabled: {e}")
+                return None
+            _stores[(model_name, dim, backend)] = store
+    return store
+
+
+def embedding_store_stats() -> Dict:
+    """Stats of every open embedding store, by directory."""
+    with _stores_lock:
+        return {store.directory: store.stats() for store in _stores.values()}
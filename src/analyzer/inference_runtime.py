@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import time
+import warnings
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# "trace" runs TorchScript traces, "compile" torch.compile'd graphs; both per sequence-length bucket
+RUNTIMES = ('eager', 'trace', 'compile')
+# Inputs are padded up to the next bucket, so only these sequence lengths are ever traced or compiled
+DEFAULT_SEQUENCE_BUCKETS = (16, 32, 64, 96, 128, 192, 256, 384, 512)
+
+_threads_configured = False
+_threads_lock = threading.Lock()
+
+
+def configure_threads(intra_op: Optional[int] = None, inter_op: Optional[int] = None) -> Dict:
+    """Set torch's intra-op and inter-op thread pools once per process.
+
+    By default torch uses every core for each forward pass, which oversubscribes
+    the CPU when several web workers (or request threads) run the model at once.
+
+    Args:
+        intra_op (int, optional): Threads per operator (default: CODEBERT_NUM_THREADS,
+            else cores / WEB_CONCURRENCY when the worker count is known, else torch's default).
+        inter_op (int, optional): Threads running independent operators
+            (default: CODEBERT_INTEROP_THREADS, else torch's default).
+
+    Returns:
+        dict: The thread counts in effect.
+    """
+    global _threads_configured
+    import torch
+
+    with _threads_lock:
+        if not _threads_configured:
+            _threads_configured = True
+            intra_op = intra_op or _env_int('CODEBERT_NUM_THREADS')
+            workers = _env_int('WEB_CONCURRENCY')
+            if intra_op is None and workers:
+                intra_op = max(1, (os.cpu_count() or 1) // workers)
+            inter_op = inter_op or _env_int('CODEBERT_INTEROP_THREADS')
+            if intra_op:
+                torch.set_num_threads(intra_op)
+            if inter_op:
+                try:
+                    torch.set_num_interop_threads(inter_op)
+                except RuntimeError as e:
+                    # Only possible before the first parallel operation of the process
+                    logger.warning(f"Could not set inter-op threads: {e}")
+            logger.info(f"torch threads: {torch.get_num_threads()} intra-op, "
+                        f"{torch.get_num_interop_threads()} inter-op")
+    return {'intra_op': torch.get_num_threads(), 'inter_op': torch.get_num_interop_threads()}
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name, '')
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def sequence_buckets() -> tuple:
+    """Sequence-length buckets from CODEBERT_SEQ_BUCKETS (comma-separated), else the defaults."""
+    value = os.getenv('CODEBERT_SEQ_BUCKETS', '')
+    buckets = sorted({int(part) for part in value.split(',') if part.strip().isdigit()})
+    return tuple(buckets) or DEFAULT_SEQUENCE_BUCKETS
+
+
+class CompiledEncoder:
+    """Runs an encoder through TorchScript traces or torch.compile graphs, one per sequence-length bucket.
+
+    Inputs are padded (and masked) up to the smallest bucket that fits them,
+    so a handful of fixed shapes cover every request and each graph is built
+    once; the hidden states are cut back to the input length. Inputs longer
+    than the largest bucket, and every input after a failed build, run eagerly.
+    """
+
+    def __init__(self, model, runtime: str = 'trace', pad_token_id: int = 1,
+                 buckets: Sequence[int] = DEFAULT_SEQUENCE_BUCKETS):
+        """Initialize the encoder (graphs are built on first use or by warm_up()).
+
+        Args:
+            model: Transformers encoder in eval mode.
+            runtime (str): "trace" or "compile".
+            pad_token_id (int): Token id used to pad inputs up to their bucket.
+            buckets (sequence): Sequence lengths to build graphs for.
+        """
+        if runtime not in RUNTIMES or runtime == 'eager':
+            raise ValueError(f"Unknown compiled runtime: {runtime}")
+        self.model = model
+        self.runtime = runtime
+        self.pad_token_id = pad_token_id
+        self.buckets = tuple(sorted(buckets))
+        self.warmup_seconds = 0.0
+        self.eager_calls = 0
+        self._graphs: Dict[int, object] = {}
+        self._compiled = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def __call__(self, input_ids, attention_mask):
+        """Last hidden states of a padded batch, shaped like the eager model's."""
+        import torch
+
+        length = input_ids.shape[1]
+        bucket = next((size for size in self.buckets if size >= length), None)
+        graph = self._graph(bucket) if bucket is not None and not self._failed else None
+        if graph is None:
+            self.eager_calls += 1
+            return self.model(input_ids, attention_mask=attention_mask).last_hidden_state
+
+        if bucket > length:
+            padding = (0, bucket - length)
+            input_ids = torch.nn.functional.pad(input_ids, padding, value=self.pad_token_id)
+            attention_mask = torch.nn.functional.pad(attention_mask, padding, value=0)
+        with torch.no_grad():
+            return graph(input_ids, attention_mask)[:, :length]
+
+    def warm_up(self, buckets: Optional[Sequence[int]] = None) -> 'CompiledEncoder':
+        """Build and run the graph of every bucket now, so no request pays for it.
+
+        Returns:
+            CompiledEncoder: self.
+        """
+        import torch
+
+        start = time.perf_counter()
+        for bucket in buckets or self.buckets:
+            graph = self._graph(bucket)
+            if graph is None:
+                break
+            ids, mask = self._example(bucket)
+            with torch.no_grad():
+                graph(ids, mask)
+        self.warmup_seconds = round(time.perf_counter() - start, 3)
+        logger.info(f"Warmed up {self.runtime} CodeBERT for lengths {list(buckets or self.buckets)} "
+                    f"in {self.warmup_seconds:.1f}s")
+        return self
+
+    def stats(self) -> Dict:
+        return {
+            'runtime': 'eager' if self._failed else self.runtime,
+            'buckets': sorted(self._graphs),
+            'warmup_seconds': self.warmup_seconds,
+            'eager_calls': self.eager_calls,
+        }
+
+    def _graph(self, bucket: int):
+        """Graph for a bucket, building it on first use (None once building failed)."""
+        with self._lock:
+            if bucket not in self._graphs and not self._failed:
+                try:
+                    self._graphs[bucket] = self._build(bucket)
+                except Exception as e:
+                    logger.warning(f"Could not {self.runtime} CodeBERT, running eagerly: {e}")
+                    self._failed = True
+            return self._graphs.get(bucket)
+
+    def _build(self, bucket: int):
+        import torch
+
+        if self.runtime == 'compile':
+            # One compiled module; each bucket is a (cached) specialization of it
+            if self._compiled is None:
+                self._compiled = torch.compile(_hidden_states(self.model))
+            ids, mask = self._example(bucket)
+            with torch.no_grad():
+                self._compiled(ids, mask)
+            return self._compiled
+
+        ids, mask = self._example(bucket)
+        with torch.no_grad(), warnings.catch_warnings():
+            # The tracer warns about Python control flow the fixed shape makes constant
+            warnings.simplefilter("ignore")
+            return torch.jit.trace(_hidden_states(self.model), (ids, mask), check_trace=False)
+
+    def _example(self, bucket: int):
+        """Batch of two inputs, one padded, so traces keep the masking path."""
+        import torch
+
+        device = next(self.model.parameters()).device
+        ids = torch.full((2, bucket), self.pad_token_id, dtype=torch.long, device=device)
+        mask = torch.zeros((2, bucket), dtype=torch.long, device=device)
+        ids[0], mask[0] = 0, 1
+        ids[1, :max(bucket // 2, 1)], mask[1, :max(bucket // 2, 1)] = 0, 1
+        return ids, mask
+
+
+def _hidden_states(model):
+    """Wrap an encoder to return only its last hidden states (a tensor, so it can be traced)."""
+    import torch
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    return HiddenStates(model)
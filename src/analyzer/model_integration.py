@@ -4,11 +4,15 @@ Integration layer for custom models with Flask app
 """
 
 import logging
+import os
+from src.analyzer.codebert_batcher import analyze_with_codebert
 from src.analyzer.custom_models import (
     CodeBertAnalyzer,
     LocalModelAnalyzer,
     UnifiedCodeAnalyzer
 )
+from src.analyzer.model_loader import ModelNotReady, get_model_loader
+from src.analyzer.model_server import ModelServerError, get_model_server_client
 
 logger = logging.getLogger(__name__)
 
@@ -18,19 +22,20 @@ class CustomModelIntegration:
     
     def __init__(self):
         """Initialize custom model integration"""
-        self.codebert = None
+        self.codebert_load = None
+        self.model_server = None
+        self._codebert = None
         self.local_model = None
         self.unified_analyzer = None
         self._initialize_models()
     
     def _initialize_models(self):
         """Initialize available models"""
-        # Try CodeBERT
-        try:
-            self.codebert = CodeBertAnalyzer()
-            logger.info("✅ CodeBERT loaded")
-        except Exception as e:
-            logger.warning(f"CodeBERT unavailable: {e}")
+        # With a model server on this host, CodeBERT runs there instead of in every worker
+        self.model_server = get_model_server_client()
+        if self.model_server is None:
+            # CodeBERT loads in the background; requests degrade until it is ready
+            self.codebert_load = get_model_loader().start()
         
         # Try local models
         try:
@@ -43,7 +48,7 @@ class CustomModelIntegration:
         # Initialize unified analyzer
         try:
             self.unified_analyzer = UnifiedCodeAnalyzer(
-                use_codebert=bool(self.codebert),
+                use_codebert=False,
                 use_local=self.local_model.available if self.local_model else False,
                 use_gemini=True
             )
@@ -51,6 +56,24 @@ class CustomModelIntegration:
         except Exception as e:
             logger.warning(f"Unified analyzer error: {e}")
     
+    @property
+    def codebert(self):
+        """This integration's CodeBERT analyzer, or None while the model is loading (or failed to load)
+        
+        Waits up to CODEBERT_WAIT_SECONDS (default 0) for a load in progress.
+        With a model server, this is its client (which can analyze and embed, not train).
+        """
+        if self.model_server is not None:
+            return self.model_server
+        if self._codebert is None:
+            try:
+                loaded = self.codebert_load.get(float(os.getenv('CODEBERT_WAIT_SECONDS', '0')))
+            except ModelNotReady:
+                return None
+            # Shares the loaded weights; fine-tuning gives this analyzer a private copy
+            self._codebert = CodeBertAnalyzer(loaded.model_name)
+        return self._codebert
+    
     def get_available_models(self) -> list:
         """Get list of available custom models"""
         models = []
@@ -83,10 +106,30 @@ class CustomModelIntegration:
     def analyze_with_model(self, code: str, model_id: str) -> dict:
         """Analyze code with specific custom model"""
         
-        if model_id == "codebert" and self.codebert:
+        codebert = self.codebert if model_id in ("codebert", "unified") else None
+        if model_id == "codebert":
+            try:
+                if codebert is None:
+                    raise ModelNotReady(self.codebert_load.name, self.codebert_load.status())
+                if codebert is self.model_server:
+                    # The server runs analyze_with_codebert, batching across all workers
+                    try:
+                        result = codebert.analyze_code(code)
+                    except ModelServerError as e:
+                        # Same shape as a failed in-process analysis
+                        result = {"error": str(e)}
+                else:
+                    result = analyze_with_codebert(codebert, code)
+            except ModelNotReady as e:
+                return {
+                    "model": "CodeBERT",
+                    "result": None,
+                    "status": "unavailable",
+                    "message": str(e)
+                }
             return {
                 "model": "CodeBERT",
-                "result": self.codebert.analyze_code(code),
+                "result": result,
                 "status": "success"
             }
         
@@ -98,9 +141,11 @@ class CustomModelIntegration:
             }
         
         elif model_id == "unified" and self.unified_analyzer:
+            # Without CodeBERT (still loading) the other models answer. Passed per call:
+            # the unified analyzer is shared by concurrent requests
             return {
                 "model": "Unified Analysis",
-                "result": self.unified_analyzer.comparative_analysis(code),
+                "result": self.unified_analyzer.comparative_analysis(code, codebert),
                 "status": "success"
             }
         
@@ -115,6 +160,11 @@ class CustomModelIntegration:
     def train_codebert_on_code(self, code_samples: list, labels: list = None, 
                               epochs: int = 3, batch_size: int = 8) -> dict:
         """Fine-tune CodeBERT on custom code"""
+        if self.model_server is not None:
+            return {
+                "status": "error",
+                "message": "Fine-tuning is not available through the model server"
+            }
         if not self.codebert:
             return {
                 "status": "error",
@@ -139,6 +189,11 @@ class CustomModelIntegration:
     
     def save_custom_model(self, path: str) -> dict:
         """Save trained model"""
+        if self.model_server is not None:
+            return {
+                "status": "error",
+                "message": "Saving is not available through the model server"
+            }
         if not self.codebert:
             return {
                 "status": "error",
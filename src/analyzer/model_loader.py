@@ -0,0 +1,295 @@
+import contextlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.utils.constants import CODEBERT_HUB_ID, CODEBERT_MODEL_DIR
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+SAFETENSORS_FILE = "model.safetensors"
+# safetensors dtype names -> torch dtype attribute names
+SAFETENSORS_DTYPES = {
+    'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+    'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool',
+}
+
+
+class ModelNotReady(RuntimeError):
+    """A model is still loading (or failed to load); callers should degrade instead of waiting."""
+
+    def __init__(self, name: str, status: Dict):
+        detail = status.get('error') or status.get('stage') or status['state']
+        super().__init__(f"{name} is not ready ({status['state']}: {detail})")
+        self.status = status
+
+
+def local_codebert_dir() -> str:
+    """Absolute path of the repository's CodeBERT directory (config, tokenizer and, once provisioned, weights)."""
+    return os.path.join(project_root, CODEBERT_MODEL_DIR)
+
+
+def resolve_model_source(model_name: str) -> str:
+    """Where a model is loaded from: the CodeBERT hub id resolves to the local copy when there is one.
+
+    Local directories resolve to their absolute path, so relative and absolute
+    spellings of one directory share a load.
+    """
+    if model_name == CODEBERT_HUB_ID and os.path.isdir(local_codebert_dir()):
+        return local_codebert_dir()
+    if os.path.isdir(model_name):
+        return os.path.abspath(model_name)
+    return model_name
+
+
+def load_model(source: str):
+    """Load an encoder for inference, memory-mapping local safetensors weights.
+
+    Local directories are loaded offline. The CodeBERT directory ships without
+    weights; they are provisioned from the Hugging Face cache (or, with
+    CODEBERT_ALLOW_DOWNLOAD=1, the hub) and saved there as safetensors once.
+
+    Args:
+        source (str): Local model directory or Hugging Face model id (see resolve_model_source).
+
+    Returns:
+        The model in eval mode on CPU.
+    """
+    from transformers import AutoModel
+
+    if not os.path.isdir(source):
+        return AutoModel.from_pretrained(source).eval()
+
+    weights = os.path.join(source, SAFETENSORS_FILE)
+    if not os.path.exists(weights) and os.path.abspath(source) == local_codebert_dir():
+        provision_weights(source, CODEBERT_HUB_ID, allow_download=os.getenv('CODEBERT_ALLOW_DOWNLOAD', '0') == '1')
+    if os.path.exists(weights):
+        try:
+            return load_mmap_model(source)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.warning(f"Could not memory-map {weights}, loading a copy: {e}")
+    return AutoModel.from_pretrained(source, local_files_only=True).eval()
+
+
+def provision_weights(directory: str, hub_id: str, allow_download: bool = False):
+    """Save a hub model's weights into a local model directory as safetensors.
+
+    Raises:
+        OSError: The weights are neither cached locally nor allowed to be downloaded.
+    """
+    from transformers import AutoModel
+
+    logger.info(f"Provisioning {hub_id} weights into {directory}")
+    try:
+        model = AutoModel.from_pretrained(hub_id, local_files_only=not allow_download)
+    except OSError as e:
+        raise OSError(f"No weights in {directory} and {hub_id} is not cached locally; "
+                      f"run once with CODEBERT_ALLOW_DOWNLOAD=1 or copy {SAFETENSORS_FILE} there ({e})") from e
+    model.save_pretrained(directory, safe_serialization=True)
+
+
+def load_mmap_model(directory: str):
+    """Build a model whose parameters are views into its memory-mapped safetensors file.
+
+    Pages are mapped copy-on-write, so every process loading the file
+    (including forked workers) shares one copy in the page cache, and only
+    pages a process writes to (e.g. by fine-tuning) become private.
+
+    Raises:
+        ValueError: The file does not hold every parameter of the model.
+    """
+    from transformers import AutoConfig, AutoModel
+
+    with skip_weight_init():
+        # The memory-mapped tensors replace every parameter
+        model = AutoModel.from_config(AutoConfig.from_pretrained(directory))
+    own = model.state_dict()
+    prefix = f"{model.base_model_prefix}."
+    state = {}
+    for key, tensor in mmap_safetensors(os.path.join(directory, SAFETENSORS_FILE)).items():
+        # Checkpoints of task models nest the encoder under its prefix
+        if key not in own and key.startswith(prefix):
+            key = key[len(prefix):]
+        if key in own:
+            state[key] = tensor
+
+    persistent = {name for name, _ in model.named_parameters()}
+    missing = persistent - set(state)
+    if missing:
+        raise ValueError(f"{len(missing)} parameters missing, e.g. {sorted(missing)[0]}")
+    model.load_state_dict(state, strict=False, assign=True)
+    return model.eval()
+
+
+def skip_weight_init():
+    """Context in which transformers models are built without initializing weights."""
+    try:
+        from transformers.initialization import no_init_weights
+    except ImportError:
+        try:
+            from transformers.modeling_utils import no_init_weights
+        except ImportError:
+            return contextlib.nullcontext()
+    return no_init_weights()
+
+
+def mmap_safetensors(path: str) -> Dict:
+    """Tensors of a safetensors file as zero-copy views into a copy-on-write memory map."""
+    import torch
+
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = struct.unpack('<Q', buffer[:8])[0]
+    header = json.loads(buffer[8:8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info['dtype']])
+        start, end = info['data_offsets']
+        if end == start:
+            tensors[name] = torch.empty(info['shape'], dtype=dtype)
+            continue
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=data_start + start).reshape(info['shape'])
+    return tensors
+
+
+class BackgroundLoad:
+    """Runs a slow load once in a daemon thread and reports its progress.
+
+    Callers never pay for the load inline: get() waits at most its timeout and
+    raises ModelNotReady while the load is still running (or has failed).
+    """
+
+    def __init__(self, name: str, task: Callable[[Callable[[str], None]], object]):
+        """Initialize the load (it starts on start() or the first get()).
+
+        Args:
+            name (str): What is loaded, for status reports.
+            task (callable): fn(report) returning the loaded object; it calls
+                report(stage) as it makes progress.
+        """
+        self.name = name
+        self.task = task
+        self.state = 'pending'
+        self.stage = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._result = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> 'BackgroundLoad':
+        """Start loading unless already started."""
+        with self._lock:
+            if self.state != 'pending':
+                return self
+            self.state = 'loading'
+            self.started = time.time()
+        threading.Thread(target=self._run, name=f"load-{self.name}", daemon=True).start()
+        return self
+
+    def get(self, timeout: float = 0.0):
+        """The loaded object, waiting up to timeout seconds for it.
+
+        Raises:
+            ModelNotReady: Still loading after the timeout, or the load failed.
+        """
+        self.start()
+        self._done.wait(timeout)
+        if self.state != 'ready':
+            raise ModelNotReady(self.name, self.status())
+        return self._result
+
+    def ready(self) -> bool:
+        return self.state == 'ready'
+
+    def status(self) -> Dict:
+        """State, current stage and timing of the load."""
+        end = self.finished or time.time()
+        return {
+            'state': self.state,
+            'stage': self.stage,
+            'seconds': round(end - self.started, 2) if self.started else None,
+            'error': self.error,
+        }
+
+    def _report(self, stage: str):
+        self.stage = stage
+        logger.info(f"Loading {self.name}: {stage}")
+
+    def _run(self):
+        try:
+            self._result = self.task(self._report)
+            self.state = 'ready'
+            self.stage = None
+            logger.info(f"{self.name} ready in {time.time() - self.started:.1f}s")
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+            logger.error(f"Loading {self.name} failed: {e}")
+        finally:
+            self.finished = time.time()
+            self._done.set()
+
+
+def _load_codebert(source: str, report: Callable[[str], None]):
+    """Load a shared CodeBertAnalyzer and run one input through it, so the first request is fast."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    report("loading weights")
+    analyzer = CodeBertAnalyzer(source)
+    report("warming up")
+    analyzer.embed("def warm_up():\n    return None")
+    return analyzer
+
+
+# Background loads per model source
+_loads: Dict[str, BackgroundLoad] = {}
+_loads_lock = threading.Lock()
+
+
+def get_model_loader(model_name: Optional[str] = None) -> BackgroundLoad:
+    """Get the background load of a CodeBERT model (default: CODEBERT_MODEL, else CodeBERT).
+
+    Names resolving to the same source (the hub id and the local directory)
+    share one load.
+    """
+    source = resolve_model_source(model_name or os.getenv('CODEBERT_MODEL', CODEBERT_HUB_ID))
+    with _loads_lock:
+        load = _loads.get(source)
+        if load is None:
+            load = BackgroundLoad(f"CodeBERT ({os.path.basename(os.path.normpath(source))})",
+                                  lambda report: _load_codebert(source, report))
+            _loads[source] = load
+    return load
+
+
+def readiness() -> Dict:
+    """Readiness of every background model load.
+
+    'loading' while any load is in progress, 'degraded' when one failed (the
+    server answers without that model), else 'ready'.
+    """
+    with _loads_lock:
+        loads = {load.name: load.status() for load in _loads.values()}
+    states = {status['state'] for status in loads.values()}
+    if states & {'pending', 'loading'}:
+        status = 'loading'
+    elif 'failed' in states:
+        status = 'degraded'
+    else:
+        status = 'ready'
+    return {'status': status, 'models': loads}
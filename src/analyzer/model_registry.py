@@ -0,0 +1,367 @@
+import gc
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import warnings
+from typing import Callable, Dict, Optional, Tuple
+
+from src.analyzer.model_loader import load_model, resolve_model_source, skip_weight_init
+from src.utils.constants import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# "int8" applies dynamic int8 quantization to the linear layers (CPU only)
+MODEL_BACKENDS = ('fp32', 'int8')
+QUANTIZED_WEIGHTS_FILE = "quantized.pt"
+QUANTIZED_META_FILE = "quantization.json"
+
+
+def model_version(model_name: str) -> str:
+    """Short fingerprint of a local model's weight files, so derived artifacts notice retraining."""
+    if not os.path.isdir(model_name):
+        return "hub"
+    stamps = []
+    for name in sorted(os.listdir(model_name)):
+        if name.endswith(('.safetensors', '.bin')):
+            info = os.stat(os.path.join(model_name, name))
+            stamps.append(f"{name}:{info.st_size}:{int(info.st_mtime)}")
+    return hashlib.sha256("|".join(stamps).encode('utf-8')).hexdigest()[:12]
+
+
+def quantized_model_dir(model_name: str) -> str:
+    """Where the int8 artifact of a model is cached: next to a local model, else under .cache."""
+    if os.path.isdir(model_name):
+        return f"{os.path.normpath(model_name)}-int8"
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', model_name).strip('_')
+    return os.path.join(os.getcwd(), CACHE_DIR, "quantized", f"{slug}-int8")
+
+
+def load_pretrained(model_name: str, device: Optional[str] = None, backend: str = 'fp32') -> Tuple:
+    """Load a transformer encoder and its tokenizer for inference.
+
+    The weights are frozen (no autograd state) since they are shared read-only.
+
+    Args:
+        model_name (str): Hugging Face model id or local model directory.
+        device (str, optional): Device (default: CUDA if available; int8 is CPU only).
+        backend (str): "fp32", or "int8" for the dynamically quantized model.
+
+    Returns:
+        tuple: (tokenizer, model, torch.device)
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    if backend == 'int8':
+        return load_quantized(model_name)
+
+    import torch
+    from transformers import AutoTokenizer
+
+    device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    source = resolve_model_source(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    # Memory-mapped (shared between processes) for local safetensors weights on CPU
+    model = load_model(source)
+    model.to(device)
+    model.eval()
+    model.requires_grad_(False)
+    return tokenizer, model, device
+
+
+def load_quantized(model_name: str) -> Tuple:
+    """Load the int8 dynamically quantized model, quantizing and caching it on first use.
+
+    The cached artifact (quantized_model_dir) is reused while the source
+    weights and the torch version are unchanged; it skips reading the fp32
+    weights and quantizing them again.
+
+    Returns:
+        tuple: (tokenizer, quantized model, cpu torch.device)
+    """
+    import torch
+    from transformers import AutoConfig, AutoModel, AutoTokenizer
+
+    model_name = resolve_model_source(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    artifact_dir = quantized_model_dir(model_name)
+    weights_path = os.path.join(artifact_dir, QUANTIZED_WEIGHTS_FILE)
+    meta_path = os.path.join(artifact_dir, QUANTIZED_META_FILE)
+    meta = {'source_version': model_version(model_name), 'torch': torch.__version__}
+
+    cached = None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == meta:
+                cached = torch.load(weights_path, map_location='cpu', weights_only=True)
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.debug(f"No usable quantized artifact in {artifact_dir}: {e}")
+
+    if cached is not None:
+        with skip_weight_init():
+            # Every weight is overwritten by the cached state dict
+            model = AutoModel.from_config(AutoConfig.from_pretrained(model_name))
+        model = _quantize_linear_layers(model.eval())
+        with warnings.catch_warnings():
+            # Quantized tensor constructors are deprecated in recent torch releases but still supported
+            warnings.simplefilter("ignore", UserWarning)
+            model.load_state_dict(_restore_state_dict(cached))
+        logger.info(f"Loaded int8 model from {artifact_dir}")
+    else:
+        model = _quantize_linear_layers(load_model(model_name))
+        try:
+            os.makedirs(artifact_dir, exist_ok=True)
+            torch.save(_portable_state_dict(model), f"{weights_path}.tmp")
+            os.replace(f"{weights_path}.tmp", weights_path)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            logger.info(f"Cached int8 model in {artifact_dir}")
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Could not cache int8 model in {artifact_dir}: {e}")
+
+    model.requires_grad_(False)
+    return tokenizer, model, torch.device("cpu")
+
+
+def _quantize_linear_layers(model):
+    """Replace the model's nn.Linear layers with dynamically quantized int8 ones."""
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    with warnings.catch_warnings():
+        # Eager-mode quantization is deprecated in recent torch releases but still supported
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _portable_state_dict(model) -> dict:
+    """State dict of a quantized model as plain tensors, numbers and strings.
+
+    Quantized tensors and dtypes do not pickle reliably (pickle looks their
+    qscheme up in every imported module, which trips over lazily imported
+    packages), and plain values can be loaded with weights_only=True.
+    """
+    state = model.state_dict()
+    return {
+        'state': {key: _encode_value(value) for key, value in state.items()},
+        'metadata': {key: dict(value) for key, value in getattr(state, '_metadata', {}).items()},
+    }
+
+
+def _restore_state_dict(saved: dict):
+    """Inverse of _portable_state_dict."""
+    from collections import OrderedDict
+
+    state = OrderedDict((key, _decode_value(value)) for key, value in saved['state'].items())
+    state._metadata = OrderedDict(saved['metadata'])
+    return state
+
+
+def _encode_value(value):
+    import torch
+
+    if isinstance(value, torch.dtype):
+        return {'dtype': str(value).split('.')[-1]}
+    if isinstance(value, tuple):
+        return {'tuple': [_encode_value(item) for item in value]}
+    if isinstance(value, torch.Tensor) and value.is_quantized:
+        # Dynamic quantization uses one scale and zero point per tensor
+        return {'int_repr': value.int_repr(), 'scale': value.q_scale(), 'zero_point': value.q_zero_point()}
+    return value
+
+
+def _decode_value(value):
+    import torch
+
+    if not isinstance(value, dict):
+        return value
+    if 'dtype' in value:
+        return getattr(torch, value['dtype'])
+    if 'tuple' in value:
+        return tuple(_decode_value(item) for item in value['tuple'])
+    return torch._make_per_tensor_quantized_tensor(value['int_repr'], value['scale'], value['zero_point'])
+
+
+def parameter_bytes(model) -> int:
+    """Memory held by a model's weights, including quantized (packed) ones."""
+    try:
+        state = model.state_dict()
+    except AttributeError:
+        return 0
+    total = 0
+    for value in state.values():
+        for tensor in (value if isinstance(value, tuple) else (value,)):
+            if hasattr(tensor, 'element_size'):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def registry_key(model_name: str, backend: str = 'fp32') -> str:
+    """Name a model is registered (and reported) under."""
+    return model_name if backend == 'fp32' else f"{model_name} [{backend}]"
+
+
+class ModelRegistry:
+    """Loads each model/tokenizer once per process and hands out shared references.
+
+    Holders acquire() a model and release() it when done; a model nobody holds
+    stays loaded until unload() so the next user does not pay for loading it
+    again.
+    """
+
+    def __init__(self, loader: Callable[[str, Optional[str], str], Tuple] = load_pretrained):
+        """Initialize an empty registry.
+
+        Args:
+            loader (callable): fn(model_name, device, backend) returning (tokenizer, model, device).
+        """
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Dict] = {}
+
+    def acquire(self, model_name: str, device: Optional[str] = None, backend: str = 'fp32') -> Tuple:
+        """Get the shared (tokenizer, model, device) for a model, loading it on first use.
+
+        Concurrent first acquires of the same model load it once. Every call
+        must be matched by a release().
+
+        Args:
+            model_name (str): Hugging Face model id or local model directory.
+            device (str, optional): Device for the first load (default: CUDA if available).
+            backend (str): "fp32" or "int8"; each backend is a separate shared model.
+
+        Returns:
+            tuple: (tokenizer, model, torch.device); treat them as read-only.
+        """
+        key = registry_key(model_name, backend)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['refs'] += 1
+                    return entry['tokenizer'], entry['model'], entry['device']
+
+            start = time.perf_counter()
+            tokenizer, model, device = self.loader(model_name, device, backend)
+            load_seconds = time.perf_counter() - start
+            entry = {
+                'tokenizer': tokenizer,
+                'model': model,
+                'device': device,
+                'refs': 1,
+                'load_seconds': round(load_seconds, 3),
+                'bytes': parameter_bytes(model),
+                'derived': {},
+            }
+            with self._lock:
+                self._entries[key] = entry
+            logger.info(f"Loaded shared model {key} on {device} in {load_seconds:.1f}s "
+                        f"({entry['bytes'] / 2 ** 20:.0f} MB)")
+            return tokenizer, model, device
+
+    def derived(self, model_name: str, name: str, factory: Callable[[], object], backend: str = 'fp32'):
+        """Get an object built from a loaded model (e.g. a compiled copy), building it once.
+
+        The object lives as long as the model's registry entry and is dropped
+        with it on unload().
+
+        Args:
+            model_name (str): A model acquired by the caller.
+            name (str): What is derived, unique per model.
+            factory (callable): fn() building the object on first use.
+            backend (str): Backend of the model.
+        """
+        key = registry_key(model_name, backend)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Held while building, so concurrent first calls build once
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    raise KeyError(f"Model not loaded: {key}")
+                if name in entry['derived']:
+                    return entry['derived'][name]
+            value = factory()
+            with self._lock:
+                entry['derived'][name] = value
+            return value
+
+    def release(self, model_name: str, backend: str = 'fp32'):
+        """Drop one reference taken by acquire()."""
+        with self._lock:
+            entry = self._entries.get(registry_key(model_name, backend))
+            if entry is not None and entry['refs'] > 0:
+                entry['refs'] -= 1
+
+    def unload(self, model_name: str, force: bool = False, backend: str = 'fp32') -> bool:
+        """Free a model's memory.
+
+        Args:
+            model_name (str): Model to unload.
+            force (bool): Unload even while references are held; holders keep
+                working with their copy, which is freed when they drop it.
+            backend (str): Backend of the model to unload.
+
+        Returns:
+            bool: Whether the model was unloaded.
+        """
+        key = registry_key(model_name, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry['refs'] > 0 and not force:
+                logger.warning(f"Not unloading {key}: {entry['refs']} reference(s) held")
+                return False
+            del self._entries[key]
+
+        device = entry['device']
+        del entry
+        gc.collect()
+        if getattr(device, 'type', None) == 'cuda':
+            import torch
+            torch.cuda.empty_cache()
+        logger.info(f"Unloaded model {key}")
+        return True
+
+    def loaded(self, model_name: str, backend: str = 'fp32') -> bool:
+        """Whether a model is currently loaded."""
+        with self._lock:
+            return registry_key(model_name, backend) in self._entries
+
+    def stats(self) -> Dict:
+        """References and memory of every loaded model."""
+        with self._lock:
+            return {
+                name: {
+                    'refs': entry['refs'],
+                    'device': str(entry['device']),
+                    'parameter_mb': round(entry['bytes'] / 2 ** 20, 1),
+                    'load_seconds': entry['load_seconds'],
+                    'derived': sorted(entry['derived']),
+                }
+                for name, entry in self._entries.items()
+            }
+
+
+# Singleton instance
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get singleton instance"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,284 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.analyzer.codebert_batcher import analyze_with_codebert, get_codebert_batcher
+from src.analyzer.model_loader import BackgroundLoad, ModelNotReady, get_model_loader, readiness
+
+logger = logging.getLogger(__name__)
+
+# Frame: 1-byte opcode, 4-byte big-endian payload length, payload
+FRAME_HEADER = struct.Struct('>BI')
+MAX_FRAME_BYTES = 64 * 2 ** 20
+
+# Requests (payload: UTF-8 code, or empty)
+OP_ANALYZE = 0x01
+OP_EMBED = 0x02
+OP_STATUS = 0x03
+# Responses
+OP_RESULT = 0x81      # JSON document
+OP_VECTOR = 0x82      # little-endian float32 values
+OP_NOT_READY = 0x83   # JSON load status
+OP_ERROR = 0x84       # UTF-8 message
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+
+class ModelServerUnavailable(ModelNotReady):
+    """The model server cannot be reached; callers degrade as for a model still loading."""
+
+    def __init__(self, socket_path: str, error: Exception):
+        super().__init__(f"Model server at {socket_path}", {'state': 'unavailable', 'error': str(error)})
+
+
+class ModelServerError(RuntimeError):
+    """The model server failed to handle a request (its error message is the exception's)."""
+
+
+def send_frame(sock: socket.socket, op: int, payload: bytes = b""):
+    sock.sendall(FRAME_HEADER.pack(op, len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    """Read one frame; None when the peer closed the connection between frames."""
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    op, size = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds the limit")
+    payload = _recv_exactly(sock, size) if size else b""
+    if payload is None:
+        raise ConnectionError("Connection closed mid-frame")
+    return op, payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 2 ** 20))
+        if not chunk:
+            if chunks:
+                raise ConnectionError("Connection closed mid-frame")
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class ModelServer:
+    """Serves one CodeBERT model to every web worker of a host over a Unix socket.
+
+    The server process owns the model (loaded in the background, see
+    model_loader), so web workers never import torch; requests from all of
+    them go through one CodeBertBatcher and share forward passes.
+    """
+
+    def __init__(self, socket_path: str, model_name: Optional[str] = None, load: Optional[BackgroundLoad] = None):
+        """Initialize the server (nothing is bound or loaded until start()/serve_forever()).
+
+        Args:
+            socket_path (str): Path of the Unix socket to listen on.
+            model_name (str, optional): CodeBERT model (default: CODEBERT_MODEL, else CodeBERT).
+            load (BackgroundLoad, optional): Load providing the analyzer (default: the model's loader).
+        """
+        self.socket_path = socket_path
+        self.load = load or get_model_loader(model_name)
+        self.requests = 0
+        self.errors = 0
+        self._server = None
+
+    def start(self) -> threading.Thread:
+        """Bind the socket, start loading the model and serve from a daemon thread."""
+        self._bind()
+        thread = threading.Thread(target=self._server.serve_forever, name="model-server", daemon=True)
+        thread.start()
+        return thread
+
+    def serve_forever(self):
+        """Bind the socket, start loading the model and serve until shutdown()."""
+        self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._cleanup()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._cleanup()
+
+    def handle(self, op: int, payload: bytes) -> Tuple[int, bytes]:
+        """Response (opcode, payload) to one request."""
+        self.requests += 1
+        if op == OP_STATUS:
+            status = dict(readiness(), server={'requests': self.requests, 'errors': self.errors})
+            if self.load.ready():
+                status['batching'] = get_codebert_batcher(self.load.get()).stats()
+            return OP_RESULT, json.dumps(status).encode('utf-8')
+        if op not in (OP_ANALYZE, OP_EMBED):
+            self.errors += 1
+            return OP_ERROR, f"Unknown opcode {op}".encode('utf-8')
+
+        try:
+            analyzer = self.load.get()
+        except ModelNotReady as e:
+            return OP_NOT_READY, json.dumps(e.status).encode('utf-8')
+        try:
+            code = payload.decode('utf-8')
+            if op == OP_EMBED:
+                return OP_VECTOR, analyzer.embed(code).astype('<f4').tobytes()
+            return OP_RESULT, json.dumps(analyze_with_codebert(analyzer, code)).encode('utf-8')
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Model server request failed: {e}")
+            return OP_ERROR, str(e).encode('utf-8')
+
+    def _bind(self):
+        if os.path.exists(self.socket_path):
+            # Left behind by a server that did not shut down cleanly
+            os.remove(self.socket_path)
+        model_server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        frame = recv_frame(self.request)
+                    except (ConnectionError, ValueError) as e:
+                        logger.warning(f"Dropping model server connection: {e}")
+                        return
+                    if frame is None:
+                        return
+                    try:
+                        send_frame(self.request, *model_server.handle(*frame))
+                    except OSError:
+                        return  # the client went away
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        self.load.start()
+        logger.info(f"Model server listening on {self.socket_path}")
+
+    def _cleanup(self):
+        self._server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class ModelServerClient:
+    """Talks to a ModelServer; safe to share between threads (one connection per thread).
+
+    analyze_code() and embed() stand in for the CodeBertAnalyzer methods of
+    the same name. Both raise ModelNotReady while the server is loading the
+    model, and ModelServerUnavailable (a ModelNotReady) when it cannot be reached.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def analyze_code(self, code: str) -> Dict:
+        """CodeBERT analysis of code (see analyze_with_codebert)."""
+        return json.loads(self._request(OP_ANALYZE, code.encode('utf-8')))
+
+    def embed(self, code: str):
+        """Unit-length CodeBERT embedding of code as a float32 numpy array."""
+        import numpy as np
+        return np.frombuffer(self._request(OP_EMBED, code.encode('utf-8')), dtype='<f4')
+
+    def readiness(self) -> Dict:
+        """The server's readiness report, or 'degraded' when it cannot be reached."""
+        try:
+            return json.loads(self._request(OP_STATUS))
+        except ModelServerUnavailable as e:
+            return {'status': 'degraded', 'models': {}, 'error': str(e)}
+
+    def _request(self, op: int, payload: bytes = b"") -> bytes:
+        """Send a request and return the response payload, reconnecting once on a stale connection."""
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, op, payload)
+                frame = recv_frame(sock)
+                if frame is None:
+                    raise ConnectionError("Model server closed the connection")
+                break
+            except socket.timeout as e:
+                # The server is busy, not gone: sending the request again would only queue it twice
+                self._close()
+                raise ModelServerUnavailable(self.socket_path, e) from e
+            except (OSError, ConnectionError) as e:
+                self._close()
+                if attempt:
+                    raise ModelServerUnavailable(self.socket_path, e) from e
+
+        response, body = frame
+        if response == OP_NOT_READY:
+            raise ModelNotReady("CodeBERT (model server)", json.loads(body))
+        if response == OP_ERROR:
+            raise ModelServerError(body.decode('utf-8', errors='replace'))
+        return body
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+
+# Singleton instance
+_client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+
+
+def get_model_server_client() -> Optional[ModelServerClient]:
+    """Get the client of the host's model server, or None to run models in-process.
+
+    Environment:
+        CODEBERT_SERVER_SOCKET: Unix socket of a running model server (unset: in-process).
+        CODEBERT_SERVER_TIMEOUT: Seconds to wait for a response (default 30).
+    """
+    global _client, _client_initialized
+    with _client_lock:
+        if not _client_initialized:
+            _client_initialized = True
+            socket_path = os.getenv('CODEBERT_SERVER_SOCKET')
+            if socket_path:
+                _client = ModelServerClient(
+                    socket_path, timeout=float(os.getenv('CODEBERT_SERVER_TIMEOUT', DEFAULT_TIMEOUT_SECONDS))
+                )
+    return _client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve CodeBERT to the web workers of this host.")
+    parser.add_argument('--socket', default=os.getenv('CODEBERT_SERVER_SOCKET', '/tmp/codebert.sock'),
+                        help="Unix socket to listen on")
+    parser.add_argument('--model', help="CodeBERT model (default: CODEBERT_MODEL, else models/my-codebert)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    ModelServer(args.socket, args.model).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import ast
+import logging
+import re
+from typing import Dict, List, Optional
+
+from src.analyzer.code_units import extract_units
+from src.analyzer.logic_analyzer import LogicAnalyzer
+from src.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+REVIEW_FORMAT_INSTRUCTIONS = """Format your response as follows:
+SUMMARY: [brief summary]
+SUGGESTIONS: [bullet points]
+ISSUES: [potential bugs or concerns]
+QUALITY_RATING: [1-10]
+RECOMMENDATION: [brief recommendation]"""
+
+PRUNED_PROMPT_TEMPLATE = """Please review the following functions from a larger Python file and provide:
+1. A brief summary of what the code does
+2. 3-5 specific improvement suggestions (be concise)
+3. Any potential bugs or issues
+4. Code quality rating (1-10)
+5. Overall recommendation
+
+Only the functions of interest are shown, with the imports they use, the signatures
+of the functions they call and the static analysis findings for their lines.
+The numbers in the left gutter are the real file line numbers: refer to code as "line N".
+
+{sections}
+
+""" + REVIEW_FORMAT_INSTRUCTIONS
+
+LINE_REFERENCE = re.compile(r'\b([Ll]ines?\s+)(\d+)(?:(\s*(?:-|to)\s*)(\d+))?')
+
+
+def build_pruned_prompt(code: str, changed_lines: Optional[List[int]] = None,
+                        findings: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """Builds a review prompt containing only flagged or changed functions.
+
+    When changed lines are given only the functions touching them are sent
+    (unchanged code was covered by an earlier review); otherwise every function
+    with a static analysis finding is sent. Each selected function is sent with its minimal context: the imports it
+    uses, the signatures of module functions it calls and the static findings
+    inside its span.
+
+    Args:
+        code (str): The full Python source.
+        changed_lines (list, optional): Line numbers changed since the last review.
+        findings (list, optional): LogicAnalyzer issues; computed if not given.
+
+    Returns:
+        dict: 'prompt', the selected 'segments' (qualname and absolute line span),
+            'prompt_tokens' and 'full_prompt_tokens', or None when nothing was
+            selected or pruning would not shrink the prompt, in which case the
+            whole file should be sent instead.
+    """
+    units = extract_units(code)
+    if not units:
+        return None
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    if findings is None:
+        findings = LogicAnalyzer().analyze(code)
+    changed = set(changed_lines or [])
+
+    selected = []
+    for unit in units:
+        span = range(unit['start_line'], unit['end_line'] + 1)
+        unit_findings = [f for f in findings if f.get('line') in span]
+        if changed.intersection(span) if changed else unit_findings:
+            selected.append((unit, unit_findings))
+
+    if not selected:
+        logger.info("No flagged or changed functions; sending the whole file for review")
+        return None
+
+    lines = code.splitlines()
+    imports = _module_imports(tree)
+    signatures = _module_signatures(tree)
+    nodes = {node.lineno: node for node in ast.walk(tree)
+             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    sections = [_render_section(unit, nodes[unit['def_line']], unit_findings, lines, imports, signatures)
+                for unit, unit_findings in selected]
+    prompt = PRUNED_PROMPT_TEMPLATE.format(sections="\n\n".join(sections))
+
+    pruned = {
+        'prompt': prompt,
+        'segments': [{'qualname': unit['qualname'], 'start_line': unit['start_line'],
+                      'end_line': unit['end_line']} for unit, _ in selected],
+        'prompt_tokens': estimate_tokens(prompt),
+        'full_prompt_tokens': estimate_tokens(PRUNED_PROMPT_TEMPLATE.format(sections=code)),
+    }
+    if pruned['prompt_tokens'] >= pruned['full_prompt_tokens']:
+        logger.info("Pruned prompt is not smaller than the whole file; sending the whole file for review")
+        return None
+
+    logger.info(f"Pruned prompt: {pruned['prompt_tokens']} tokens "
+                f"(full file ~{pruned['full_prompt_tokens']}) for {len(selected)} function(s)")
+    return pruned
+
+
+def map_review_to_source(review: Dict, pruned: Dict, relative: bool = False) -> Dict:
+    """Rewrites line references in a review of a pruned prompt to absolute file lines.
+
+    Models sometimes count lines from the top of the snippet instead of using the
+    gutter numbers; such references are translated back into the file.
+
+    Args:
+        review (dict): Parsed review (summary/suggestions/issues/...).
+        pruned (dict): The result of build_pruned_prompt.
+        relative (bool): The single segment was sent without a line gutter, so
+            every line number counts from its first line.
+
+    Returns:
+        dict: The review with remapped line references, the 'issue_lines' it cites
+            and the 'reviewed_units' that were sent.
+    """
+    segments = pruned['segments']
+    cited = set()
+
+    def remap(text: str) -> str:
+        def replace(match):
+            start = _to_absolute(int(match.group(2)), segments, relative)
+            cited.add(start)
+            if match.group(4) is None:
+                return f"{match.group(1)}{start}"
+            end = _to_absolute(int(match.group(4)), segments, relative)
+            cited.update(range(start, end + 1))
+            return f"{match.group(1)}{start}{match.group(3)}{end}"
+        return LINE_REFERENCE.sub(replace, text)
+
+    mapped = dict(review)
+    for key in ('summary', 'issues', 'recommendation'):
+        if isinstance(mapped.get(key), str):
+            mapped[key] = remap(mapped[key])
+    if isinstance(mapped.get('suggestions'), list):
+        mapped['suggestions'] = [remap(s) if isinstance(s, str) else s for s in mapped['suggestions']]
+
+    mapped['issue_lines'] = sorted(cited)
+    mapped['reviewed_units'] = [s['qualname'] for s in segments]
+    return mapped
+
+
+def _to_absolute(line: int, segments: List[Dict], relative: bool = False) -> int:
+    """Translate a snippet-relative line number into a file line number."""
+    if relative:
+        return segments[0]['start_line'] + line - 1
+    if any(s['start_line'] <= line <= s['end_line'] for s in segments):
+        return line
+    if len(segments) == 1 and line <= segments[0]['end_line'] - segments[0]['start_line'] + 1:
+        return segments[0]['start_line'] + line - 1
+    return line
+
+
+def _render_section(unit: Dict, node: ast.AST, findings: List[Dict], lines: List[str],
+                    imports: Dict[str, str], signatures: Dict[str, str]) -> str:
+    """Render one function with its imports, callee signatures and findings."""
+    used_names = {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+    called = set()
+    for call in ast.walk(node):
+        if isinstance(call, ast.Call):
+            if isinstance(call.func, ast.Name):
+                called.add(call.func.id)
+            elif isinstance(call.func, ast.Attribute):
+                called.add(call.func.attr)
+
+    parts = [f"### {unit['qualname']} (lines {unit['start_line']}-{unit['end_line']})"]
+
+    needed_imports = sorted({stmt for name, stmt in imports.items() if name in used_names})
+    if needed_imports:
+        parts.append("Imports used:\n" + "\n".join(needed_imports))
+
+    callee_signatures = [sig for name, sig in sorted(signatures.items())
+                         if name in called and name != unit['name']]
+    if callee_signatures:
+        parts.append("Signatures of called functions:\n" + "\n".join(callee_signatures))
+
+    if findings:
+        parts.append("Static analysis findings:\n" + "\n".join(
+            f"- line {f['line']} [{f.get('severity', 'Info')}] {f.get('type', 'Issue')}: {f.get('message', '')}"
+            for f in findings
+        ))
+
+    numbered = "\n".join(f"{n:>5}| {lines[n - 1]}" for n in range(unit['start_line'], unit['end_line'] + 1))
+    parts.append(f"```python\n{numbered}\n```")
+    return "\n".join(parts)
+
+
+def _module_imports(tree: ast.Module) -> Dict[str, str]:
+    """Map each name bound by a module-level import to its import statement."""
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statement = ast.unparse(node)
+            for alias in node.names:
+                name = alias.asname or alias.name.split('.')[0]
+                imports[name] = statement
+    return imports
+
+
+def _module_signatures(tree: ast.Module) -> Dict[str, str]:
+    """Map each function and method name in the module to its signature line."""
+    signatures = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+            returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+            signatures.setdefault(node.name, f"{prefix} {node.name}({ast.unparse(node.args)}){returns}: ...")
+    return signatures
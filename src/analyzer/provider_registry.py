@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+import time
+
+from src.analyzer.cassettes import replaying
+
+logger = logging.getLogger(__name__)
+
+# Preferred Gemini models, newest first
+GEMINI_MODEL_CANDIDATES = ['gemini-2.5-flash', 'gemini-2.5-pro', 'gemini-2.0-flash', 'gemini-pro']
+# How often the working Gemini model is re-resolved
+GEMINI_REFRESH_SECONDS = 3600
+# API errors meaning the key or the resolved model is unusable (unauthenticated, denied, not found);
+# anything else (timeouts, rate limits, server errors) keeps the resolved model
+GEMINI_RESOLVE_ERRORS = ('Unauthenticated', 'PermissionDenied', 'NotFound')
+GEMINI_RESOLVE_STATUSES = (401, 403, 404)
+
+# How often an unreachable local model server is checked again
+LOCAL_MODEL_RECHECK_SECONDS = 60
+
+OPENAI_MODEL = "gpt-4"
+CLAUDE_MODEL = "claude-3-opus-20240229"
+
+
+def gemini_transport_options() -> dict:
+    """genai.configure() options that point the SDK at GEMINI_BASE_URL when it is set.
+
+    A custom endpoint (e.g. a local mock server) needs the REST transport;
+    the default gRPC transport only talks to Google.
+    """
+    base_url = os.getenv('GEMINI_BASE_URL')
+    if not base_url:
+        return {}
+    return {'transport': 'rest', 'client_options': {'api_endpoint': base_url}}
+
+
+def _gemini_sdk():
+    """Import and configure the Gemini SDK on first use.
+
+    The SDK takes most of a second to import, so it is kept out of module
+    import (and the serverless cold start) until a Gemini review needs it.
+    """
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return None
+    api_key = os.getenv('GEMINI_API_KEY')
+    if api_key:
+        genai.configure(api_key=api_key, **gemini_transport_options())
+    return genai
+
+
+def needs_reresolve(error: Exception) -> bool:
+    """Whether a Gemini call failed because the key or model is unusable, not transiently."""
+    if type(error).__name__ in GEMINI_RESOLVE_ERRORS:
+        return True
+    try:
+        return int(getattr(error, 'code', None)) in GEMINI_RESOLVE_STATUSES
+    except (TypeError, ValueError):
+        return False
+
+
+class ProviderRegistry:
+    """Holds long-lived provider clients so requests reuse connections and resolved models."""
+
+    def __init__(self, refresh_interval: float = GEMINI_REFRESH_SECONDS):
+        """Initialize an empty (cold) registry.
+
+        Args:
+            refresh_interval (float): Seconds before the Gemini model is resolved again.
+        """
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._provider_locks = {}
+
+    def gemini_model(self):
+        """Get the shared Gemini model handle, resolving the working model if needed.
+
+        Returns:
+            tuple: (GenerativeModel, model name), or (None, None) if no model is usable.
+        """
+        entry = self._get('gemini', self._resolve_gemini, max_age=self.refresh_interval)
+        return (entry['client'], entry['model']) if entry else (None, None)
+
+    def openai_client(self):
+        """Get the shared OpenAI client (keeps its HTTP connection pool alive)."""
+        entry = self._get('openai', self._create_openai)
+        return entry['client'] if entry else None
+
+    def anthropic_client(self):
+        """Get the shared Anthropic client (keeps its HTTP connection pool alive)."""
+        entry = self._get('claude', self._create_anthropic)
+        return entry['client'] if entry else None
+
+    def local_model(self):
+        """Get the shared LocalModelAnalyzer (Ollama), or None if the server is unreachable."""
+        entry = self._get('ollama', self._create_local_model, max_age=LOCAL_MODEL_RECHECK_SECONDS)
+        return entry['client'] if entry else None
+
+    def warm(self):
+        """Resolve every configured provider ahead of the first request."""
+        logger.info("Warming AI provider clients...")
+        self.gemini_model()
+        self.openai_client()
+        self.anthropic_client()
+        self.local_model()
+        logger.info(f"AI providers: {self.status()}")
+
+    def invalidate(self, provider: str):
+        """Drop a provider's client so the next request resolves it again."""
+        with self._lock:
+            self._entries.pop(provider, None)
+
+    def status(self) -> dict:
+        """Report warm/cold state of each provider."""
+        with self._lock:
+            entries = dict(self._entries)
+        status = {}
+        for provider in ('gemini', 'openai', 'claude', 'ollama'):
+            entry = entries.get(provider)
+            if entry is None:
+                status[provider] = {'state': 'cold'}
+            elif entry['client'] is None:
+                status[provider] = {'state': 'unavailable', 'reason': entry.get('reason')}
+            else:
+                status[provider] = {
+                    'state': 'warm',
+                    'model': entry['model'],
+                    'age_seconds': round(time.monotonic() - entry['created_at'], 1),
+                }
+        return status
+
+    def _get(self, provider: str, factory, max_age: float = None):
+        """Return a cached entry, creating it when missing or stale.
+
+        The factory may hit the network (Gemini model listing), so it runs under
+        a per-provider lock: concurrent requests for that provider wait for one
+        creation, while the other providers and status() are not blocked.
+        """
+        entry = self._fresh(provider, max_age)
+        if entry is None:
+            with self._lock:
+                provider_lock = self._provider_locks.setdefault(provider, threading.Lock())
+            with provider_lock:
+                # Another thread may have created it while this one waited
+                entry = self._fresh(provider, max_age)
+                if entry is None:
+                    entry = factory()
+                    entry['created_at'] = time.monotonic()
+                    with self._lock:
+                        self._entries[provider] = entry
+        return entry if entry['client'] is not None else None
+
+    def _fresh(self, provider: str, max_age: float = None):
+        """The cached entry of a provider, or None if missing or older than max_age."""
+        with self._lock:
+            entry = self._entries.get(provider)
+        if entry is not None and max_age is not None and time.monotonic() - entry['created_at'] > max_age:
+            return None
+        return entry
+
+    def _resolve_gemini(self) -> dict:
+        """Pick the first candidate model that the API key can use."""
+        genai = _gemini_sdk()
+        if genai is None:
+            return {'client': None, 'model': None, 'reason': 'google-generativeai not installed'}
+        if replaying():
+            # Responses come from the cassette: no key or model listing needed
+            return {'client': genai.GenerativeModel(GEMINI_MODEL_CANDIDATES[0]), 'model': GEMINI_MODEL_CANDIDATES[0]}
+        if not os.getenv('GEMINI_API_KEY'):
+            return {'client': None, 'model': None, 'reason': 'GEMINI_API_KEY not set'}
+
+        model_name = GEMINI_MODEL_CANDIDATES[0]
+        try:
+            available = {m.name.split('/')[-1] for m in genai.list_models()
+                         if 'generateContent' in getattr(m, 'supported_generation_methods', [])}
+            model_name = next((name for name in GEMINI_MODEL_CANDIDATES if name in available), None)
+        except Exception as e:
+            logger.debug(f"Could not list Gemini models, assuming {model_name}: {e}")
+
+        if model_name is None:
+            return {'client': None, 'model': None, 'reason': 'No supported Gemini model available'}
+
+        logger.info(f"Resolved Gemini model: {model_name}")
+        return {'client': genai.GenerativeModel(model_name), 'model': model_name}
+
+    def _create_openai(self) -> dict:
+        """Create the OpenAI client once per process."""
+        api_key = os.getenv('OPENAI_API_KEY') or ('replay' if replaying() else None)
+        if not api_key:
+            return {'client': None, 'model': None, 'reason': 'OPENAI_API_KEY not set'}
+        try:
+            from openai import OpenAI
+            return {'client': OpenAI(api_key=api_key, base_url=os.getenv('OPENAI_BASE_URL')),
+                    'model': OPENAI_MODEL}
+        except ImportError as e:
+            return {'client': None, 'model': None, 'reason': str(e)}
+
+    def _create_anthropic(self) -> dict:
+        """Create the Anthropic client once per process."""
+        api_key = os.getenv('ANTHROPIC_API_KEY') or ('replay' if replaying() else None)
+        if not api_key:
+            return {'client': None, 'model': None, 'reason': 'ANTHROPIC_API_KEY not set'}
+        try:
+            import anthropic
+            return {'client': anthropic.Anthropic(api_key=api_key, base_url=os.getenv('ANTHROPIC_BASE_URL')),
+                    'model': CLAUDE_MODEL}
+        except ImportError as e:
+            return {'client': None, 'model': None, 'reason': str(e)}
+
+    def _create_local_model(self) -> dict:
+        """Connect to the local Ollama server configured by OLLAMA_HOST/OLLAMA_MODEL."""
+        try:
+            from src.analyzer.custom_models import LocalModelAnalyzer
+        except ImportError as e:
+            return {'client': None, 'model': None, 'reason': str(e)}
+
+        analyzer = LocalModelAnalyzer(
+            model_name=os.getenv('OLLAMA_MODEL', 'llama2'),
+            base_url=os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+        )
+        if not analyzer.available:
+            return {'client': None, 'model': None, 'reason': f"No local model server at {analyzer.base_url}"}
+        return {'client': analyzer, 'model': analyzer.model_name}
+
+
+# Singleton instance
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Get singleton instance"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderRegistry()
+    return _registry
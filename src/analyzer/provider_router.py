@@ -0,0 +1,338 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rolling window of recent calls used for latency percentiles and error rates
+HEALTH_WINDOW = 50
+# Breaker opens when at least this share of the last calls failed...
+FAILURE_RATE_THRESHOLD = 0.5
+# ...with at least this many calls observed, or after this many failures in a row
+MIN_CALLS_FOR_RATE = 5
+CONSECUTIVE_FAILURES_TO_OPEN = 3
+# Seconds an open breaker waits before letting a single probe request through
+BREAKER_COOLDOWN_SECONDS = 30
+# Hedge after this long until enough samples exist to compute a p95
+DEFAULT_HEDGE_AFTER_SECONDS = 15
+MIN_SAMPLES_FOR_P95 = 10
+# Automatic routing tries providers in this breaker-state order, fastest first within a state
+BREAKER_RANK = {'closed': 0, 'half_open': 1, 'open': 2}
+# Longest a call on the shared executor may wait for provider quota; a longer
+# wait fails over instead, so a throttled provider cannot fill the pool
+POOLED_MAX_WAIT_SECONDS = 1.0
+
+_pool_thread = threading.local()
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider is not configured, or when no provider could answer."""
+
+
+def queue_wait_limit(max_wait: float) -> float:
+    """Longest the current thread may wait for quota: capped on the routers' executor threads."""
+    if getattr(_pool_thread, 'pooled', False):
+        return min(max_wait, POOLED_MAX_WAIT_SECONDS)
+    return max_wait
+
+
+def _mark_pooled():
+    _pool_thread.pooled = True
+
+
+class ProviderHealth:
+    """Rolling latency/error statistics and a circuit breaker for one provider."""
+
+    def __init__(self, name: str, window: int = HEALTH_WINDOW,
+                 cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        """Initialize a closed breaker with no history."""
+        self.name = name
+        self.cooldown = cooldown
+        self.calls = deque(maxlen=window)  # (latency seconds, ok)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now (closed, or a half-open probe)."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        """Record a good answer; closes a half-open breaker."""
+        with self._lock:
+            self.calls.append((latency, True))
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != 'closed':
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self.state = 'closed'
+
+    def record_failure(self, latency: float):
+        """Record a failed call; opens the breaker when the provider looks down."""
+        with self._lock:
+            self.calls.append((latency, False))
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            failures = sum(1 for _, ok in self.calls if not ok)
+            too_many = (len(self.calls) >= MIN_CALLS_FOR_RATE
+                        and failures / len(self.calls) >= FAILURE_RATE_THRESHOLD)
+            if self.state == 'half_open' or too_many or self.consecutive_failures >= CONSECUTIVE_FAILURES_TO_OPEN:
+                if self.state != 'open':
+                    logger.warning(f"Circuit breaker for {self.name} opened")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Let another half-open probe through when this one never reached the provider."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Latency percentile of successful calls in the window, or None without enough samples."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self.calls if ok)
+        if len(latencies) < MIN_SAMPLES_FOR_P95:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def stats(self) -> Dict:
+        """Snapshot for the metrics endpoint."""
+        with self._lock:
+            calls = list(self.calls)
+            state = self.state
+        failures = sum(1 for _, ok in calls if not ok)
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            'state': state,
+            'window_calls': len(calls),
+            'error_rate': round(failures / len(calls), 3) if calls else 0.0,
+            'p50_seconds': round(p50, 3) if p50 is not None else None,
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+        }
+
+
+class ProviderRouter:
+    """Routes reviews to the healthiest provider, with failover and hedged requests."""
+
+    def __init__(self, providers: Dict[str, Callable], order: List[str], max_workers: int = 16,
+                 streamers: Optional[Dict[str, Callable]] = None):
+        """Initialize the router.
+
+        Args:
+            providers (dict): Provider name -> fn(code, prompt) returning a review dict.
+                The function raises ProviderUnavailable when it is not configured and
+                any other exception when the call fails.
+            order (list): Default preference order of provider names.
+            max_workers (int): Threads shared by all routed calls.
+            streamers (dict, optional): Provider name -> fn(code, prompt) returning an
+                iterator of completion text pieces, with the same error contract.
+        """
+        self.providers = providers
+        self.streamers = streamers or {}
+        self.order = order
+        self.health = {name: ProviderHealth(name) for name in providers}
+        self.hedges = 0
+        self.failovers = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider",
+                                            initializer=_mark_pooled)
+        self._lock = threading.Lock()
+
+    def review(self, code: str, prompt: str = None, preferred: str = None,
+               options: Optional[Dict] = None) -> Dict:
+        """Get a review from the first provider that answers well.
+
+        Providers with an open breaker are skipped immediately. If the active
+        provider is slower than its p95 latency, a hedged duplicate goes to the
+        next provider and the first good answer wins; if it fails, the next
+        provider is tried straight away.
+
+        Args:
+            code (str): The code to review.
+            prompt (str, optional): Prebuilt prompt (e.g. pruned).
+            preferred (str, optional): Provider to try first.
+            options (dict, optional): Extra keyword arguments for the provider functions.
+
+        Returns:
+            dict: The review, with 'provider' and 'hedged' set.
+
+        Raises:
+            ProviderUnavailable: If every provider is down or unconfigured.
+        """
+        order = self._ordered(preferred)
+        position = 0
+        pending = {}
+        errors = []
+        hedged = False
+        hedge_considered = False
+        active = None  # (provider name, start time) of the latest launched call
+
+        def launch() -> bool:
+            """Start the next provider whose breaker allows a request."""
+            nonlocal position, active
+            while position < len(order):
+                name = order[position]
+                position += 1
+                if self.health[name].allow_request():
+                    active = (name, time.monotonic())
+                    pending[self._executor.submit(self._call, name, code, prompt, options or {})] = name
+                    return True
+            return False
+
+        if not launch():
+            raise ProviderUnavailable("All AI providers are unavailable (circuit breakers open)")
+
+        while pending:
+            timeout = None
+            if not hedge_considered and position < len(order):
+                hedge_after = self._hedge_after(active[0])
+                timeout = max(0.0, hedge_after - (time.monotonic() - active[1]))
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedge_considered = True
+                slow = active[0]
+                if launch():
+                    hedged = True
+                    with self._lock:
+                        self.hedges += 1
+                    logger.info(f"{slow} slower than its p95 latency; hedging to {active[0]}")
+                continue
+
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    review = future.result()
+                except ProviderUnavailable as e:
+                    errors.append(f"{name}: {e}")
+                    continue
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    with self._lock:
+                        self.failovers += 1
+                    logger.warning(f"AI provider {name} failed: {e}")
+                    continue
+                return dict(review, provider=name, hedged=hedged)
+
+            if not pending:
+                launch()
+
+        raise ProviderUnavailable("; ".join(errors) or "No AI provider answered")
+
+    def stream(self, code: str, prompt: str = None, preferred: str = None) -> Iterator[Tuple[str, str]]:
+        """Stream a review from the first provider that starts answering.
+
+        Failover only happens before the first piece arrives; once text has been
+        passed on, a failure is raised to the caller. Streams are not hedged.
+
+        Args:
+            code (str): The code to review.
+            prompt (str, optional): Prebuilt prompt (e.g. pruned).
+            preferred (str, optional): Provider to try first.
+
+        Yields:
+            tuple: (provider name, text piece).
+
+        Raises:
+            ProviderUnavailable: If no provider could start a stream.
+        """
+        errors = []
+        for name in self._ordered(preferred):
+            health = self.health[name]
+            if name not in self.streamers or not health.allow_request():
+                continue
+
+            start = time.monotonic()
+            started = False
+            try:
+                for piece in self.streamers[name](code, prompt):
+                    started = True
+                    yield name, piece
+            except ProviderUnavailable as e:
+                health.release_probe()
+                if started:
+                    raise
+                errors.append(f"{name}: {e}")
+                continue
+            except GeneratorExit:
+                # The consumer went away; no verdict on the provider
+                health.release_probe()
+                raise
+            except Exception as e:
+                health.record_failure(time.monotonic() - start)
+                if started:
+                    raise
+                errors.append(f"{name}: {e}")
+                with self._lock:
+                    self.failovers += 1
+                logger.warning(f"AI provider {name} failed to stream: {e}")
+                continue
+
+            health.record_success(time.monotonic() - start)
+            return
+
+        raise ProviderUnavailable("; ".join(errors) or "All AI providers are unavailable (circuit breakers open)")
+
+    def stats(self) -> Dict:
+        """Per-provider health plus hedge/failover counters."""
+        return {
+            'providers': {name: health.stats() for name, health in self.health.items()},
+            'hedges': self.hedges,
+            'failovers': self.failovers,
+        }
+
+    def _ordered(self, preferred: str = None) -> List[str]:
+        """Provider names to try, in order.
+
+        The preferred provider goes first, then the configured order. Without a
+        preference ("auto"), providers are ranked by breaker state (closed, then
+        half-open, then open) and then by their rolling p50 and p95 latency;
+        providers without enough samples yet follow those with known latency,
+        and ties keep the configured order.
+        """
+        if preferred in self.providers:
+            return [preferred] + [name for name in self.order if name != preferred]
+
+        def rank(name: str) -> Tuple:
+            health = self.health[name]
+            p50, p95 = health.latency_percentile(50), health.latency_percentile(95)
+            return (BREAKER_RANK.get(health.state, len(BREAKER_RANK)),
+                    p50 if p50 is not None else float('inf'),
+                    p95 if p95 is not None else float('inf'))
+
+        return sorted(self.order, key=rank)
+
+    def _hedge_after(self, name: str) -> float:
+        """Seconds to wait for a provider before sending a hedged request."""
+        p95 = self.health[name].latency_percentile(95)
+        return p95 if p95 is not None else DEFAULT_HEDGE_AFTER_SECONDS
+
+    def _call(self, name: str, code: str, prompt: str, options: Dict) -> Dict:
+        """Call one provider and record the outcome in its health stats."""
+        health = self.health[name]
+        start = time.monotonic()
+        try:
+            review = self.providers[name](code, prompt, **options)
+        except ProviderUnavailable:
+            # Not configured: not a health signal
+            health.release_probe()
+            raise
+        except Exception:
+            health.record_failure(time.monotonic() - start)
+            raise
+        health.record_success(time.monotonic() - start)
+        return review
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from src.analyzer.provider_router import ProviderUnavailable, queue_wait_limit
+
+logger = logging.getLogger(__name__)
+
+# Default (requests/min, tokens/min) per provider; None means unlimited.
+# Override with AI_RATE_LIMIT_<PROVIDER>_RPM / AI_RATE_LIMIT_<PROVIDER>_TPM.
+DEFAULT_RATE_LIMITS = {
+    'gemini': (15, 250000),
+    'openai': (500, 10000),
+    'claude': (50, 20000),
+    'ollama': (None, None),
+}
+# Longest a request queues for quota before giving up on the provider
+DEFAULT_MAX_WAIT_SECONDS = 30
+
+
+class RateLimitExceeded(ProviderUnavailable):
+    """Raised when a request would have to queue longer than the maximum wait."""
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to one minute's worth of capacity."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        """Add the tokens accrued since the last update."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (the bucket may be in debt from reservations)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class ProviderRateLimiter:
+    """Requests/min and tokens/min limits for one provider, with a bounded FIFO queue.
+
+    Quota is reserved when a request is admitted, so the buckets can go into
+    debt; later arrivals see the debt and queue behind earlier ones.
+    """
+
+    def __init__(self, provider: str, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_wait: float = DEFAULT_MAX_WAIT_SECONDS):
+        """Initialize full buckets.
+
+        Args:
+            provider (str): Provider name, for logs and metrics.
+            requests_per_minute (float, optional): Request limit, None for unlimited.
+            tokens_per_minute (float, optional): Token limit, None for unlimited.
+            max_wait (float): Seconds a request may queue before RateLimitExceeded.
+        """
+        self.provider = provider
+        self.max_wait = max_wait
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.longest_wait = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Reserve quota for one request, sleeping until it is available.
+
+        On a provider router's executor thread the wait is capped at
+        POOLED_MAX_WAIT_SECONDS, so the router fails over instead of a
+        throttled provider holding pool threads.
+
+        Args:
+            tokens (int): Estimated prompt plus completion tokens.
+
+        Returns:
+            float: Seconds spent queueing.
+
+        Raises:
+            RateLimitExceeded: If the quota would not be available within max_wait.
+        """
+        max_wait = queue_wait_limit(self.max_wait)
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(amount))
+
+            if wait > max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(
+                    f"{self.provider} rate limit: quota free in {wait:.1f}s (max wait {max_wait}s)"
+                )
+
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket:
+                    bucket.level -= min(amount, bucket.capacity)
+            self.admitted += 1
+            self.total_wait += wait
+            self.longest_wait = max(self.longest_wait, wait)
+            if wait:
+                self.queued += 1
+
+        if wait:
+            logger.info(f"{self.provider} rate limit: queued for {wait:.2f}s")
+            time.sleep(wait)
+            with self._lock:
+                self.queued -= 1
+        return wait
+
+    def stats(self) -> Dict:
+        """Remaining budget and queue wait metrics."""
+        with self._lock:
+            now = time.monotonic()
+            remaining = {}
+            for key, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+                if bucket:
+                    bucket.refill(now)
+                    remaining[key] = int(bucket.level)
+                else:
+                    remaining[key] = None
+            return {
+                'requests_per_minute': int(self.requests.capacity) if self.requests else None,
+                'tokens_per_minute': int(self.tokens.capacity) if self.tokens else None,
+                'remaining_requests': remaining['requests'],
+                'remaining_tokens': remaining['tokens'],
+                'queued': self.queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_wait_seconds': round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+                'max_wait_seconds': round(self.longest_wait, 3),
+            }
+
+
+# Singleton instances, one per provider
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Get the process-wide limiter for a provider, configured from the environment.
+
+    Environment:
+        AI_RATE_LIMIT_<PROVIDER>_RPM, AI_RATE_LIMIT_<PROVIDER>_TPM: Limits
+            ("0" disables that limit).
+        AI_RATE_LIMIT_MAX_WAIT_SECONDS: Longest a request queues for quota (routed calls
+            on the provider executor wait at most POOLED_MAX_WAIT_SECONDS, then fail over).
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            default_rpm, default_tpm = DEFAULT_RATE_LIMITS.get(provider, (None, None))
+            prefix = f"AI_RATE_LIMIT_{provider.upper()}"
+            _limiters[provider] = ProviderRateLimiter(
+                provider,
+                requests_per_minute=float(os.getenv(f"{prefix}_RPM", default_rpm or 0)) or None,
+                tokens_per_minute=float(os.getenv(f"{prefix}_TPM", default_tpm or 0)) or None,
+                max_wait=float(os.getenv('AI_RATE_LIMIT_MAX_WAIT_SECONDS', DEFAULT_MAX_WAIT_SECONDS))
+            )
+        return _limiters[provider]
+
+
+def rate_limit_stats() -> Dict:
+    """Metrics of every limiter created so far."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
@@ -26,6 +26,19 @@ def generate_report(analysis_results: dict, output_file: str):
     report_content.append(f"- **Lines of Code**: {quality_metrics.get('line_count', 'N/A')}")
     report_content.append(f"- **McCabe Complexity**: {quality_metrics.get('mccabe_complexity', 'N/A')}")
 
+    # Add Clone Detection Results
+    clone_detection = analysis_results.get("clone_detection")
+    if clone_detection:
+        report_content.append("## Duplicated Code")
+        report_content.append(f"- **Functions Compared**: {clone_detection.get('functions_compared', 0)}")
+        report_content.append(f"- **Near-Duplicate Pairs** (similarity >= {clone_detection.get('threshold')}): "
+                              f"{clone_detection.get('clone_pairs', 0)}")
+        for pair in clone_detection.get('clones', []):
+            a, b = pair['a'], pair['b']
+            report_content.append(f"  * {a['path']}::{a['qualname']} (lines {a['start_line']}-{a['end_line']}) ~ "
+                                  f"{b['path']}::{b['qualname']} (lines {b['start_line']}-{b['end_line']}): "
+                                  f"{pair['similarity']}")
+
     # Add AI Review Results
     ai_review = analysis_results.get("ai_review", {})
     report_content.append("## AI Review")
@@ -37,6 +50,27 @@ def generate_report(analysis_results: dict, output_file: str):
     report_content.append(f"- **Severity**: {ai_review.get('severity', 'N/A')}")
     report_content.append(f"- **Model Used**: {ai_review.get('model_used', 'N/A')}")
 
+    # Add Review Schedule (which units got an AI review under the budget)
+    review_schedule = analysis_results.get("review_schedule")
+    if review_schedule:
+        report_content.append("## AI Review Schedule")
+        budget = review_schedule.get('budget', {})
+        report_content.append(f"- **Token Budget**: {budget.get('token_budget') or 'unlimited'} "
+                              f"({budget.get('tokens_used', 0)} used)")
+        report_content.append(f"- **Time Budget**: {budget.get('time_budget') or 'unlimited'} "
+                              f"({budget.get('seconds_estimated', 0)}s estimated)")
+        report_content.append(f"- **Reviewed Units**: {len(review_schedule.get('reviewed', []))}")
+        for unit in review_schedule.get('reviewed', []):
+            unit_review = unit.get('ai_review', {})
+            report_content.append(f"  * {unit['path']}::{unit['qualname']} "
+                                  f"(lines {unit['start_line']}-{unit['end_line']}, score {unit['score']}): "
+                                  f"{unit_review.get('summary', 'No summary')}")
+        report_content.append(f"- **Skipped Units (static analysis only)**: {len(review_schedule.get('skipped', []))}")
+        for unit in review_schedule.get('skipped', []):
+            report_content.append(f"  * {unit['path']}::{unit['qualname']} "
+                                  f"(lines {unit['start_line']}-{unit['end_line']}, score {unit['score']}): "
+                                  f"{unit.get('reason', 'skipped')}")
+
     # Add Raw JSON for debugging/completeness
     report_content.append("## Raw Analysis Data (JSON)")
     report_content.append("```json")
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from src.utils.constants import AI_CACHE_FILE, CACHE_DIR
+from src.utils.tokens import normalized_code_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class ResponseCache:
+    """Disk-backed (SQLite) cache of raw and parsed AI provider responses."""
+
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ignore_formatting: bool = False):
+        """Open (or create) the cache database.
+
+        Args:
+            path (str): SQLite database file.
+            ttl_seconds (float): How long an entry stays valid.
+            max_entries (int): Least recently used entries beyond this are evicted.
+            ignore_formatting (bool): Key on the token stream so whitespace and
+                comment changes still hit.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.ignore_formatting = ignore_formatting
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT,
+                raw TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def make_key(self, provider: str, model: str, prompt_version: str, content: str) -> str:
+        """Build the cache key for a request.
+
+        Args:
+            provider (str): Provider name (gemini, openai, claude).
+            model (str): The resolved model name.
+            prompt_version (str): Version of the prompt template.
+            content (str): The code (or custom prompt) being reviewed.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        content_hash = normalized_code_hash(content, ignore_formatting=self.ignore_formatting)
+        raw_key = f"{provider}|{model}|{prompt_version}|{int(self.ignore_formatting)}|{content_hash}"
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up an entry; returns {'raw': str, 'parsed': dict} or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw, parsed, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return {'raw': row[0], 'parsed': json.loads(row[1])}
+
+    def put(self, key: str, provider: str, model: str, raw: str, parsed: Dict):
+        """Store a response and evict the least recently used entries over the size bound."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, raw, json.dumps(parsed), now, now + self.ttl_seconds, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                self.evictions += cursor.rowcount
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process and the current entry count."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'evictions': self.evictions,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries,
+        }
+
+
+# Singleton instance
+_cache = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the process-wide cache configured from the environment, or None if disabled.
+
+    Environment:
+        AI_CACHE_ENABLED: "0" disables caching (enabled by default; always off
+            while AI_CASSETTE_MODE records or replays).
+        AI_CACHE_PATH: SQLite file (default .cache/ai_responses.sqlite3).
+        AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES: Expiry and size bound.
+        AI_CACHE_IGNORE_FORMATTING: "1" makes keys whitespace/comment-insensitive.
+    """
+    global _cache, _cache_initialized
+    with _cache_lock:
+        if not _cache_initialized:
+            _cache_initialized = True
+            if os.getenv('AI_CASSETTE_MODE', 'off') != 'off':
+                # Cache hits would go unrecorded, and make replayed runs depend on earlier ones
+                logger.info("AI response cache disabled while recording or replaying provider cassettes")
+            elif os.getenv('AI_CACHE_ENABLED', '1') != '0':
+                path = os.getenv('AI_CACHE_PATH', os.path.join(os.getcwd(), CACHE_DIR, AI_CACHE_FILE))
+                try:
+                    _cache = ResponseCache(
+                        path,
+                        ttl_seconds=float(os.getenv('AI_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+                        max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                        ignore_formatting=os.getenv('AI_CACHE_IGNORE_FORMATTING', '0') == '1'
+                    )
+                    logger.info(f"AI response cache enabled at {path}")
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"AI response cache disabled: {e}")
+    return _cache
@@ -0,0 +1,224 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.analyzer.prompt_builder import REVIEW_FORMAT_INSTRUCTIONS
+from src.analyzer.stream_parser import StreamingReviewParser
+from src.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Prompt tokens of snippets packed into one request
+DEFAULT_BATCH_TOKENS = 3000
+# How long the first snippet of a batch waits for others to join
+DEFAULT_LINGER_SECONDS = 0.05
+MAX_BATCH_SNIPPETS = 10
+# Snippets larger than this (about 30 lines) are reviewed on their own
+MAX_BATCHED_SNIPPET_TOKENS = 600
+# Completion budget per snippet in a batched request
+COMPLETION_TOKENS_PER_SNIPPET = 300
+
+BATCH_PROMPT_TEMPLATE = """Please review each of the {count} Python snippets below independently and provide for each:
+1. A brief summary of what the code does
+2. 3-5 specific improvement suggestions (be concise)
+3. Any potential bugs or issues
+4. Code quality rating (1-10)
+5. Overall recommendation
+
+Every snippet starts with a line "=== SNIPPET <id> ===". Start the review of each snippet
+with a line "=== REVIEW <id> ===" using the same id, followed by the review.
+
+""" + REVIEW_FORMAT_INSTRUCTIONS + """
+
+{snippets}"""
+
+SNIPPET_TEMPLATE = """=== SNIPPET {id} ===
+```python
+{code}
+```"""
+
+# Tolerates markdown emphasis or headings around the delimiter
+REVIEW_DELIMITER = re.compile(r'^[\s*#]*=+\s*REVIEW\s+([A-Za-z0-9_-]+)\s*=+[\s*]*$', re.MULTILINE)
+
+
+def snippet_ids(count: int) -> List[str]:
+    """Ids of the snippets in a batch, by position."""
+    return [f"S{i + 1}" for i in range(count)]
+
+
+def build_batch_prompt(snippets: List[str]) -> str:
+    """Pack several snippets into one review prompt.
+
+    Args:
+        snippets (list): Code strings; snippet i gets the id "S{i+1}".
+
+    Returns:
+        str: The batched prompt.
+    """
+    sections = [SNIPPET_TEMPLATE.format(id=snippet_id, code=code)
+                for snippet_id, code in zip(snippet_ids(len(snippets)), snippets)]
+    return BATCH_PROMPT_TEMPLATE.format(count=len(snippets), snippets="\n\n".join(sections))
+
+
+def parse_batch_response(text: str) -> Dict[str, Dict]:
+    """Split a batched response back into one structured review per snippet id.
+
+    Args:
+        text (str): Raw completion for a prompt from build_batch_prompt.
+
+    Returns:
+        dict: Snippet id -> review sections (ids missing from the response are absent).
+    """
+    matches = list(REVIEW_DELIMITER.finditer(text))
+    reviews = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        parser = StreamingReviewParser()
+        parser.feed(text[match.end():following.start() if following else len(text)])
+        parser.close()
+        reviews[match.group(1)] = parser.sections
+    return reviews
+
+
+def snippet_tokens(code: str) -> int:
+    """Prompt tokens a snippet adds to a batch."""
+    return estimate_tokens(SNIPPET_TEMPLATE.format(id="S00", code=code))
+
+
+class ReviewBatcher:
+    """Collects small review requests for a short linger window and sends them as one batched call."""
+
+    def __init__(self, review_batch: Callable[[List[str]], List[Optional[Dict]]],
+                 review_single: Callable[[str], Dict],
+                 token_budget: int = DEFAULT_BATCH_TOKENS,
+                 linger: float = DEFAULT_LINGER_SECONDS,
+                 max_snippets: int = MAX_BATCH_SNIPPETS,
+                 max_workers: int = 4):
+        """Initialize the batcher.
+
+        Args:
+            review_batch (callable): fn(snippets) returning one review per snippet,
+                None where the response left a snippet out.
+            review_single (callable): fn(code) reviewing one snippet; used for large
+                snippets, batches of one and snippets a batch failed to cover.
+            token_budget (int): Snippet prompt tokens per batch.
+            linger (float): Seconds to wait for more snippets after the first arrives.
+            max_snippets (int): Most snippets per batch.
+            max_workers (int): Batches in flight at once.
+        """
+        self.review_batch = review_batch
+        self.review_single = review_single
+        self.token_budget = token_budget
+        self.linger = linger
+        self.max_snippets = max_snippets
+        self.batches = 0
+        self.batched_snippets = 0
+        self.single_calls = 0
+        self.retried = 0
+        self._pending = []  # (code, tokens, future, arrival time)
+        self._pending_tokens = 0
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="review-batch")
+
+    def submit(self, code: str) -> Future:
+        """Queue a snippet for review.
+
+        Returns:
+            Future: Resolves to the snippet's review dict.
+        """
+        future = Future()
+        tokens = snippet_tokens(code)
+        if tokens > MAX_BATCHED_SNIPPET_TOKENS:
+            self._executor.submit(self._run_single, code, future)
+            return future
+
+        with self._cond:
+            self._pending.append((code, tokens, future, time.monotonic()))
+            self._pending_tokens += tokens
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="review-batcher", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+        return future
+
+    def review(self, code: str, timeout: Optional[float] = None) -> Dict:
+        """Review a snippet, sharing a provider call with concurrent snippets."""
+        return self.submit(code).result(timeout)
+
+    def stats(self) -> Dict:
+        """Batching counters."""
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'batched_snippets': self.batched_snippets,
+                'avg_batch_size': round(self.batched_snippets / self.batches, 2) if self.batches else 0.0,
+                'single_calls': self.single_calls,
+                'retried_individually': self.retried,
+                'pending': len(self._pending),
+            }
+
+    def _dispatch(self):
+        """Form batches when the linger window closes or a batch is full."""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][3] + self.linger
+                while not self._full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take()
+            self._executor.submit(self._run_batch, batch)
+
+    def _full(self) -> bool:
+        """Whether the pending snippets already fill a batch."""
+        return len(self._pending) >= self.max_snippets or self._pending_tokens >= self.token_budget
+
+    def _take(self) -> List:
+        """Remove the next batch from the queue (always at least one snippet)."""
+        batch, tokens = [], 0
+        while self._pending and len(batch) < self.max_snippets:
+            if batch and tokens + self._pending[0][1] > self.token_budget:
+                break
+            item = self._pending.pop(0)
+            batch.append(item)
+            tokens += item[1]
+        self._pending_tokens -= tokens
+        return batch
+
+    def _run_batch(self, batch: List):
+        """Review a batch with one call; snippets it does not cover are retried one by one."""
+        if len(batch) == 1:
+            self._run_single(batch[0][0], batch[0][2])
+            return
+
+        with self._cond:
+            self.batches += 1
+            self.batched_snippets += len(batch)
+        try:
+            reviews = self.review_batch([code for code, _, _, _ in batch])
+        except Exception as e:
+            logger.warning(f"Batched review of {len(batch)} snippets failed, reviewing individually: {e}")
+            reviews = [None] * len(batch)
+
+        for (code, _, future, _), review in zip(batch, reviews):
+            if review is not None:
+                future.set_result(review)
+            else:
+                with self._cond:
+                    self.retried += 1
+                self._run_single(code, future)
+
+    def _run_single(self, code: str, future: Future):
+        """Review one snippet on its own."""
+        with self._cond:
+            self.single_calls += 1
+        try:
+            future.set_result(self.review_single(code))
+        except Exception as e:
+            future.set_exception(e)
@@ -0,0 +1,211 @@
+import json
+import logging
+import math
+import os
+import subprocess
+from typing import Dict, List, Optional
+
+from radon.complexity import cc_visit
+
+from src.analyzer.ai_reviewer import review_code_with_ai
+from src.analyzer.code_units import extract_units, module_unit
+from src.analyzer.logic_analyzer import LogicAnalyzer
+from src.utils.constants import REPORT_DIR, REVIEW_STATE_FILE
+from src.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Fixed prompt preamble sent with every review request
+PROMPT_OVERHEAD_TOKENS = 150
+# Rough provider latency model used for time budgets
+SECONDS_PER_REQUEST = 2.0
+SECONDS_PER_1K_TOKENS = 1.5
+
+SCORE_WEIGHTS = {
+    'complexity': 1.0,
+    'critical': 5.0,
+    'major': 2.0,
+    'churn': 1.5,
+    'changed': 4.0,
+}
+
+
+class ReviewScheduler:
+    """Ranks code units and spends a token or time budget on the most valuable AI reviews."""
+
+    def __init__(self, token_budget: Optional[int] = None, time_budget: Optional[float] = None,
+                 state_path: Optional[str] = None, repo_root: Optional[str] = None):
+        """Initialize the scheduler.
+
+        Args:
+            token_budget (int, optional): Maximum prompt tokens to spend on AI reviews.
+            time_budget (float, optional): Maximum estimated seconds to spend on AI reviews.
+            state_path (str, optional): JSON file remembering what was reviewed last time.
+            repo_root (str, optional): Git checkout used to measure churn. Defaults to cwd.
+        """
+        self.token_budget = token_budget
+        self.time_budget = time_budget
+        self.state_path = state_path or os.path.join(os.getcwd(), REPORT_DIR, REVIEW_STATE_FILE)
+        self.repo_root = repo_root or os.getcwd()
+        self.review_state = self._load_state()
+
+    def rank(self, files: Dict[str, str]) -> List[Dict]:
+        """Score every function in the given files, highest priority first.
+
+        Args:
+            files (dict): Mapping of file path to source code.
+
+        Returns:
+            list: Candidate units with their score and estimated cost.
+        """
+        churn = self._git_churn(list(files))
+        candidates = []
+
+        for path, code in files.items():
+            units = extract_units(code) or [module_unit(code)]
+            complexity = self._unit_complexity(code)
+            logic_issues = LogicAnalyzer().analyze(code)
+
+            for unit in units:
+                issues = [i for i in logic_issues
+                          if unit['start_line'] <= i.get('line', 0) <= unit['end_line']]
+                key = f"{path}::{unit['qualname']}"
+                signals = {
+                    'complexity': complexity.get(unit['def_line'], 1),
+                    'critical': sum(1 for i in issues if i.get('severity') == 'Critical'),
+                    'major': sum(1 for i in issues if i.get('severity') == 'Major'),
+                    'churn': math.log1p(churn.get(os.path.abspath(path), 0)),
+                    'changed': int(self.review_state.get(key) != unit['hash']),
+                }
+                tokens = estimate_tokens(unit['source']) + PROMPT_OVERHEAD_TOKENS
+                candidates.append({
+                    'key': key,
+                    'path': path,
+                    'qualname': unit['qualname'],
+                    'start_line': unit['start_line'],
+                    'end_line': unit['end_line'],
+                    'hash': unit['hash'],
+                    'source': unit['source'],
+                    'signals': signals,
+                    'score': round(sum(SCORE_WEIGHTS[k] * v for k, v in signals.items()), 2),
+                    'estimated_tokens': tokens,
+                    'estimated_seconds': round(SECONDS_PER_REQUEST + tokens / 1000 * SECONDS_PER_1K_TOKENS, 2),
+                })
+
+        candidates.sort(key=lambda c: c['score'], reverse=True)
+        return candidates
+
+    def plan(self, files: Dict[str, str]) -> Dict:
+        """Split the ranked units into those that fit the budget and those that do not."""
+        selected, skipped = [], []
+        tokens_left = self.token_budget
+        seconds_left = self.time_budget
+
+        for candidate in self.rank(files):
+            fits_tokens = tokens_left is None or candidate['estimated_tokens'] <= tokens_left
+            fits_time = seconds_left is None or candidate['estimated_seconds'] <= seconds_left
+            if fits_tokens and fits_time:
+                selected.append(candidate)
+                if tokens_left is not None:
+                    tokens_left -= candidate['estimated_tokens']
+                if seconds_left is not None:
+                    seconds_left -= candidate['estimated_seconds']
+            else:
+                skipped.append(dict(candidate, reason='budget exhausted'))
+
+        return {'selected': selected, 'skipped': skipped}
+
+    def run(self, files: Dict[str, str], model_name: str) -> Dict:
+        """Review the top-ranked units with the AI provider; the rest keep static analysis only.
+
+        Args:
+            files (dict): Mapping of file path to source code.
+            model_name (str): The AI model passed to review_code_with_ai.
+
+        Returns:
+            dict: 'reviewed' and 'skipped' unit lists plus the budget that was used.
+        """
+        plan = self.plan(files)
+        reviewed = []
+
+        for candidate in plan['selected']:
+            logger.info(f"AI reviewing {candidate['key']} (score {candidate['score']})")
+            ai_review = review_code_with_ai(candidate['source'], model_name=model_name)
+            reviewed.append(dict(_summarize(candidate), ai_review=ai_review))
+            self.review_state[candidate['key']] = candidate['hash']
+
+        self._save_state()
+        logger.info(f"Review schedule: {len(reviewed)} reviewed, {len(plan['skipped'])} skipped")
+
+        return {
+            'reviewed': reviewed,
+            'skipped': [dict(_summarize(c), reason=c['reason']) for c in plan['skipped']],
+            'budget': {
+                'token_budget': self.token_budget,
+                'time_budget': self.time_budget,
+                'tokens_used': sum(c['estimated_tokens'] for c in plan['selected']),
+                'seconds_estimated': round(sum(c['estimated_seconds'] for c in plan['selected']), 2),
+            },
+        }
+
+    def _unit_complexity(self, code: str) -> Dict[int, int]:
+        """Map each function's def line to its radon cyclomatic complexity."""
+        complexity = {}
+        try:
+            for block in cc_visit(code):
+                for item in [block] + list(getattr(block, 'methods', [])):
+                    complexity[item.lineno] = item.complexity
+        except Exception as e:
+            logger.warning(f"Could not calculate unit complexity: {e}")
+        return complexity
+
+    def _git_churn(self, paths: List[str]) -> Dict[str, int]:
+        """Count the commits touching each file with a single git log call."""
+        try:
+            output = subprocess.run(
+                ['git', 'log', '--format=', '--name-only', '--', *paths],
+                cwd=self.repo_root, capture_output=True, text=True, timeout=30, check=True
+            ).stdout
+            top_level = subprocess.run(
+                ['git', 'rev-parse', '--show-toplevel'],
+                cwd=self.repo_root, capture_output=True, text=True, timeout=10, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.info(f"Git churn unavailable: {e}")
+            return {}
+
+        churn = {}
+        for line in output.splitlines():
+            if line.strip():
+                path = os.path.abspath(os.path.join(top_level, line.strip()))
+                churn[path] = churn.get(path, 0) + 1
+        return churn
+
+    def _load_state(self) -> Dict[str, str]:
+        """Load the unit hashes recorded at the last review."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """Persist the unit hashes so unchanged code is deprioritized next time."""
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(self.review_state, f, indent=2, sort_keys=True)
+        except OSError as e:
+            logger.warning(f"Could not save review state to {self.state_path}: {e}")
+
+
+def _summarize(candidate: Dict) -> Dict:
+    """Strip the source text from a candidate for reporting."""
+    return {
+        'path': candidate['path'],
+        'qualname': candidate['qualname'],
+        'start_line': candidate['start_line'],
+        'end_line': candidate['end_line'],
+        'score': candidate['score'],
+        'estimated_tokens': candidate['estimated_tokens'],
+    }
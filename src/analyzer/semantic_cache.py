@@ -0,0 +1,232 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from src.analyzer.model_loader import get_model_loader
+from src.analyzer.model_server import get_model_server_client
+from src.utils.constants import CACHE_DIR, SEMANTIC_INDEX_FILE
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity above which a previous review is reused
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+DEFAULT_MAX_ENTRIES = 10000
+# Recently embedded submissions kept so lookup() and add() embed only once
+RECENT_EMBEDDINGS = 256
+# The index is written to disk after this many additions (and at exit)
+SAVE_EVERY_ADDS = 50
+
+
+class SemanticCache:
+    """Reuses AI reviews of near-duplicate code, matched by embedding cosine similarity.
+
+    Embeddings are unit vectors in one preallocated float32 matrix, so a lookup
+    is a single matrix-vector product. The least recently used entry is
+    replaced once the index is full.
+    """
+
+    def __init__(self, embed: Callable,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None):
+        """Initialize the index, loading it from path when the file exists.
+
+        Args:
+            embed (callable): fn(code) returning a unit-length numpy embedding.
+            threshold (float): Minimum cosine similarity for a hit.
+            max_entries (int): Size bound of the index.
+            path (str, optional): .npz file the index is persisted to.
+        """
+        import numpy as np
+        self.embed_fn = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()
+        self._vectors = None  # (max_entries, dim) float32, first _size rows used
+        self._model_ids = np.zeros(max_entries, dtype=np.int32)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._reviews = []
+        self._models = {}  # model name -> id
+        self._size = 0
+        self._unsaved = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+        if path:
+            atexit.register(self.save)
+
+    def embed(self, code: str):
+        """Embedding of a submission, reusing recent results."""
+        import numpy as np
+        key = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        with self._lock:
+            vector = self._recent.get(key)
+            if vector is not None:
+                self._recent.move_to_end(key)
+                return vector
+        vector = np.asarray(self.embed_fn(code), dtype=np.float32)
+        with self._lock:
+            self._recent[key] = vector
+            if len(self._recent) > RECENT_EMBEDDINGS:
+                self._recent.popitem(last=False)
+        return vector
+
+    def lookup(self, code: str, model_name: str) -> Optional[Dict]:
+        """Return the review of the most similar earlier submission for the same model, if close enough.
+
+        Returns:
+            dict: The review with 'semantic_cache_hit' and 'similarity' set, or None.
+        """
+        import numpy as np
+        vector = self.embed(code)
+        with self._lock:
+            self.lookups += 1
+            model_id = self._models.get(model_name)
+            if model_id is None or self._size == 0:
+                return None
+            scores = self._vectors[:self._size] @ vector
+            scores[self._model_ids[:self._size] != model_id] = -1.0
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                return None
+            self.hits += 1
+            self._last_used[best] = time.time()
+            review = self._reviews[best]
+
+        logger.info(f"Semantic cache hit for {model_name} (similarity {similarity:.3f})")
+        return dict(review, semantic_cache_hit=True, similarity=round(similarity, 4))
+
+    def add(self, code: str, model_name: str, review: Dict):
+        """Store a review under the submission's embedding."""
+        import numpy as np
+        vector = self.embed(code)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            model_id = self._models.setdefault(model_name, len(self._models))
+
+            if self._size < self.max_entries:
+                row = self._size
+                self._size += 1
+                self._reviews.append(review)
+            else:
+                row = int(np.argmin(self._last_used[:self._size]))
+                self._reviews[row] = review
+            self._vectors[row] = vector
+            self._model_ids[row] = model_id
+            self._last_used[row] = time.time()
+            self._unsaved += 1
+            save_now = self.path and self._unsaved >= SAVE_EVERY_ADDS
+
+        if save_now:
+            self.save()
+
+    def save(self):
+        """Write the index to disk (embeddings as float16 to halve the file)."""
+        import numpy as np
+        if not self.path:
+            return
+        with self._lock:
+            if self._size == 0 or self._unsaved == 0:
+                return
+            data = {
+                'vectors': self._vectors[:self._size].astype(np.float16),
+                'model_ids': self._model_ids[:self._size],
+                'last_used': self._last_used[:self._size],
+                'models': np.array(json.dumps(self._models)),
+                'reviews': np.array(json.dumps(self._reviews)),
+            }
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **data)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict:
+        """Hit counters and index size."""
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_ratio': round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                'entries': self._size,
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'index_bytes': int(self._vectors.nbytes) if self._vectors is not None else 0,
+            }
+
+    def _load(self, path: str):
+        """Restore a saved index (entries beyond max_entries are dropped)."""
+        import numpy as np
+        try:
+            with np.load(path) as data:
+                size = min(len(data['vectors']), self.max_entries)
+                vectors = data['vectors'][:size].astype(np.float32)
+                self._vectors = np.zeros((self.max_entries, vectors.shape[1]), dtype=np.float32)
+                self._vectors[:size] = vectors
+                self._model_ids[:size] = data['model_ids'][:size]
+                self._last_used[:size] = data['last_used'][:size]
+                self._models = json.loads(str(data['models']))
+                self._reviews = json.loads(str(data['reviews']))[:size]
+                self._size = size
+            logger.info(f"Loaded {size} semantic cache entries from {path}")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load semantic cache {path}: {e}")
+
+
+# Singleton instance
+_semantic_cache = None
+_semantic_cache_initialized = False
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get the process-wide semantic cache configured from the environment, or None if disabled.
+
+    Environment:
+        AI_SEMANTIC_CACHE: "1" enables it (off by default; needs torch and the model).
+        AI_SEMANTIC_CACHE_MODEL: CodeBERT model (default: the server's model, see
+            get_model_loader; ignored when CODEBERT_SERVER_SOCKET points to a model server).
+        AI_SEMANTIC_CACHE_THRESHOLD: Minimum cosine similarity for a hit.
+        AI_SEMANTIC_CACHE_MAX_ENTRIES: Size bound of the index.
+        AI_SEMANTIC_CACHE_PATH: Index file (default .cache/semantic_index.npz).
+    """
+    global _semantic_cache, _semantic_cache_initialized
+    with _semantic_cache_lock:
+        if not _semantic_cache_initialized:
+            _semantic_cache_initialized = True
+            if os.getenv('AI_SEMANTIC_CACHE', '0') != '1':
+                return None
+            if os.getenv('AI_CASSETTE_MODE', 'off') != 'off':
+                logger.info("Semantic cache disabled while recording or replaying provider cassettes")
+                return None
+
+            model_dir = os.getenv('AI_SEMANTIC_CACHE_MODEL')
+            model_server = get_model_server_client()
+            if model_server is not None:
+                # The host's model server embeds; it serves its own model
+                embed = model_server.embed
+            else:
+                # Shares the server's load unless another model is configured; loads in the
+                # background, and until it is ready embedding raises ModelNotReady
+                codebert = get_model_loader(model_dir).start()
+                embed = lambda code: codebert.get().embed(code)
+
+            _semantic_cache = SemanticCache(
+                embed,
+                threshold=float(os.getenv('AI_SEMANTIC_CACHE_THRESHOLD', DEFAULT_SIMILARITY_THRESHOLD)),
+                max_entries=int(os.getenv('AI_SEMANTIC_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                path=os.getenv('AI_SEMANTIC_CACHE_PATH', os.path.join(os.getcwd(), CACHE_DIR, SEMANTIC_INDEX_FILE))
+            )
+            logger.info(f"Semantic cache enabled with {model_dir or 'the default CodeBERT model'}")
+    return _semantic_cache
@@ -0,0 +1,450 @@
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from src.utils.constants import CACHE_DIR, SIMILARITY_INDEX_FILE
+from src.utils.file_loader import load_code_from_directory
+
+logger = logging.getLogger(__name__)
+
+# Up to this many functions every search scans all of them; beyond it an IVF index is trained
+DEFAULT_EXACT_LIMIT = 20000
+# Inverted lists scanned per IVF search
+DEFAULT_N_PROBE = 8
+# Training points per IVF list (a sample of the index) and k-means iterations
+TRAIN_POINTS_PER_LIST = 32
+KMEANS_ITERATIONS = 8
+# The IVF index is retrained once the index has grown this much since training
+RETRAIN_GROWTH = 2.0
+# Cosine similarity at which two functions count as near-duplicates
+DEFAULT_DUPLICATE_THRESHOLD = 0.95
+
+
+class SimilarityIndex:
+    """Searches per-function CodeBERT embeddings by cosine similarity.
+
+    Embeddings are unit vectors in one float32 matrix; rows of removed
+    functions are reused. Up to exact_limit functions a search is a single
+    matrix-vector product over all of them. Larger indexes are partitioned
+    by spherical k-means into about sqrt(n) inverted lists (IVF) and a
+    search scans only the n_probe lists nearest to the query, trading a
+    little recall for time sublinear in the index size.
+
+    Functions are indexed per file: add_file() replaces everything a file
+    had before, so the index follows a repository as files change.
+    """
+
+    def __init__(self, exact_limit: int = DEFAULT_EXACT_LIMIT, n_probe: int = DEFAULT_N_PROBE,
+                 path: Optional[str] = None):
+        """Initialize the index, loading it from path when the file exists.
+
+        Args:
+            exact_limit (int): Largest index searched exhaustively.
+            n_probe (int): Inverted lists scanned per search once partitioned.
+            path (str, optional): .npz file the index is persisted to.
+        """
+        import numpy as np
+        self.exact_limit = exact_limit
+        self.n_probe = n_probe
+        self.path = path
+        self.searches = 0
+        self._lock = threading.Lock()
+        self._vectors = None  # (capacity, dim) float32, first _size rows used
+        self._entries = []    # per row: location dict, or None when free
+        self._alive = np.zeros(0, dtype=bool)
+        self._free = []
+        self._files = {}      # path -> {'hash': ..., 'rows': [...]}
+        self._size = 0
+        self._live = 0
+        self._unsaved = False
+        # IVF partitioning (None until the index outgrows exact_limit)
+        self._centroids = None
+        self._lists = []
+        self._list_of = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+        if path:
+            atexit.register(self.save)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def file_hash(self, path: str) -> Optional[str]:
+        """Content hash the file was indexed with, or None if it is not indexed."""
+        with self._lock:
+            entry = self._files.get(path)
+            return entry['hash'] if entry else None
+
+    def add_file(self, path: str, functions: List[Dict], file_hash: Optional[str] = None):
+        """Index the functions of a file, replacing what was indexed for it before.
+
+        Args:
+            path (str): File the functions come from.
+            functions (list): analyze_functions() results ('qualname', 'kind',
+                'start_line', 'end_line', 'embedding').
+            file_hash (str, optional): Content hash of the file, so unchanged
+                files can be skipped (see sync_directory).
+        """
+        import numpy as np
+        with self._lock:
+            self._remove_rows(path)
+            rows = []
+            for function in functions:
+                vector = np.asarray(function['embedding'], dtype=np.float32)
+                row = self._allocate(vector.shape[0])
+                self._vectors[row] = vector
+                self._alive[row] = True
+                self._entries[row] = {
+                    'path': path,
+                    'qualname': function['qualname'],
+                    'kind': function['kind'],
+                    'start_line': function['start_line'],
+                    'end_line': function['end_line'],
+                }
+                if self._centroids is not None:
+                    self._assign_rows([row])
+                rows.append(row)
+            self._files[path] = {'hash': file_hash, 'rows': rows}
+            self._live += len(rows)
+            self._unsaved = True
+            self._maybe_partition()
+
+    def remove_file(self, path: str) -> bool:
+        """Drop every function of a file; False if it was not indexed."""
+        with self._lock:
+            removed = self._remove_rows(path)
+            self._unsaved = self._unsaved or removed
+            return removed
+
+    def paths(self) -> List[str]:
+        with self._lock:
+            return list(self._files)
+
+    def vector(self, path: str, qualname: str):
+        """Stored embedding of a function (the first of that name in the file), or None."""
+        with self._lock:
+            for row in self._files.get(path, {}).get('rows', []):
+                if self._entries[row]['qualname'] == qualname:
+                    return self._vectors[row].copy()
+        return None
+
+    def search(self, vector, k: int = 10, min_similarity: float = -1.0,
+               exclude: Optional[Dict] = None) -> List[Dict]:
+        """Most similar functions to an embedding.
+
+        Args:
+            vector: Unit-length query embedding.
+            k (int): Maximum number of matches.
+            min_similarity (float): Matches below this cosine similarity are dropped.
+            exclude (dict, optional): Location ('path' and 'qualname') to leave
+                out, e.g. the function the query embedding came from.
+
+        Returns:
+            list: Location dicts with 'similarity', most similar first.
+        """
+        import numpy as np
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self.searches += 1
+            if self._live == 0:
+                return []
+            rows = self._candidates(query)
+            if rows is None:
+                rows = np.arange(self._size)
+                scores = np.where(self._alive[:self._size], self._vectors[:self._size] @ query, -np.inf)
+            elif len(rows) == 0:
+                return []
+            else:
+                scores = self._vectors[rows] @ query
+
+            # Room for the excluded function among the top k
+            top = min(k + (1 if exclude else 0), len(rows))
+            best = np.argpartition(-scores, top - 1)[:top] if top < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-scores[best], kind='stable')]
+            matches = []
+            for i in best:
+                similarity = float(scores[i])
+                if similarity == -np.inf or similarity < min_similarity:
+                    break
+                entry = self._entries[rows[i]]
+                if exclude and entry['path'] == exclude.get('path') and entry['qualname'] == exclude.get('qualname'):
+                    continue
+                matches.append(dict(entry, similarity=round(similarity, 4)))
+                if len(matches) == k:
+                    break
+            return matches
+
+    def duplicates(self, threshold: float = DEFAULT_DUPLICATE_THRESHOLD, k: int = 5) -> List[Dict]:
+        """Pairs of functions whose embeddings are at least threshold similar.
+
+        Each function is compared with its k nearest neighbours (within the
+        probed lists once partitioned), so this is sublinear per function.
+
+        Returns:
+            list: {'a', 'b', 'similarity'} dicts (a and b are locations), most similar first.
+        """
+        with self._lock:
+            rows = [row for row, entry in enumerate(self._entries) if entry is not None]
+            functions = [(self._entries[row], self._vectors[row].copy()) for row in rows]
+        pairs = {}
+        for own, vector in functions:
+            for match in self.search(vector, k=k + 1, min_similarity=threshold):
+                location = {key: match[key] for key in ('path', 'qualname', 'kind', 'start_line', 'end_line')}
+                if location == own:
+                    continue
+                a, b = sorted([own, location], key=lambda e: (e['path'], e['start_line'], e['qualname']))
+                key = (a['path'], a['start_line'], a['qualname'], b['path'], b['start_line'], b['qualname'])
+                pairs[key] = {'a': a, 'b': b, 'similarity': match['similarity']}
+        return sorted(pairs.values(), key=lambda pair: -pair['similarity'])
+
+    def save(self):
+        """Write the index to disk (embeddings as float16 to halve the file)."""
+        import numpy as np
+        if not self.path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            rows = [row for row, entry in enumerate(self._entries) if entry is not None]
+            data = {
+                'vectors': (self._vectors[rows] if rows else np.zeros((0, 0))).astype(np.float16),
+                'entries': np.array(json.dumps([self._entries[row] for row in rows])),
+                'files': np.array(json.dumps({path: entry['hash'] for path, entry in self._files.items()})),
+            }
+            self._unsaved = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **data)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict:
+        """Index size and search mode."""
+        with self._lock:
+            return {
+                'functions': self._live,
+                'files': len(self._files),
+                'searches': self.searches,
+                'search': 'ivf' if self._centroids is not None else 'exact',
+                'lists': len(self._lists),
+                'n_probe': self.n_probe,
+                'index_bytes': int(self._vectors[:self._size].nbytes) if self._vectors is not None else 0,
+            }
+
+    def _allocate(self, dim: int) -> int:
+        """A free row for a new function, growing the matrix when full."""
+        import numpy as np
+        if self._free:
+            return self._free.pop()
+        if self._vectors is None:
+            self._vectors = np.zeros((1024, dim), dtype=np.float32)
+            self._alive = np.zeros(1024, dtype=bool)
+            self._list_of = np.full(1024, -1, dtype=np.int32)
+        elif self._size == len(self._vectors):
+            # Double the capacity
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+            self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+            self._list_of = np.concatenate([self._list_of, np.full(len(self._list_of), -1, dtype=np.int32)])
+        self._entries.append(None)
+        self._size += 1
+        return self._size - 1
+
+    def _remove_rows(self, path: str) -> bool:
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return False
+        for row in entry['rows']:
+            self._entries[row] = None
+            self._alive[row] = False
+            if self._centroids is not None:
+                self._lists[self._list_of[row]].discard(row)
+            self._list_of[row] = -1
+            self._free.append(row)
+        self._live -= len(entry['rows'])
+        return True
+
+    def _candidates(self, query):
+        """Rows in the n_probe lists nearest to the query, or None to scan every row."""
+        import numpy as np
+        if self._centroids is None:
+            return None
+        nearest = np.argsort(-(self._centroids @ query))[:self.n_probe]
+        rows = [row for lst in nearest for row in self._lists[lst]]
+        return np.array(rows, dtype=np.int64)
+
+    def _maybe_partition(self):
+        """Train the IVF lists once the index outgrows exact search, and again as it keeps growing."""
+        if self._live <= self.exact_limit:
+            return
+        if self._centroids is not None and self._live < self._trained_size * RETRAIN_GROWTH:
+            return
+        self._partition()
+
+    def _partition(self):
+        """Spherical k-means over a sample of the live rows, then assign every row to its nearest centroid."""
+        import numpy as np
+        rows = np.array([row for row, entry in enumerate(self._entries) if entry is not None])
+        n_lists = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(rows, min(len(rows), n_lists * TRAIN_POINTS_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self._centroids = centroids.astype(np.float32)
+        self._lists = [set() for _ in range(n_lists)]
+        self._list_of[:] = -1
+        for start in range(0, len(rows), 4096):
+            self._assign_rows(rows[start:start + 4096])
+        self._trained_size = len(rows)
+        logger.info(f"Partitioned similarity index: {len(rows)} functions in {n_lists} lists")
+
+    def _assign_rows(self, rows):
+        import numpy as np
+        labels = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+        for row, label in zip(rows, labels):
+            self._list_of[row] = label
+            self._lists[label].add(int(row))
+
+    def _load(self, path: str):
+        """Restore a saved index."""
+        import numpy as np
+        try:
+            with np.load(path) as data:
+                vectors = data['vectors'].astype(np.float32)
+                entries = json.loads(str(data['entries']))
+                hashes = json.loads(str(data['files']))
+            for indexed_path, file_hash in hashes.items():
+                self._files[indexed_path] = {'hash': file_hash, 'rows': []}
+            for vector, entry in zip(vectors, entries):
+                row = self._allocate(vector.shape[0])
+                self._vectors[row] = vector
+                self._alive[row] = True
+                self._entries[row] = entry
+                self._files[entry['path']]['rows'].append(row)
+            self._live = len(entries)
+            self._maybe_partition()
+            logger.info(f"Loaded {self._live} indexed functions from {path}")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load similarity index {path}: {e}")
+
+
+def sync_directory(index: SimilarityIndex, directory: str, analyze_functions: Callable) -> Dict:
+    """Bring the index up to date with the Python files under a directory.
+
+    Only files whose content changed since they were indexed are embedded
+    again; files that no longer exist under the directory are removed.
+
+    Args:
+        index (SimilarityIndex): Index to update.
+        directory (str): Root of the files to index.
+        analyze_functions (callable): fn(code) returning per-function
+            embeddings (CodeBertAnalyzer.analyze_functions).
+
+    Returns:
+        dict: Counts of 'indexed', 'unchanged' and 'removed' files and of indexed 'functions'.
+    """
+    files = load_code_from_directory(directory)
+    counts = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+    for path, code in files.items():
+        file_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        if index.file_hash(path) == file_hash:
+            counts['unchanged'] += 1
+            continue
+        index.add_file(path, analyze_functions(code), file_hash=file_hash)
+        counts['indexed'] += 1
+
+    root = os.path.join(directory, '')
+    for path in index.paths():
+        if path.startswith(root) and path not in files:
+            index.remove_file(path)
+            counts['removed'] += 1
+    counts['functions'] = len(index)
+    return counts
+
+
+def analyze_functions_fn(model_name: Optional[str] = None) -> Callable:
+    """fn(code) embedding the functions of a module with a (shared) in-process CodeBERT."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+    from src.analyzer.model_loader import resolve_model_source
+    from src.utils.constants import CODEBERT_HUB_ID
+
+    analyzer = CodeBertAnalyzer(resolve_model_source(model_name or os.getenv('CODEBERT_MODEL', CODEBERT_HUB_ID)))
+    return lambda code: analyzer.analyze_functions(code, include_classes=False)
+
+
+def default_index_path() -> str:
+    return os.getenv('SIMILARITY_INDEX_PATH', os.path.join(os.getcwd(), CACHE_DIR, SIMILARITY_INDEX_FILE))
+
+
+# Singleton instance
+_similarity_index = None
+_similarity_index_mtime = None
+_similarity_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Get the process-wide similarity index, loaded from disk when it was built before.
+
+    The index is loaded again when its file changes, so a running server picks
+    up a rebuild by `python -m src.analyzer.similarity_index` without a restart.
+
+    Environment:
+        SIMILARITY_INDEX_PATH: Index file (default .cache/similarity_index.npz),
+            built with `python -m src.analyzer.similarity_index <directory>`.
+        SIMILARITY_EXACT_LIMIT: Largest index searched exhaustively.
+        SIMILARITY_N_PROBE: Inverted lists scanned per search beyond that.
+    """
+    global _similarity_index, _similarity_index_mtime
+    path = default_index_path()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _similarity_index_lock:
+        # An index with unsaved changes of its own is kept (saving it would undo the rebuild)
+        stale = _similarity_index is not None and mtime != _similarity_index_mtime and not _similarity_index._unsaved
+        if _similarity_index is None or stale:
+            if stale:
+                logger.info(f"Similarity index {path} changed on disk, reloading")
+                atexit.unregister(_similarity_index.save)
+            _similarity_index = SimilarityIndex(
+                exact_limit=int(os.getenv('SIMILARITY_EXACT_LIMIT', DEFAULT_EXACT_LIMIT)),
+                n_probe=int(os.getenv('SIMILARITY_N_PROBE', DEFAULT_N_PROBE)),
+                path=path
+            )
+            _similarity_index_mtime = mtime
+    return _similarity_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the functions of a repository by CodeBERT embedding.")
+    parser.add_argument('directory', help="Directory of Python files to index (re-run to update)")
+    parser.add_argument('--index', default=None, help="Index file (default: SIMILARITY_INDEX_PATH, else .cache/)")
+    parser.add_argument('--model', help="CodeBERT model (default: CODEBERT_MODEL, else models/my-codebert)")
+    parser.add_argument('--duplicates', type=float, nargs='?', const=DEFAULT_DUPLICATE_THRESHOLD,
+                        help="Also list near-duplicate function pairs at this similarity (default 0.95)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    index = SimilarityIndex(path=args.index or default_index_path())
+    counts = sync_directory(index, os.path.abspath(args.directory), analyze_functions_fn(args.model))
+    index.save()
+    print(json.dumps(counts))
+    if args.duplicates is not None:
+        for pair in index.duplicates(threshold=args.duplicates):
+            a, b = pair['a'], pair['b']
+            print(f"{pair['similarity']:.3f}  {a['path']}:{a['start_line']} {a['qualname']}"
+                  f"  ~  {b['path']}:{b['start_line']} {b['qualname']}")
+
+
+if __name__ == '__main__':
+    main()
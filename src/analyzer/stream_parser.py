@@ -0,0 +1,71 @@
+from typing import Dict, List
+
+# Line prefix of each single-line section and the event it emits
+SECTION_PREFIXES = {
+    'SUMMARY:': 'summary',
+    'ISSUES:': 'issues',
+    'QUALITY_RATING:': 'quality_rating',
+    'RECOMMENDATION:': 'recommendation',
+}
+
+
+class StreamingReviewParser:
+    """Parses a review completion as it streams in, emitting each section as soon as its line is complete.
+
+    The final sections are the same as parsing the whole completion at once.
+    """
+
+    def __init__(self):
+        """Initialize empty sections."""
+        self.sections = {
+            'summary': '',
+            'suggestions': [],
+            'issues': '',
+            'quality_rating': 'N/A',
+            'recommendation': '',
+        }
+        self._buffer = ''
+        self._current_section = None
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume the next piece of the completion.
+
+        Args:
+            text (str): Newly received text, split anywhere.
+
+        Returns:
+            list: Events ({'event': name, 'data': value}) completed by this piece,
+                e.g. 'summary', 'suggestion' (one per bullet) or 'issues'.
+        """
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        events = []
+        for line in lines:
+            events.extend(self._parse_line(line))
+        return events
+
+    def close(self) -> List[Dict]:
+        """Parse whatever is left after the last newline."""
+        line, self._buffer = self._buffer, ''
+        return self._parse_line(line)
+
+    def _parse_line(self, line: str) -> List[Dict]:
+        """Update the sections from one complete line."""
+        line = line.strip()
+
+        if line.startswith('SUGGESTIONS:'):
+            self._current_section = 'suggestions'
+            return []
+
+        for prefix, section in SECTION_PREFIXES.items():
+            if line.startswith(prefix):
+                if section == 'issues':
+                    self._current_section = 'issues'
+                self.sections[section] = line.replace(prefix, '').strip()
+                return [{'event': section, 'data': self.sections[section]}]
+
+        if (line.startswith('- ') or line.startswith('• ')) and self._current_section == 'suggestions':
+            suggestion = line[2:].strip()
+            self.sections['suggestions'].append(suggestion)
+            return [{'event': 'suggestion', 'data': suggestion}]
+        return []
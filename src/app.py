@@ -1,7 +1,13 @@
 import os
 import sys
+import json
+import hashlib
 import logging
-from flask import Flask, render_template, request, jsonify
+import math
+import threading
+import time
+from typing import Optional
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 
 # Add the project root to the sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -9,9 +15,26 @@ sys.path.insert(0, project_root)
 
 from src.analyzer.syntax_checker import check_syntax
 from src.analyzer.quality_analyzer import analyze_quality
-from src.analyzer.ai_reviewer import review_code_with_ai
+from src.analyzer.ai_reviewer import (
+    review_code_with_ai,
+    stream_review_with_ai,
+    batching_stats,
+    get_provider_router
+)
 from src.analyzer.logic_analyzer import LogicAnalyzer
+from src.analyzer.model_loader import ModelNotReady, get_model_loader, readiness
+from src.analyzer.model_registry import get_model_registry
+from src.analyzer.model_server import get_model_server_client
 from src.analyzer.best_practices import BestPracticesChecker
+from src.analyzer.cassettes import get_cassette
+from src.analyzer.embedding_store import embedding_store_stats
+from src.analyzer.provider_registry import get_provider_registry
+from src.analyzer.rate_limiter import rate_limit_stats
+from src.analyzer.response_cache import get_response_cache
+from src.analyzer.semantic_cache import get_semantic_cache
+from src.analyzer.similarity_index import get_similarity_index
+from src.utils.constants import ANALYZE_TIMEOUT_SECONDS
+from src.utils.singleflight import SingleFlight
 
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
@@ -23,6 +46,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Resolve AI provider clients in the background so the first review doesn't pay for it.
+# Serverless instances turn this off (AI_WARM_PROVIDERS=0): the warm-up would compete
+# with the cold start for the CPU, and clients are resolved on first use anyway.
+if os.getenv('AI_WARM_PROVIDERS', '1') == '1':
+    threading.Thread(target=get_provider_registry().warm, name="provider-warmup", daemon=True).start()
+
+# Load CodeBERT in the background from the local models/ directory (offline); /readyz
+# reports progress and requests that need the model degrade until it is ready.
+# Workers using the host's model server (CODEBERT_SERVER_SOCKET) load nothing.
+if os.getenv('CODEBERT_PRELOAD', '1') == '1' and get_model_server_client() is None:
+    get_model_loader().start()
+
+analysis_flights = SingleFlight("analyze")
+
 
 @app.route('/')
 def index():
@@ -33,65 +70,254 @@ def index():
 def analyze_code():
     """Analyze code provided in request"""
     try:
-        data = request.get_json()
+        data = _json_object()
         code = data.get('code', '')
-        model = data.get('model', 'gemini-pro')
+        options = {
+            'model': data.get('model', 'gemini-pro'),
+            'prune': bool(data.get('prune', False)),
+            'changed_lines': data.get('changed_lines'),
+            'chunked': bool(data.get('chunked', False)),
+            'batch': bool(data.get('batch', False)),
+        }
+        timeout = _number(data.get('timeout', ANALYZE_TIMEOUT_SECONDS))
 
-        if not code.strip():
+        if not isinstance(code, str) or not code.strip():
             return jsonify({'error': 'No code provided'}), 400
+        if timeout is None or timeout <= 0:
+            return jsonify({'error': 'timeout must be a positive number of seconds'}), 400
+        if not _valid_changed_lines(options['changed_lines']):
+            return jsonify({'error': 'changed_lines must be a list of line numbers'}), 400
+        if options['chunked'] and (options['prune'] or options['changed_lines']):
+            return jsonify({'error': 'chunked cannot be combined with prune or changed_lines'}), 400
 
-        # 1. Syntax Check
-        syntax_valid = check_syntax(code)
-        syntax_error = None
-        if not syntax_valid:
-            try:
-                compile(code, '<string>', 'exec')
-            except SyntaxError as e:
-                syntax_error = str(e)
-
-        # 2. Quality Analysis
-        quality_metrics = analyze_quality(code)
-
-        # 3. Logic Analysis
-        logic_analyzer = LogicAnalyzer()
-        logic_issues = logic_analyzer.analyze(code)
-        
-        # Convert list to proper response format
-        logic_analysis = {
-            'total_issues': len(logic_issues),
-            'issues': logic_issues,
-            'severity_count': {
-                'Critical': sum(1 for i in logic_issues if i.get('severity') == 'Critical'),
-                'Major': sum(1 for i in logic_issues if i.get('severity') == 'Major'),
-                'Minor': sum(1 for i in logic_issues if i.get('severity') == 'Minor')
-            }
-        }
-
-        # 4. Best Practices Check
-        practices_checker = BestPracticesChecker()
-        best_practices = practices_checker.check(code)
-
-        # 5. AI Review
-        ai_review = review_code_with_ai(code, model_name=model)
-
-        # Prepare response
-        analysis_results = {
-            'syntax_valid': syntax_valid,
-            'syntax_error': syntax_error,
-            'quality_metrics': quality_metrics,
-            'logic_analysis': logic_analysis,
-            'best_practices': best_practices,
-            'ai_review': ai_review
-        }
+        # Identical concurrent submissions share a single analysis
+        request_key = hashlib.sha256(
+            (json.dumps(options, sort_keys=True) + "\0" + code).encode('utf-8')
+        ).hexdigest()
+        analysis_results = analysis_flights.do(
+            request_key, lambda: _run_analysis(code, **options), timeout=timeout
+        )
 
         logger.info("Code analysis completed successfully")
         return jsonify(analysis_results), 200
 
+    except TimeoutError as e:
+        logger.error(f"Code analysis timed out: {e}")
+        return jsonify({'error': 'Analysis timed out'}), 504
+
     except Exception as e:
         logger.error(f"Error during code analysis: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_code_stream():
+    """Analyze code, streaming results as newline-delimited JSON events.
+
+    The static analysis arrives first as an 'analysis' event, followed by the
+    AI review sections as the model writes them and a final 'done' event.
+    The static analysis goes through analysis_flights, so identical concurrent
+    submissions compute it once; the AI review is streamed per request.
+    """
+    data = _json_object()
+    code = data.get('code', '')
+    if not isinstance(code, str) or not code.strip():
+        return jsonify({'error': 'No code provided'}), 400
+
+    model = data.get('model', 'gemini-pro')
+    prune = bool(data.get('prune', False))
+    changed_lines = data.get('changed_lines')
+    if not _valid_changed_lines(changed_lines):
+        return jsonify({'error': 'changed_lines must be a list of line numbers'}), 400
+
+    static_key = ('static', hashlib.sha256(code.encode('utf-8')).hexdigest())
+
+    def generate():
+        try:
+            analysis = analysis_flights.do(static_key, lambda: _static_analysis(code),
+                                           timeout=ANALYZE_TIMEOUT_SECONDS)
+            yield json.dumps({'event': 'analysis', 'data': analysis}) + "\n"
+            for event in stream_review_with_ai(code, model_name=model, prune=prune,
+                                               changed_lines=changed_lines):
+                yield json.dumps(event) + "\n"
+            logger.info("Streamed code analysis completed successfully")
+        except Exception as e:
+            logger.error(f"Error during streamed code analysis: {e}")
+            yield json.dumps({'event': 'error', 'data': str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
+
+def _json_object() -> dict:
+    """The request's JSON object body, or {} when the body is missing, not JSON or not an object"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+def _number(value) -> Optional[float]:
+    """A finite number from a JSON value (a number or numeric string), or None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _valid_changed_lines(value) -> bool:
+    """Whether changed_lines is absent or a list of (1-based) line numbers"""
+    return value is None or (isinstance(value, list) and all(
+        isinstance(line, int) and not isinstance(line, bool) and line >= 1 for line in value))
+
+
+def _run_analysis(code: str, model: str, prune: bool, changed_lines: list, chunked: bool,
+                  batch: bool) -> dict:
+    """Run every analyzer on the code and build the response payload"""
+    analysis = _static_analysis(code)
+
+    # 5. AI Review
+    analysis['ai_review'] = review_code_with_ai(code, model_name=model, prune=prune,
+                                                changed_lines=changed_lines, chunked=chunked, batch=batch)
+    return analysis
+
+
+def _static_analysis(code: str) -> dict:
+    """Run the syntax, quality, logic and best-practice checks (everything but the AI review)"""
+    # 1. Syntax Check
+    syntax_valid = check_syntax(code)
+    syntax_error = None
+    if not syntax_valid:
+        try:
+            compile(code, '<string>', 'exec')
+        except SyntaxError as e:
+            syntax_error = str(e)
+
+    # 2. Quality Analysis
+    quality_metrics = analyze_quality(code)
+
+    # 3. Logic Analysis
+    logic_analyzer = LogicAnalyzer()
+    logic_issues = logic_analyzer.analyze(code)
+    
+    # Convert list to proper response format
+    logic_analysis = {
+        'total_issues': len(logic_issues),
+        'issues': logic_issues,
+        'severity_count': {
+            'Critical': sum(1 for i in logic_issues if i.get('severity') == 'Critical'),
+            'Major': sum(1 for i in logic_issues if i.get('severity') == 'Major'),
+            'Minor': sum(1 for i in logic_issues if i.get('severity') == 'Minor')
+        }
+    }
+
+    # 4. Best Practices Check
+    practices_checker = BestPracticesChecker()
+    best_practices = practices_checker.check(code)
+
+    # Prepare response
+    return {
+        'syntax_valid': syntax_valid,
+        'syntax_error': syntax_error,
+        'quality_metrics': quality_metrics,
+        'logic_analysis': logic_analysis,
+        'best_practices': best_practices
+    }
+
+
+@app.route('/api/providers', methods=['GET'])
+def provider_status():
+    """Report warm/cold state of the AI provider clients"""
+    return jsonify(get_provider_registry().status()), 200
+
+
+@app.route('/api/similar', methods=['POST'])
+def similar_code():
+    """Find indexed functions similar to submitted code, or to an indexed function.
+
+    The body holds either 'code' (embedded with CodeBERT) or the 'path' and
+    'qualname' of an indexed function, plus optional 'k' (default 10) and
+    'min_similarity'. The index is built with `python -m src.analyzer.similarity_index`.
+    """
+    data = _json_object()
+    k = _number(data.get('k', 10))
+    min_similarity = _number(data.get('min_similarity', 0.0))
+    if k is None or k < 1 or k != int(k):
+        return jsonify({'error': 'k must be an integer of at least 1'}), 400
+    if min_similarity is None:
+        return jsonify({'error': 'min_similarity must be a number'}), 400
+    k = int(k)
+    index = get_similarity_index()
+    start = time.perf_counter()
+
+    exclude = None
+    path, qualname = data.get('path'), data.get('qualname')
+    if path is not None or qualname is not None:
+        if not (isinstance(path, str) and path and isinstance(qualname, str) and qualname):
+            return jsonify({'error': 'path and qualname must both be non-empty strings'}), 400
+        vector = index.vector(path, qualname)
+        if vector is None:
+            return jsonify({'error': 'Function is not indexed'}), 404
+        exclude = {'path': path, 'qualname': qualname}
+    else:
+        code = data.get('code', '')
+        if not isinstance(code, str) or not code.strip():
+            return jsonify({'error': 'No code provided'}), 400
+        try:
+            vector = _embed_code(code)
+        except ModelNotReady as e:
+            return jsonify({'error': str(e), 'status': e.status}), 503
+        except Exception as e:
+            # Model server errors and model failures: JSON like the other endpoints
+            logger.error(f"Could not embed code for similarity search: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    embedded = time.perf_counter()
+    matches = index.search(vector, k=k, min_similarity=min_similarity, exclude=exclude)
+    return jsonify({
+        'matches': matches,
+        'index': index.stats(),
+        'embed_ms': round((embedded - start) * 1000, 2),
+        'search_ms': round((time.perf_counter() - embedded) * 1000, 2)
+    }), 200
+
+
+def _embed_code(code: str):
+    """CodeBERT embedding of code, from the host's model server or the in-process model"""
+    model_server = get_model_server_client()
+    if model_server is not None:
+        return model_server.embed(code)
+    return get_model_loader().get().embed(code)
+
+
+@app.route('/readyz', methods=['GET'])
+def ready():
+    """Readiness probe: 503 while models load in the background, 200 once ready (or degraded)"""
+    model_server = get_model_server_client()
+    status = model_server.readiness() if model_server else readiness()
+    return jsonify(status), 503 if status['status'] == 'loading' else 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Report cache and request metrics"""
+    cache = get_response_cache()
+    cassette = get_cassette()
+    semantic_cache = get_semantic_cache()
+    return jsonify({
+        'response_cache': cache.stats() if cache else {'enabled': False},
+        'analyze_requests': analysis_flights.stats(),
+        'provider_routing': get_provider_router().stats(),
+        'rate_limits': rate_limit_stats(),
+        'review_batching': batching_stats(),
+        'cassette': cassette.stats() if cassette else {'mode': 'off'},
+        'semantic_cache': semantic_cache.stats() if semantic_cache else {'enabled': False},
+        'models': get_model_registry().stats(),
+        'embedding_stores': embedding_store_stats()
+    }), 200
+
+
 if __name__ == '__main__':
     # Only run locally, not on Vercel
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -8,20 +8,26 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from src.utils.logger import setup_logging, logger
-from src.utils.file_loader import load_code_from_file
-from src.utils.constants import DEFAULT_MODEL, REPORT_DIR
+from src.utils.file_loader import load_code_from_file, load_code_from_directory
+from src.utils.constants import DEFAULT_MODEL, REPORT_DIR, DEFAULT_REVIEW_TOKEN_BUDGET, CACHE_DIR, CLONE_INDEX_FILE
 
 from src.analyzer.syntax_checker import check_syntax
 from src.analyzer.quality_analyzer import analyze_quality
 from src.analyzer.ai_reviewer import review_code_with_ai
+from src.analyzer.clone_detector import CloneDetector, DEFAULT_CLONE_THRESHOLD
 from src.analyzer.report_generator import generate_report
+from src.analyzer.review_scheduler import ReviewScheduler
+
+# Clone pairs listed in the console output (the report lists them all)
+MAX_LOGGED_CLONES = 10
+
 
 def main():
     parser = argparse.ArgumentParser(description="AI Code Analyst application.")
     parser.add_argument(
         "code_file",
         type=str,
-        help="Path to the Python code file to analyze."
+        help="Path to the Python code file (or directory of files) to analyze."
     )
     parser.add_argument(
         "--output_report",
@@ -35,8 +41,46 @@ def main():
         default=DEFAULT_MODEL,
         help=f"AI model to use for review (default: {DEFAULT_MODEL})."
     )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Send only the functions flagged by static analysis (with minimal context) to the AI model."
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Review large files as concurrent function/class chunks and merge the results."
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Only send the highest-priority functions to the AI model, up to this many prompt tokens. "
+             f"Directories default to {DEFAULT_REVIEW_TOKEN_BUDGET}."
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Only send the highest-priority functions to the AI model, up to this many estimated seconds."
+    )
+    parser.add_argument(
+        "--clone-threshold",
+        type=float,
+        default=DEFAULT_CLONE_THRESHOLD,
+        help="Similarity (0-1) from which two functions are reported as near-duplicates "
+             f"(default: {DEFAULT_CLONE_THRESHOLD}). Token signatures are kept in {CACHE_DIR}/ between scans."
+    )
 
     args = parser.parse_args()
+    if args.chunked and args.prune:
+        parser.error("--chunked cannot be combined with --prune")
+    # Directories and budgets review the scheduler's selection of functions, which prunes and
+    # chunks by itself: the single-file prompt options would be silently ignored
+    scheduled = os.path.isdir(args.code_file) or args.token_budget is not None or args.time_budget is not None
+    if scheduled and (args.prune or args.chunked):
+        parser.error("--prune and --chunked only apply to a single file reviewed without "
+                     "--token-budget/--time-budget")
 
     setup_logging()
     logger.info(f"Starting AI Code Analysis for {args.code_file}")
@@ -49,10 +93,14 @@ def main():
         "ai_review": {}
     }
 
-    code_content = None
+    code_files = {}
+    is_directory = os.path.isdir(args.code_file)
     try:
-        code_content = load_code_from_file(args.code_file)
-        logger.info("Code loaded successfully.")
+        if is_directory:
+            code_files = load_code_from_directory(args.code_file)
+        else:
+            code_files = {args.code_file: load_code_from_file(args.code_file)}
+        logger.info(f"Code loaded successfully ({len(code_files)} file(s)).")
     except (FileNotFoundError, IOError) as e:
         logger.error(f"Failed to load code file: {e}")
         sys.exit(1)
@@ -60,7 +108,7 @@ def main():
     # 1. Syntax Check
     logger.info("Performing syntax check...")
     try:
-        is_valid = check_syntax(code_content)
+        is_valid = all(check_syntax(code) for code in code_files.values())
         analysis_results["syntax_valid"] = is_valid
         if not is_valid:
             # The check_syntax function logs the error, no need to duplicate
@@ -75,22 +123,64 @@ def main():
     # 2. Quality Analysis
     logger.info("Performing code quality analysis...")
     try:
-        quality_metrics = analyze_quality(code_content)
+        file_metrics = {path: analyze_quality(code) for path, code in code_files.items()}
+        if len(file_metrics) == 1:
+            quality_metrics = next(iter(file_metrics.values()))
+        else:
+            quality_metrics = {
+                "line_count": sum(m["line_count"] for m in file_metrics.values()),
+                "mccabe_complexity": round(
+                    sum(m["mccabe_complexity"] for m in file_metrics.values()) / max(len(file_metrics), 1), 2
+                ),
+                "files": file_metrics
+            }
         analysis_results["quality_metrics"] = quality_metrics
         logger.info("Code quality analysis complete.")
     except Exception as e:
         logger.error(f"Error during code quality analysis: {e}")
 
-    # 3. AI Review
+    # 3. Clone Detection
+    logger.info("Detecting near-duplicate functions...")
+    try:
+        clone_detector = CloneDetector(threshold=args.clone_threshold,
+                                       path=os.path.join(os.getcwd(), CACHE_DIR, CLONE_INDEX_FILE))
+        clone_detector.update(code_files, root=args.code_file if is_directory else None)
+        clone_detection = clone_detector.report(code_files)
+        clone_detector.save()
+        analysis_results["clone_detection"] = clone_detection
+        logger.info(f"Clone detection complete: {clone_detection['clone_pairs']} near-duplicate function pair(s) "
+                    f"among {clone_detection['functions_compared']} functions.")
+        for pair in clone_detection['clones'][:MAX_LOGGED_CLONES]:
+            a, b = pair['a'], pair['b']
+            logger.info(f"  {pair['similarity']:.2f} {a['path']}:{a['start_line']} {a['qualname']} ~ "
+                        f"{b['path']}:{b['start_line']} {b['qualname']}")
+    except Exception as e:
+        logger.error(f"Error during clone detection: {e}")
+
+    # 4. AI Review
     logger.info(f"Performing AI code review using model: {args.model}...")
     try:
-        ai_review_results = review_code_with_ai(code_content, model_name=args.model)
-        analysis_results["ai_review"] = ai_review_results
+        if is_directory or args.token_budget is not None or args.time_budget is not None:
+            token_budget = args.token_budget
+            if token_budget is None and args.time_budget is None:
+                token_budget = DEFAULT_REVIEW_TOKEN_BUDGET
+            scheduler = ReviewScheduler(token_budget=token_budget, time_budget=args.time_budget)
+            review_schedule = scheduler.run(code_files, model_name=args.model)
+            analysis_results["review_schedule"] = review_schedule
+            analysis_results["ai_review"] = {
+                "summary": f"{len(review_schedule['reviewed'])} unit(s) reviewed by AI, "
+                           f"{len(review_schedule['skipped'])} skipped by the review budget.",
+                "model_used": args.model
+            }
+        else:
+            ai_review_results = review_code_with_ai(code_files[args.code_file], model_name=args.model,
+                                                   prune=args.prune, chunked=args.chunked)
+            analysis_results["ai_review"] = ai_review_results
         logger.info("AI code review complete.")
     except Exception as e:
         logger.error(f"Error during AI code review: {e}")
 
-    # 4. Generate Report
+    # 5. Generate Report
     logger.info("Generating analysis report...")
     if args.output_report:
         output_file_path = args.output_report
@@ -98,7 +188,7 @@ def main():
         # Default report path: reports/report_filename.md
         report_dir = os.path.join(os.getcwd(), REPORT_DIR)
         os.makedirs(report_dir, exist_ok=True)
-        filename_without_ext = os.path.splitext(os.path.basename(args.code_file))[0]
+        filename_without_ext = os.path.splitext(os.path.basename(os.path.normpath(args.code_file)))[0]
         output_file_path = os.path.join(report_dir, f"report_{filename_without_ext}.md")
 
     try:
@@ -38,8 +38,48 @@ function analyzeCode() {
   errorMessage.style.display = "none";
   analyzeBtn.disabled = true;
 
-  // Send request to backend
-  fetch("/api/analyze", {
+  // Partial AI review, filled in as sections stream in
+  const review = {
+    summary: "",
+    suggestions: [],
+    issues: "",
+    quality_rating: "N/A",
+    recommendation: "",
+  };
+  let analysisShown = false;
+
+  function handleEvent(event) {
+    switch (event.event) {
+      case "analysis":
+        analysisShown = true;
+        loadingSpinner.style.display = "none";
+        displayAnalysis(event.data);
+        displayReview({ ...review, summary: "Waiting for the AI review..." });
+        break;
+      case "provider":
+        review.model_used = event.data;
+        break;
+      case "suggestion":
+        review.suggestions.push(event.data);
+        displayReview(review);
+        break;
+      case "done":
+        displayReview(event.data);
+        break;
+      case "error":
+        if (!analysisShown) {
+          throw new Error(event.data);
+        }
+        console.warn("AI review stream error:", event.data);
+        break;
+      default:
+        review[event.event] = event.data;
+        displayReview(review);
+    }
+  }
+
+  // Send request to backend; results arrive as newline-delimited JSON events
+  fetch("/api/analyze/stream", {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -52,10 +92,7 @@ function analyzeCode() {
           throw new Error(data.error || "Analysis failed");
         });
       }
-      return response.json();
-    })
-    .then((data) => {
-      displayResults(data);
+      return readEvents(response, handleEvent);
     })
     .catch((error) => {
       showError(error.message);
@@ -66,7 +103,22 @@ function analyzeCode() {
     });
 }
 
-function displayResults(data) {
+async function readEvents(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)));
+  }
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
+function displayAnalysis(data) {
   results.style.display = "block";
   errorMessage.style.display = "none";
 
@@ -194,9 +246,10 @@ function displayResults(data) {
   practicesResult.innerHTML =
     practicesHtml || '<div class="metric">No practice issues detected</div>';
 
-  // Display AI Review
+}
+
+function displayReview(review) {
   const reviewResult = document.getElementById("reviewResult");
-  const review = data.ai_review;
   let suggestionsHtml = "";
   if (review.suggestions && review.suggestions.length > 0) {
     suggestionsHtml = `
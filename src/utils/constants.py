@@ -7,4 +7,18 @@ DATA_DIR = "data"
 SAMPLE_CODE_DIR = "data/sample_code"
 REPORT_DIR = "reports"
 LOG_FILE = "app.log"
-DEFAULT_MODEL = "gemini-pro"
\ No newline at end of file
+DEFAULT_MODEL = "gemini-pro"
+REVIEW_STATE_FILE = "review_state.json"
+DEFAULT_REVIEW_TOKEN_BUDGET = 8000
+DEFAULT_CHUNK_TOKENS = 2000
+CACHE_DIR = ".cache"
+AI_CACHE_FILE = "ai_responses.sqlite3"
+ANALYZE_TIMEOUT_SECONDS = 120
+CASSETTE_DIR = "cassettes"
+DEFAULT_CASSETTE_FILE = "providers.jsonl.gz"
+CODEBERT_MODEL_DIR = "models/my-codebert"
+SEMANTIC_INDEX_FILE = "semantic_index.npz"
+EMBEDDING_STORE_DIR = "embeddings"
+CODEBERT_HUB_ID = "microsoft/codebert-base"
+SIMILARITY_INDEX_FILE = "similarity_index.npz"
+CLONE_INDEX_FILE = "clone_signatures.npz"
@@ -8,4 +8,17 @@ def load_code_from_file(filepath: str) -> str:
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
     except Exception as e:
-        raise IOError(f"Error reading file {filepath}: {e}")
\ No newline at end of file
+        raise IOError(f"Error reading file {filepath}: {e}")
+
+def load_code_from_directory(dirpath: str) -> dict:
+    """Loads every Python file under a directory, keyed by file path."""
+    if not os.path.isdir(dirpath):
+        raise FileNotFoundError(f"Directory not found at: {dirpath}")
+    files = {}
+    for root, dirs, filenames in os.walk(dirpath):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('venv', '__pycache__')]
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(root, filename)
+                files[path] = load_code_from_file(path)
+    return files
@@ -3,14 +3,13 @@ import os
 
 from .constants import LOG_FILE, REPORT_DIR
 
-# Ensure the reports directory exists for logs
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', REPORT_DIR)
-os.makedirs(log_dir, exist_ok=True)
-
 log_file_path = os.path.join(log_dir, LOG_FILE)
 
 def setup_logging():
-    """Sets up basic logging configuration."""
+    """Sets up basic logging configuration (call once at program start)."""
+    # Ensure the reports directory exists for logs
+    os.makedirs(log_dir, exist_ok=True)
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -21,7 +20,4 @@ def setup_logging():
     )
     logging.info("Logging setup complete.")
 
-# Initialize logging when this module is imported
-setup_logging()
-
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
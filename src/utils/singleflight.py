@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight computation and the requests waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 1
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one shared computation."""
+
+    def __init__(self, name: str = "singleflight"):
+        """Initialize with no calls in flight.
+
+        Args:
+            name (str): Used for the worker thread names and log messages.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run fn once for all concurrent callers with the same key and return its result.
+
+        The computation runs on its own thread, so every caller (including the
+        one that started it) can give up at its own deadline while the
+        computation keeps going for the others.
+
+        Args:
+            key: Identifies equivalent requests (e.g. content hash plus options).
+            fn (callable): The computation to share.
+            timeout (float, optional): Seconds this caller is willing to wait.
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            TimeoutError: If the result is not ready within timeout.
+            Exception: Whatever fn raised, re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                logger.info(f"{self.name}: joined in-flight computation ({call.waiters} waiters)")
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                threading.Thread(target=self._run, args=(key, call, fn),
+                                 name=f"{self.name}-worker", daemon=True).start()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"{self.name}: result not ready within {timeout}s")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]):
+        """Execute the shared computation and release every waiter."""
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict:
+        """Counters for the metrics endpoint."""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'coalesced_waiters': self.coalesced,
+                'timeouts': self.timeouts,
+            }
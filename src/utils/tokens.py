@@ -0,0 +1,65 @@
+import hashlib
+import io
+import math
+import tokenize
+from typing import Iterator, Tuple
+
+# Rough average for English text and source code across the supported LLMs
+CHARS_PER_TOKEN = 4
+
+# Python tokens that carry no meaning for review or similarity purposes
+IGNORED_TOKEN_TYPES = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens in a piece of text.
+
+    Args:
+        text (str): The text (prompt or code) to measure.
+
+    Returns:
+        int: Approximate token count (about one token per 4 characters).
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def python_tokens(code: str) -> Iterator[Tuple[int, str, int]]:
+    """Yields the meaningful Python tokens of a code string.
+
+    Comments, blank lines and formatting are dropped; indentation is kept as
+    INDENT/DEDENT tokens so block structure still counts.
+
+    Args:
+        code (str): The Python code string to tokenize.
+
+    Yields:
+        tuple: (token type, token string, start line) for each token.
+
+    Raises:
+        tokenize.TokenError, SyntaxError: If the code cannot be tokenized.
+    """
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type not in IGNORED_TOKEN_TYPES:
+            yield token.type, token.string, token.start[0]
+
+
+def normalized_code_hash(code: str, ignore_formatting: bool = False) -> str:
+    """Hashes code, optionally ignoring whitespace and comments.
+
+    Args:
+        code (str): The code string to hash.
+        ignore_formatting (bool): Hash the token stream instead of the raw text,
+            so reformatting or editing comments keeps the same hash.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    if ignore_formatting:
+        try:
+            code = " ".join(f"{token_type}:{'' if token_type == tokenize.INDENT else string}"
+                            for token_type, string, _ in python_tokens(code))
+        except (tokenize.TokenError, SyntaxError):
+            code = " ".join(code.split())
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
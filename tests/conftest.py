@@ -0,0 +1,29 @@
+import pytest
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Tests that want a CodeBERT embedding store create one in tmp_path
+os.environ.setdefault('CODEBERT_EMBEDDING_CACHE', '0')
+# Tests load the models they need themselves
+os.environ.setdefault('CODEBERT_PRELOAD', '0')
+
+
+@pytest.fixture(scope="session")
+def tiny_codebert(tmp_path_factory):
+    """Directory of a tiny random RoBERTa using the repository's CodeBERT tokenizer.
+
+    No CodeBERT weights are shipped, so model tests run against this stand-in.
+    """
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    path = tmp_path_factory.mktemp("tiny-codebert")
+    tokenizer = transformers.AutoTokenizer.from_pretrained(os.path.join(project_root, "models", "my-codebert"))
+    config = transformers.RobertaConfig(vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2,
+                                        num_attention_heads=2, intermediate_size=64,
+                                        max_position_embeddings=514, pad_token_id=tokenizer.pad_token_id)
+    torch.manual_seed(0)
+    transformers.RobertaModel(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
@@ -0,0 +1,68 @@
+import pytest
+import os
+import sys
+import json
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src import app as app_module
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_stream_rejects_bad_bodies_and_shares_the_static_analysis(client, monkeypatch):
+    """A body that is not a JSON object is a 400; the static analysis of a stream goes through analysis_flights."""
+    monkeypatch.setattr(app_module, "stream_review_with_ai", lambda code, **options: iter([{'event': 'done'}]))
+
+    assert client.post('/api/analyze/stream', data="not json", content_type='text/plain').status_code == 400
+    assert client.post('/api/analyze/stream', json=[1, 2]).status_code == 400
+    assert client.post('/api/analyze', data="not json", content_type='text/plain').status_code == 400
+
+    executions = app_module.analysis_flights.executions
+    response = client.post('/api/analyze/stream', json={'code': "def f():\n    return 1\n"})
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [event['event'] for event in events] == ['analysis', 'done']
+    assert events[0]['data']['syntax_valid'] is True
+    assert app_module.analysis_flights.executions == executions + 1
+
+
+@pytest.mark.parametrize('timeout', [None, "soon", True, -1, 0, float('nan')])
+def test_analyze_rejects_invalid_timeouts(client, timeout):
+    """A timeout that is not a positive number is a 400, not a 500."""
+    response = client.post('/api/analyze', data=json.dumps({'code': "x = 1", 'timeout': timeout}),
+                           content_type='application/json')
+    assert response.status_code == 400 and 'timeout' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('body', [{'k': 0}, {'k': -3}, {'k': 2.5}, {'k': "many"}, {'k': None},
+                                  {'min_similarity': "high"}, {'min_similarity': None}, {'code': 123},
+                                  {'path': ["a.py"], 'qualname': "f"}, {'path': "a.py"}])
+def test_similar_rejects_invalid_search_parameters(client, body):
+    """k must be an integer >= 1, min_similarity a number and code, path and qualname strings, else 400."""
+    response = client.post('/api/similar', json=dict({'code': "def f():\n    return 1"}, **body))
+    assert response.status_code == 400 and 'error' in response.get_json()
+
+
+def test_similar_reports_embedding_failures_as_json(client, monkeypatch):
+    """A model server error while embedding is a JSON error, not Flask's HTML error page."""
+    from src.analyzer.model_server import ModelServerError
+
+    def failing_embed(code):
+        raise ModelServerError("tokenizer exploded")
+
+    monkeypatch.setattr(app_module, "_embed_code", failing_embed)
+    response = client.post('/api/similar', json={'code': "def f():\n    return 1"})
+    assert response.status_code == 500 and response.get_json() == {'error': "tokenizer exploded"}
+
+
+@pytest.mark.parametrize('endpoint', ['/api/analyze', '/api/analyze/stream'])
+@pytest.mark.parametrize('changed_lines', ["3", 3, [1, "2"], [1.5], [0], [True]])
+def test_analyze_rejects_invalid_changed_lines(client, endpoint, changed_lines):
+    """changed_lines must be a list of line numbers, else 400."""
+    response = client.post(endpoint, json={'code': "x = 1\ny = 2\n", 'changed_lines': changed_lines})
+    assert response.status_code == 400 and 'changed_lines' in response.get_json()['error']
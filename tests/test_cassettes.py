@@ -0,0 +1,59 @@
+import pytest
+import os
+import sys
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.cassettes import Cassette, CassetteMiss
+
+
+def _slow_answer():
+    time.sleep(0.1)
+    return "SUMMARY: recorded"
+
+
+def _slow_stream():
+    for piece in ("SUMMARY: ", "streamed"):
+        time.sleep(0.05)
+        yield piece
+
+
+def _failing():
+    raise RuntimeError("503 from provider")
+
+
+def test_record_then_replay_with_timing(tmp_path):
+    """Responses, stream pieces and errors come back with their recorded timing."""
+    path = str(tmp_path / "providers.jsonl.gz")
+    recorder = Cassette(path, 'record')
+    assert recorder.call('gemini', 'gemini-2.5-flash', 'prompt', _slow_answer) == "SUMMARY: recorded"
+    assert list(recorder.stream('openai', 'gpt-4', 'prompt', _slow_stream)) == ["SUMMARY: ", "streamed"]
+    with pytest.raises(RuntimeError):
+        recorder.call('claude', 'claude', 'prompt', _failing)
+    recorder.close()
+
+    player = Cassette(path, 'replay')
+    start = time.perf_counter()
+    assert player.call('gemini', 'gemini-2.5-flash', 'prompt', _failing) == "SUMMARY: recorded"
+    assert time.perf_counter() - start >= 0.09
+    assert list(player.stream('openai', 'gpt-4', 'prompt', _failing)) == ["SUMMARY: ", "streamed"]
+    with pytest.raises(RuntimeError, match="503"):
+        player.call('claude', 'claude', 'prompt', _slow_answer)
+    with pytest.raises(CassetteMiss):
+        player.call('gemini', 'gemini-2.5-flash', 'another prompt', _slow_answer)
+    assert player.stats()['replayed'] == 3
+
+
+def test_scaled_replay(tmp_path):
+    """A time scale of zero replays instantly."""
+    path = str(tmp_path / "providers.jsonl.gz")
+    recorder = Cassette(path, 'record')
+    recorder.call('ollama', 'llama2', 'prompt', _slow_answer)
+    recorder.close()
+
+    start = time.perf_counter()
+    assert Cassette(path, 'replay', time_scale=0).call('ollama', 'llama2', 'prompt', _failing) == "SUMMARY: recorded"
+    assert time.perf_counter() - start < 0.05
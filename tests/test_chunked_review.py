@@ -0,0 +1,99 @@
+import pytest
+import os
+import sys
+import threading
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.chunked_review import review_in_chunks, split_into_chunks
+
+SAMPLE_CODE = "\n\n".join(
+    f"def function_{i}(value):\n    result = value * {i}\n    return result + {i}" for i in range(6)
+)
+
+
+def test_chunks_respect_token_budget_and_cover_all_functions():
+    """Every function lands in exactly one chunk and chunks stay within budget."""
+    chunks = split_into_chunks(SAMPLE_CODE, max_tokens=40)
+
+    names = [name for chunk in chunks for name in chunk['name'].split(', ')]
+    assert names == [f"function_{i}" for i in range(6)]
+    assert all(len(chunk['source']) / 4 <= 40 for chunk in chunks)
+
+
+def test_chunks_are_reviewed_concurrently_and_merged():
+    """Partial reviews are merged with deduplicated suggestions and a weighted rating."""
+    active = []
+    peak = []
+    threads = set()
+    lock = threading.Lock()
+
+    def fake_review(code, model_name):
+        with lock:
+            threads.add(threading.get_ident())
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return {
+            'summary': 'Multiplies a value.',
+            'suggestions': ['Add type hints.', 'add type hints', f'Rename {code.split("(")[0][4:]}'],
+            'issues': 'Possible overflow on line 2',
+            'quality_rating': '8/10',
+            'recommendation': 'Looks fine.',
+            'model_used': 'Fake',
+        }
+
+    review = review_in_chunks(SAMPLE_CODE, 'fake-model', fake_review, max_tokens=40, max_concurrency=2)
+
+    assert len(review['chunks']) > 1
+    assert max(peak) == 2
+    assert len(threads) <= 2  # no thread per chunk beyond the concurrency cap
+    assert review['suggestions'].count('Add type hints.') == 1
+    assert 'add type hints' not in review['suggestions']
+    # Chunk-specific suggestions differing only in a name or number all survive
+    assert [s for s in review['suggestions'] if s.startswith('Rename')] == [
+        f"Rename {chunk['name'].split(', ')[0]}" for chunk in review['chunks']]
+    assert review['quality_rating'] == '8.0'
+    assert review['model_used'] == 'Fake'
+
+
+def test_merge_keeps_distinct_location_specific_suggestions():
+    """Suggestions naming different lines are not merged; exact repeats are."""
+    from src.analyzer.chunked_review import merge_reviews
+
+    chunks = [{'name': 'a', 'start_line': 1, 'end_line': 20, 'source': 'x = 1'},
+              {'name': 'b', 'start_line': 21, 'end_line': 60, 'source': 'y = 2'}]
+    reviews = [{'suggestions': ['Validate the input on line 12', 'Add docstrings.']},
+               {'suggestions': ['Validate the input on line 45', 'add docstrings']}]
+
+    assert merge_reviews(chunks, reviews)['suggestions'] == [
+        'Validate the input on line 12', 'Add docstrings.', 'Validate the input on line 45']
+
+
+def test_chunked_review_rejects_pruning():
+    """Chunked mode cannot honour prune/changed_lines, so the combination is refused."""
+    from src.analyzer.ai_reviewer import review_code_with_ai
+
+    with pytest.raises(ValueError):
+        review_code_with_ai(SAMPLE_CODE, model_name="test-model", chunked=True, prune=True)
+    with pytest.raises(ValueError):
+        review_code_with_ai(SAMPLE_CODE, model_name="test-model", chunked=True, changed_lines=[3])
+
+
+def test_chunk_line_references_map_to_file_lines():
+    """Lines the model counts from the top of a chunk are shifted to file lines, even inside the chunk's span."""
+    code = "def a():\n    return 1\n\n" + "def b(x):\n" + "".join(f"    x += {i}\n" for i in range(60)) + "    return x\n"
+    chunks = split_into_chunks(code, max_tokens=186)
+    assert [(c['name'], c['start_line']) for c in chunks] == [('a', 1), ('b', 4)]
+
+    def fake_review(chunk_code, model_name):
+        return {'summary': 'ok', 'suggestions': [], 'issues': 'Overflow on line 40', 'quality_rating': '7'}
+
+    review = review_in_chunks(code, 'fake-model', fake_review, max_tokens=186)
+    assert "[b] Overflow on line 43" in review['issues'] and "[a] Overflow on line 40" in review['issues']
+    assert 43 in review['issue_lines']
@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.clone_detector import CloneDetector
+
+ORIGINAL = '''
+def summarize(orders, tax_rate=0.2):
+    """Total and average order value."""
+    total = 0
+    for order in orders:
+        if order["status"] == "paid":
+            total += order["amount"] * (1 + tax_rate)
+    average = total / len(orders) if orders else 0
+    return {"total": round(total, 2), "average": round(average, 2)}
+
+
+def parse_flags(argv):
+    flags = {}
+    for arg in argv:
+        if arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            flags[key] = value
+        elif arg.startswith("--"):
+            flags[arg[2:]] = True
+    return flags
+
+
+def tiny():
+    return 1
+'''
+
+# summarize renamed, reformatted and commented; parse_flags with one more branch
+COPIED = '''
+class Report:
+    def totals(self, rows, rate=0.15):
+        # copied from the billing module
+        acc = 0
+        for row in rows:
+            if row["state"] == "done":
+                acc += row["value"] * (1 + rate)
+        mean = acc / len(rows) if rows else 0
+        return {"sum": round(acc, 1), "mean": round(mean, 1)}
+
+
+def read_options(args):
+    options = {}
+    for item in args:
+        if item.startswith("--") and "=" in item:
+            name, value = item[2:].split("=", 1)
+            options[name] = value
+        elif item.startswith("--"):
+            options[item[2:]] = True
+        elif item.startswith("-"):
+            options[item[1:]] = True
+    return options
+'''
+
+# parse_flags with other names, literals and indentation
+RENAMED = '''
+def options_of(words):
+  found = {}
+  for w in words:
+    if w.startswith('++') and ':' in w:
+      k, v = w[2:].split(':', 2)
+      found[k] = v
+    elif w.startswith('++'):
+      found[w[2:]] = True
+  return found
+'''
+
+
+def test_renamed_and_edited_copies_are_reported(tmp_path):
+    """Copies match despite renaming and reformatting; unrelated and tiny functions do not."""
+    from src.analyzer.report_generator import generate_report
+
+    detector = CloneDetector()
+    detector.update({"billing.py": ORIGINAL, "report.py": COPIED})
+    assert len(detector) == 4  # tiny() is below min_tokens
+
+    pairs = {(p['a']['qualname'], p['b']['qualname']): p['similarity'] for p in detector.clones()}
+    assert set(pairs) == {("summarize", "Report.totals"), ("parse_flags", "read_options")}
+    assert all(0.8 <= similarity < 1.0 for similarity in pairs.values())
+    assert detector.clones(threshold=0.9) == [p for p in detector.clones() if p['similarity'] >= 0.9]
+    assert detector.clones(paths=["billing.py"]) == []
+
+    # Only names, literals and formatting differ: identical signatures
+    original = [f for f in detector.signatures(ORIGINAL) if f['qualname'] == "parse_flags"][0]
+    assert (detector.signatures(RENAMED)[0]['signature'] == original['signature']).all()
+
+    report = tmp_path / "report.md"
+    generate_report({'clone_detection': detector.report()}, str(report))
+    assert (f"billing.py::parse_flags (lines 12-20) ~ report.py::read_options (lines 13-23): "
+            f"{pairs['parse_flags', 'read_options']}") in report.read_text()
+
+
+def test_signatures_update_incrementally_and_persist(tmp_path):
+    """Unchanged files are not tokenized again; deleted files drop out; saved signatures reload."""
+    path = str(tmp_path / "clones.npz")
+    root = str(tmp_path / "repo")
+    files = {os.path.join(root, "billing.py"): ORIGINAL, os.path.join(root, "report.py"): COPIED}
+    detector = CloneDetector(path=path)
+    assert detector.update(files, root=root) == {'indexed': 2, 'unchanged': 0, 'removed': 0}
+    expected = detector.clones()
+    detector.save()
+
+    reloaded = CloneDetector(path=path)
+    assert reloaded.clones() == expected
+    del files[os.path.join(root, "report.py")]
+    assert reloaded.update(files, root=root) == {'indexed': 0, 'unchanged': 1, 'removed': 1}
+    assert reloaded.clones() == [] and len(reloaded) == 2
+
+    # Signatures of other parameters are not reused
+    assert len(CloneDetector(path=path, rows=4)) == 0
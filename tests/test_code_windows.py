@@ -0,0 +1,57 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.code_windows import token_windows
+
+
+def _word_tokens(code):
+    """One token per whitespace-separated word, with character offsets"""
+    offsets, position = [], 0
+    for word in code.split():
+        start = code.index(word, position)
+        offsets.append((start, start + len(word)))
+        position = start + len(word)
+    return offsets
+
+
+CODE = "\n".join(f"def f{i}():\n    x = {i}\n    return x" for i in range(6))
+
+
+def test_sliding_windows_overlap_and_cover_every_token():
+    """Windows are at most window_tokens long, overlap by the given amount and map to lines."""
+    offsets = _word_tokens(CODE)
+    windows = token_windows(CODE, offsets, len(offsets), window_tokens=10, overlap=4)
+
+    assert windows[0] == {'start': 0, 'end': 10, 'start_line': 1, 'end_line': 5}
+    assert all(b['start'] == a['end'] - 4 for a, b in zip(windows, windows[1:]))
+    assert windows[-1]['end'] == len(offsets) and windows[-1]['end_line'] == 18
+
+
+def test_function_windows_end_at_function_boundaries():
+    """In functions mode, windows hold whole functions and do not overlap."""
+    offsets = _word_tokens(CODE)  # 7 tokens per function
+    windows = token_windows(CODE, offsets, len(offsets), window_tokens=20, mode='functions')
+
+    assert [(w['start'], w['end']) for w in windows] == [(0, 14), (14, 28), (28, 42)]
+    assert [(w['start_line'], w['end_line']) for w in windows] == [(1, 6), (7, 12), (13, 18)]
+
+
+def test_file_analysis_pools_windows(tiny_codebert):
+    """Long files are analyzed window by window; a short file gives the same score as analyze_code."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    long_code = "\n".join([CODE] * 20)
+    result = analyzer.analyze_file(long_code, mode='functions', per_window=True)
+    assert result['windows'] == len(result['window_scores']) > 1
+    assert result['window_scores'][-1]['end_line'] == long_code.count("\n") + 1
+
+    short = "def f():\n    return 1"
+    assert analyzer.analyze_file(short)['complexity_score'] == pytest.approx(
+        analyzer.analyze_code(short)['complexity_score'], abs=0.011)
+    assert analyzer.embed(long_code, long_input=True).shape == (32,)
@@ -0,0 +1,82 @@
+import pytest
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.codebert_batcher import CodeBertBatcher
+
+
+class _CountingAnalyzer:
+    """Stands in for CodeBertAnalyzer: one token per character, records batch shapes"""
+
+    model_name = "fake"
+
+    def __init__(self):
+        self.batches = []
+
+    def token_ids(self, code):
+        return list(range(len(code)))
+
+    def analyze_token_ids(self, batch):
+        self.batches.append([len(ids) for ids in batch])
+        return [{"length": len(ids)} for ids in batch]
+
+
+def test_concurrent_requests_share_forward_passes_by_length_bucket():
+    """Requests arriving together are batched, never mixing length buckets, and get their own results."""
+    analyzer = _CountingAnalyzer()
+    batcher = CodeBertBatcher(analyzer, max_batch_size=4, max_wait_ms=50, bucket_width=10)
+    codes = ["x" * 3] * 6 + ["y" * 25] * 2
+
+    with ThreadPoolExecutor(max_workers=len(codes)) as pool:
+        results = list(pool.map(batcher.analyze_code, codes))
+
+    assert [r["length"] for r in results] == [len(code) for code in codes]
+    assert sorted(map(len, analyzer.batches)) == [2, 2, 4]
+    assert all(len({length // 10 for length in batch}) == 1 for batch in analyzer.batches)
+    assert batcher.stats()["items"] == len(codes)
+
+
+def test_batched_analysis_matches_single_analysis(tiny_codebert):
+    """Padding is masked out: batched results equal one-at-a-time results."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    codes = ["def f():\n    return 1", "class A:\n    def m(self, x):\n        return [i for i in x if i]\n"]
+    batched = analyzer.analyze_batch(codes)
+    single = [analyzer.analyze_code(code) for code in codes]
+    for b, s in zip(batched, single):
+        assert b["complexity_score"] == pytest.approx(s["complexity_score"], abs=0.011)
+
+
+def test_analyzers_share_a_batcher_only_on_the_same_weights():
+    """Same-named analyzers on other weights get their own results; each input is tokenized once."""
+    from src.analyzer.codebert_batcher import analyze_with_codebert, get_codebert_batcher
+
+    class _Analyzer(_CountingAnalyzer):
+        def __init__(self, model, shared=True):
+            super().__init__()
+            self.model, self.shared, self.tokenized = model, shared, 0
+
+        def token_ids(self, code):
+            self.tokenized += 1
+            return super().token_ids(code)
+
+        def analyze_token_ids(self, batch):
+            return [dict(result, model=self.model) for result in super().analyze_token_ids(batch)]
+
+    weights = object()
+    first, second = _Analyzer(weights), _Analyzer(weights)
+    assert get_codebert_batcher(first) is get_codebert_batcher(second)
+    assert analyze_with_codebert(second, "x = 1") == {"length": 5, "model": weights}
+    assert second.tokenized == 1
+
+    other = _Analyzer(object())
+    assert analyze_with_codebert(other, "x = 1")["model"] is other.model
+    tuned = _Analyzer(weights, shared=False)
+    assert analyze_with_codebert(tuned, "x = 1") == {"length": 5, "model": weights}
+    assert tuned.batches == [[5]]  # ran on its own analyzer, not through the shared batcher
@@ -0,0 +1,19 @@
+import pytest
+import os
+import sys
+import json
+import subprocess
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def test_entry_point_defers_heavy_imports():
+    """Importing the serverless entry point loads no provider SDK or ML framework and writes no log file."""
+    script = ("import json, sys, api.index; "
+              "print(json.dumps([m for m in ('google.generativeai', 'openai', 'anthropic', 'torch', "
+              "'transformers', 'numpy', 'src.utils.logger') if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", script], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
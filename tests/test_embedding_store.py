@@ -0,0 +1,96 @@
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.embedding_store import EmbeddingStore, content_key
+
+
+def test_vectors_persist_as_memory_mapped_rows_and_compact(tmp_path):
+    """Stored vectors survive reopening, are read from the memory map and compaction drops unwanted rows."""
+    store = EmbeddingStore(str(tmp_path), dim=4, dtype='float32')
+    keys = [content_key(f"def f{i}(): pass") for i in range(3)]
+    store.put_many({key: np.full(4, i, dtype=np.float32) for i, key in enumerate(keys)})
+    store.put(keys[0], np.zeros(4))  # already stored: no new row
+
+    reopened = EmbeddingStore(str(tmp_path), dim=4, dtype='float32')
+    row = reopened.get(keys[2])
+    assert isinstance(row, np.memmap) and not row.flags.writeable
+    assert row.tolist() == [2.0] * 4
+    assert reopened.get(content_key("unknown")) is None
+    assert reopened.stats()['rows'] == 3
+
+    assert reopened.compact(keep=keys[1:]) == 1
+    assert reopened.get(keys[0]) is None and reopened.get(keys[1]).tolist() == [1.0] * 4
+    assert os.path.getsize(reopened.vectors_path) == 2 * 4 * 4
+
+    # A store written for another shape starts over
+    assert EmbeddingStore(str(tmp_path), dim=8).stats()['keys'] == 0
+
+
+def test_unchanged_inputs_skip_the_model(tiny_codebert, tmp_path):
+    """Analyzing code again reads its statistics from the store instead of running the model."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    analyzer.embedding_store = EmbeddingStore(str(tmp_path), dim=2 * analyzer.model.config.hidden_size)
+    forward_inputs = []
+    forward = analyzer._forward_stats
+    analyzer._forward_stats = lambda batch: forward_inputs.append(len(batch)) or forward(batch)
+
+    code = "def f(x):\n    return x * 2"
+    first = analyzer.analyze_code(code)
+    assert analyzer.analyze_batch([code, "def g():\n    pass"])[0] == first
+    assert analyzer.analyze_code(code) == first
+    assert forward_inputs == [1, 1]
+
+
+def _put_range(directory, start, count):
+    """Store count one-row vectors, one put per vector (run in a worker process)."""
+    store = EmbeddingStore(directory, dim=4, dtype='float32')
+    for i in range(start, start + count):
+        store.put(content_key(str(i)), np.full(4, i, dtype=np.float32))
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="appends are serialized with fcntl.flock")
+def test_concurrent_writers_share_one_store(tmp_path):
+    """Processes appending to one store never overlap rows, and each sees the keys the others stored."""
+    import multiprocessing
+
+    directory = str(tmp_path)
+    reader = EmbeddingStore(directory, dim=4, dtype='float32')
+    workers = [multiprocessing.Process(target=_put_range, args=(directory, w * 100, 100)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    # Opened before the writes: the new keys are found by re-reading the index tail
+    assert all(reader.get(content_key(str(i))).tolist() == [float(i)] * 4 for i in range(400))
+    assert reader.stats()['rows'] == 400 and reader.stats()['keys'] == 400
+
+    # A key stored elsewhere meanwhile is not appended a second time
+    other = EmbeddingStore(directory, dim=4, dtype='float32')
+    other.put(content_key("new"), np.ones(4))
+    reader.put(content_key("new"), np.ones(4))
+    assert os.path.getsize(reader.vectors_path) == 401 * 4 * 4
+
+
+def test_cold_and_warm_calls_agree_with_a_half_precision_store(tiny_codebert, tmp_path):
+    """Freshly computed statistics are rounded like stored ones, so results don't depend on the store state."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    analyzer.embedding_store = EmbeddingStore(str(tmp_path), dim=2 * analyzer.model.config.hidden_size)
+    batch = [analyzer.tokenizer.encode("def f(x):\n    return x * 2")]
+
+    cold = analyzer._embedding_stats(batch)
+    warm = analyzer._embedding_stats(batch)
+    assert analyzer.embedding_store.stats()['hits'] == 1
+    assert all(np.array_equal(a, b) for a, b in zip(cold, warm))
@@ -0,0 +1,60 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.code_units import extract_units
+
+MODULE = '''import math
+
+
+def area(r):
+    return math.pi * r * r
+
+
+class Shape:
+    def __init__(self, sides):
+        self.sides = sides
+
+    @property
+    def angle_sum(self):
+        return (self.sides - 2) * 180
+'''
+
+
+def test_extract_units_can_include_classes():
+    """Classes become units spanning their methods, ahead of the methods in source order."""
+    units = extract_units(MODULE, include_classes=True)
+    assert [(u['qualname'], u['kind'], u['start_line'], u['end_line']) for u in units] == [
+        ("area", "function", 4, 5),
+        ("Shape", "class", 8, 14),
+        ("Shape.__init__", "method", 9, 10),
+        ("Shape.angle_sum", "method", 12, 14),
+    ]
+    assert [u['qualname'] for u in extract_units(MODULE)] == ["area", "Shape.__init__", "Shape.angle_sum"]
+
+
+def test_function_scores_match_analyzing_each_function(tiny_codebert):
+    """Batched per-function results equal one analyze_code/embed call per function; long ones are windowed."""
+    import numpy as np
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    long_body = "\n".join(f"    total += values[{i}] * {i}" for i in range(150))
+    code = MODULE + f"\n\ndef weighted(values):\n    total = 0\n{long_body}\n    return total\n"
+
+    results = analyzer.analyze_functions(code)
+    assert [r['qualname'] for r in results] == ["area", "Shape", "Shape.__init__", "Shape.angle_sum", "weighted"]
+    for result, unit in zip(results[:4], extract_units(code, include_classes=True)):
+        assert result['windows'] == 1
+        expected = analyzer.analyze_code(unit['source'])['complexity_score']
+        assert result['complexity_score'] == pytest.approx(expected, abs=0.011)
+        assert np.allclose(result['embedding'], analyzer.embed(unit['source']), atol=1e-5)
+
+    weighted = results[-1]
+    assert weighted['tokens'] > 510 and weighted['windows'] > 1
+    assert np.isclose(np.linalg.norm(weighted['embedding']), 1.0)
+    assert analyzer.analyze_functions("def broken(:") == []
@@ -0,0 +1,31 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def test_traced_runtime_matches_eager_and_is_shared(tiny_codebert, monkeypatch):
+    """Traced buckets give the eager results; the warm encoder is built once per shared model."""
+    import numpy as np
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    monkeypatch.setenv('CODEBERT_SEQ_BUCKETS', "16,64")
+    eager = CodeBertAnalyzer(tiny_codebert)
+    traced = CodeBertAnalyzer(tiny_codebert, runtime="trace")
+    again = CodeBertAnalyzer(tiny_codebert, runtime="trace")
+    assert eager.encoder is None and traced.encoder is again.encoder
+    assert traced.encoder.stats()['buckets'] == [16, 64]
+
+    # Short, medium (padded to 64) and longer-than-any-bucket inputs, in one padded batch
+    codes = ["x = 1", "def f(a, b):\n    return a * b + 1\n" * 3, "y = [i for i in range(3)]\n" * 20]
+    expected = eager.analyze_batch(codes)
+    assert traced.analyze_batch(codes) == expected
+    for code in codes[:2]:
+        assert np.allclose(traced.embed(code), eager.embed(code), atol=1e-5)
+    assert traced.encoder.stats()['eager_calls'] == 1
+
+    with pytest.raises(ValueError):
+        CodeBertAnalyzer(tiny_codebert, runtime="jit")
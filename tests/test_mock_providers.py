@@ -0,0 +1,54 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'benchmarks'))
+
+from mock_providers import DEFAULT_RESPONSE, MockProviderServer, ProviderProfile
+from src.analyzer.provider_registry import ProviderRegistry
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """Mock providers with no latency, and the SDK environment pointing at them."""
+    server = MockProviderServer(profiles={
+        'openai': ProviderProfile(latency="fixed:0"),
+        'claude': ProviderProfile(latency="fixed:0"),
+        'ollama': ProviderProfile(latency="fixed:0", error_rate=1.0, error_statuses=[503]),
+    }).start()
+    for key, value in server.environment().items():
+        monkeypatch.setenv(key, value)
+    yield server
+    server.stop()
+
+
+def test_sdk_clients_talk_to_mock_servers(mock_server):
+    """The real OpenAI and Anthropic SDKs, streaming or not, get the canned review."""
+    registry = ProviderRegistry()
+
+    openai_client = registry.openai_client()
+    completion = openai_client.chat.completions.create(
+        model="gpt-4", messages=[{"role": "user", "content": "review"}])
+    assert completion.choices[0].message.content == DEFAULT_RESPONSE
+    stream = openai_client.chat.completions.create(
+        model="gpt-4", messages=[{"role": "user", "content": "review"}], stream=True)
+    assert "".join(c.choices[0].delta.content or "" for c in stream if c.choices) == DEFAULT_RESPONSE
+
+    with registry.anthropic_client().messages.stream(
+            model="claude", max_tokens=100, messages=[{"role": "user", "content": "review"}]) as stream:
+        assert "".join(stream.text_stream) == DEFAULT_RESPONSE
+
+    assert mock_server.stats()['openai']['requests'] == 2
+    assert mock_server.stats()['claude']['requests'] == 1
+
+
+def test_error_profile(mock_server):
+    """A provider configured to fail answers with the configured status."""
+    local_model = ProviderRegistry().local_model()
+
+    assert local_model is not None
+    assert local_model.analyze_code("x = 1") == {"error": "Model error: 503"}
+    assert mock_server.stats()['ollama']['errors'] == 1
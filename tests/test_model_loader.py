@@ -0,0 +1,83 @@
+import pytest
+import os
+import sys
+import threading
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer import model_loader
+from src.analyzer.model_loader import BackgroundLoad, ModelNotReady
+
+
+def test_mmap_loaded_model_matches_a_regular_load(tiny_codebert):
+    """Parameters are views into the safetensors file and give the same outputs as from_pretrained."""
+    torch = pytest.importorskip("torch")
+    from transformers import AutoModel
+
+    mapped = model_loader.load_model(tiny_codebert)
+    loaded = AutoModel.from_pretrained(tiny_codebert).eval()
+    assert not mapped.embeddings.word_embeddings.weight.untyped_storage().resizable()
+
+    ids = torch.tensor([[0, 100, 200, 300, 2]])
+    with torch.no_grad():
+        assert torch.allclose(mapped(ids).last_hidden_state, loaded(ids).last_hidden_state)
+
+
+def test_model_directory_without_weights_fails_offline(tmp_path, tiny_codebert):
+    """A local directory holding only config and tokenizer is never fetched from the hub."""
+    import shutil
+    pytest.importorskip("transformers")
+
+    for name in os.listdir(tiny_codebert):
+        if not name.endswith(".safetensors"):
+            shutil.copy(os.path.join(tiny_codebert, name), tmp_path)
+    with pytest.raises(OSError):
+        model_loader.load_model(str(tmp_path))
+
+
+def test_readyz_reports_background_load_progress(monkeypatch):
+    """/readyz is 503 while a model loads, 200 once it is ready, and 200 (degraded) if it failed."""
+    from src.app import app
+
+    release = threading.Event()
+
+    def task(report):
+        report("loading weights")
+        release.wait(5)
+        return "model"
+
+    load = BackgroundLoad("CodeBERT (test)", task)
+    failed = BackgroundLoad("broken", lambda report: 1 / 0)
+    monkeypatch.setattr(model_loader, "_loads", {"test": load})
+    client = app.test_client()
+
+    with pytest.raises(ModelNotReady):
+        load.get(timeout=0)
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['models']['CodeBERT (test)']['stage'] == "loading weights"
+
+    release.set()
+    assert load.get(timeout=5) == "model"
+    assert client.get('/readyz').get_json()['status'] == 'ready'
+
+    monkeypatch.setattr(model_loader, "_loads", {"test": load, "broken": failed})
+    with pytest.raises(ModelNotReady):
+        failed.get(timeout=5)
+    response = client.get('/readyz')
+    assert response.status_code == 200 and response.get_json()['status'] == 'degraded'
+
+
+def test_spellings_of_one_model_share_a_load(monkeypatch):
+    """The hub id, the default and relative or absolute paths to the model directory load it once."""
+    monkeypatch.setattr(model_loader, "_loads", {})
+    monkeypatch.delenv('CODEBERT_MODEL', raising=False)
+    monkeypatch.chdir(project_root)
+
+    load = model_loader.get_model_loader()
+    assert model_loader.get_model_loader(model_loader.CODEBERT_HUB_ID) is load
+    assert model_loader.get_model_loader("models/my-codebert") is load
+    assert model_loader.get_model_loader(model_loader.local_codebert_dir() + os.sep) is load
+    assert len(model_loader._loads) == 1
@@ -0,0 +1,79 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.model_registry import ModelRegistry
+
+
+def test_models_load_once_and_unload_when_unreferenced():
+    """Acquires share one load; unload is refused while references are held unless forced."""
+    loads = []
+
+    def loader(model_name, device, backend):
+        loads.append(model_name)
+        return f"tokenizer:{model_name}", object(), "cpu"
+
+    registry = ModelRegistry(loader=loader)
+    first = registry.acquire("codebert")
+    second = registry.acquire("codebert")
+    assert first[1] is second[1] and loads == ["codebert"]
+    assert registry.stats()["codebert"]["refs"] == 2
+
+    registry.release("codebert")
+    assert registry.unload("codebert") is False
+    registry.release("codebert")
+    assert registry.unload("codebert") is True and not registry.loaded("codebert")
+
+    registry.acquire("codebert")
+    assert registry.unload("codebert", force=True) is True
+    assert loads == ["codebert", "codebert"]
+
+
+def test_codebert_analyzers_share_weights_until_training(tiny_codebert):
+    """Analyzers share one model; fine-tuning works on a private copy and leaves the shared one intact."""
+    import torch
+    from src.analyzer.custom_models import CodeBertAnalyzer, UnifiedCodeAnalyzer
+    from src.analyzer.model_registry import get_model_registry
+
+    registry = get_model_registry()
+    first = CodeBertAnalyzer(tiny_codebert)
+    unified = UnifiedCodeAnalyzer(use_codebert=True, use_gemini=False, codebert=first)
+    second = CodeBertAnalyzer(tiny_codebert)
+    assert first.model is second.model and unified.codebert is first
+    assert registry.stats()[tiny_codebert]["refs"] == 2
+
+    before = [p.clone() for p in first.model.parameters()]
+    assert second.train_on_custom_data(["def f():\n    return 1"] * 2, [1, 2], epochs=1, batch_size=2)
+    assert second.model is not first.model
+    assert all(torch.equal(a, b) for a, b in zip(before, first.model.parameters()))
+    assert registry.stats()[tiny_codebert]["refs"] == 1
+
+    del first, unified
+    assert registry.stats()[tiny_codebert]["refs"] == 0
+    assert registry.unload(tiny_codebert)
+
+
+def test_int8_backend_is_cached_next_to_the_model(tiny_codebert):
+    """The quantized model is written next to the source model, reused, and stays close to fp32."""
+    import numpy as np
+    from src.analyzer.custom_models import CodeBertAnalyzer
+    from src.analyzer.model_registry import get_model_registry, quantized_model_dir
+
+    fp32 = CodeBertAnalyzer(tiny_codebert)
+    int8 = CodeBertAnalyzer(tiny_codebert, backend="int8")
+    assert int8.model is not fp32.model
+    assert os.path.exists(os.path.join(quantized_model_dir(tiny_codebert), "quantized.pt"))
+
+    code = "def area(r):\n    return 3.14159 * r * r"
+    assert float(np.dot(fp32.embed(code), int8.embed(code))) > 0.98
+    assert not int8.train_on_custom_data([code], [1])
+
+    # A fresh load comes from the cached artifact and gives the same output
+    before = int8.embed(code)
+    del int8
+    assert get_model_registry().unload(tiny_codebert, backend="int8")
+    assert np.allclose(CodeBertAnalyzer(tiny_codebert, backend="int8").embed(code), before, atol=1e-6)
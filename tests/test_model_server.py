@@ -0,0 +1,113 @@
+import pytest
+import os
+import sys
+import threading
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.model_loader import BackgroundLoad, ModelNotReady
+from src.analyzer.model_server import ModelServer, ModelServerClient, ModelServerUnavailable
+
+
+def test_clients_get_the_servers_codebert_results(tiny_codebert, tmp_path):
+    """Analyses and embeddings over the socket match the in-process analyzer, from any thread."""
+    import numpy as np
+    from src.analyzer.codebert_batcher import analyze_with_codebert
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    socket_path = str(tmp_path / "codebert.sock")
+    server = ModelServer(socket_path, tiny_codebert)
+    server.start()
+    try:
+        client = ModelServerClient(socket_path)
+        server.load.get(timeout=60)
+        local = CodeBertAnalyzer(tiny_codebert)
+        codes = ["def f(x):\n    return x * 2", "import os\nprint(os.getcwd())"]
+
+        results = [None] * len(codes)
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, client.analyze_code(codes[i])))
+                   for i in range(len(codes))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [analyze_with_codebert(local, code) for code in codes]
+        assert np.allclose(client.embed(codes[0]), local.embed(codes[0]), atol=1e-6)
+        assert client.readiness()['status'] == 'ready'
+    finally:
+        server.shutdown()
+    assert not os.path.exists(socket_path)
+
+    client = ModelServerClient(socket_path)
+    with pytest.raises(ModelServerUnavailable):
+        client.analyze_code("x = 1")
+    assert client.readiness()['status'] == 'degraded'
+
+
+def test_loading_server_degrades_the_codebert_endpoint(tmp_path, monkeypatch):
+    """While the server loads its model, workers answer 'unavailable' instead of waiting."""
+    from src.analyzer import model_server
+    from src.analyzer.model_integration import CustomModelIntegration
+
+    release = threading.Event()
+    socket_path = str(tmp_path / "codebert.sock")
+    server = ModelServer(socket_path, load=BackgroundLoad("CodeBERT (test)", lambda report: release.wait(5)))
+    server.start()
+    monkeypatch.setattr(model_server, "_client", ModelServerClient(socket_path))
+    monkeypatch.setattr(model_server, "_client_initialized", True)
+    try:
+        integration = CustomModelIntegration()
+        assert integration.codebert_load is None
+        response = integration.analyze_with_model("x = 1", "codebert")
+        assert response["status"] == "unavailable" and "not ready" in response["message"]
+        with pytest.raises(ModelNotReady):
+            integration.model_server.embed("x = 1")
+    finally:
+        release.set()
+        server.shutdown()
+
+
+def test_server_errors_come_back_like_in_process_failures(tmp_path, monkeypatch):
+    """A request the server fails on gives the {'error': ...} result of a failed in-process analysis."""
+    from src.analyzer import model_server
+    from src.analyzer.model_integration import CustomModelIntegration
+
+    def failing_analysis(analyzer, code):
+        raise ValueError("tokenizer exploded")
+
+    monkeypatch.setattr(model_server, "analyze_with_codebert", failing_analysis)
+    socket_path = str(tmp_path / "codebert.sock")
+    server = ModelServer(socket_path, load=BackgroundLoad("CodeBERT (test)", lambda report: object()))
+    server.start()
+    monkeypatch.setattr(model_server, "_client", ModelServerClient(socket_path))
+    monkeypatch.setattr(model_server, "_client_initialized", True)
+    try:
+        server.load.get(timeout=5)
+        response = CustomModelIntegration().analyze_with_model("x = 1", "codebert")
+        assert response["status"] == "success" and response["result"] == {"error": "tokenizer exploded"}
+    finally:
+        server.shutdown()
+
+
+def test_unified_analysis_takes_codebert_per_call():
+    """Each unified request uses the CodeBERT it was given, without mutating the shared analyzer."""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.analyzer.custom_models import UnifiedCodeAnalyzer
+
+    class _FakeCodeBert:
+        def __init__(self, name):
+            self.name = name
+
+        def analyze_code(self, code):
+            return {"by": self.name}
+
+    unified = UnifiedCodeAnalyzer(use_codebert=False, use_gemini=False)
+    fakes = [_FakeCodeBert(f"model{i}") for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda fake: unified.comparative_analysis("x = 1", fake), fakes))
+
+    assert [r["unified_analysis"]["analyses"]["codebert"]["by"] for r in results] == [f.name for f in fakes]
+    assert unified.codebert is None
+    assert unified.comparative_analysis("x = 1")["unified_analysis"]["models_used"] == []
@@ -0,0 +1,50 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.prompt_builder import build_pruned_prompt, map_review_to_source
+
+SAMPLE_CODE = '''import os
+import json
+
+
+def helper(path: str) -> str:
+    return os.path.basename(path)
+
+
+def unchanged():
+    values = [1, 2, 3]
+    return json.dumps(values)
+
+
+def changed(path):
+    name = helper(path)
+    return name.upper()
+'''
+
+
+def test_pruned_prompt_contains_only_changed_function():
+    """Only the changed function, its imports and callee signatures are sent."""
+    pruned = build_pruned_prompt(SAMPLE_CODE, changed_lines=[15], findings=[])
+
+    assert [s['qualname'] for s in pruned['segments']] == ['changed']
+    assert "def helper(path: str) -> str: ..." in pruned['prompt']
+    assert "   15|     name = helper(path)" in pruned['prompt']
+    assert "json.dumps" not in pruned['prompt']
+    assert pruned['prompt_tokens'] < pruned['full_prompt_tokens']
+
+
+def test_relative_line_references_are_mapped_to_file_lines():
+    """Line numbers counted from the snippet start are translated to absolute ones."""
+    pruned = {'segments': [{'qualname': 'changed', 'start_line': 14, 'end_line': 16}]}
+    review = {'issues': 'Line 2 may fail; see also line 16', 'suggestions': ['Check lines 1-2']}
+
+    mapped = map_review_to_source(review, pruned)
+
+    assert mapped['issues'] == 'Line 15 may fail; see also line 16'
+    assert mapped['suggestions'] == ['Check lines 14-15']
+    assert mapped['issue_lines'] == [14, 15, 16]
@@ -0,0 +1,77 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.provider_registry import ProviderRegistry
+
+
+def test_clients_are_created_once_and_reused(monkeypatch):
+    """The same client instance is handed out to every request."""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    registry = ProviderRegistry()
+
+    assert registry.status()['openai'] == {'state': 'cold'}
+    first = registry.openai_client()
+    assert first is not None
+    assert registry.openai_client() is first
+    assert registry.status()['openai']['state'] == 'warm'
+
+
+def test_missing_key_reports_unavailable(monkeypatch):
+    """Providers without an API key are reported as unavailable, not warm."""
+    monkeypatch.delenv('ANTHROPIC_API_KEY', raising=False)
+    registry = ProviderRegistry()
+
+    assert registry.anthropic_client() is None
+    assert registry.status()['claude']['state'] == 'unavailable'
+
+
+def test_slow_provider_resolution_blocks_only_that_provider():
+    """A provider being created does not hold up other providers; concurrent requests share one creation."""
+    import threading
+
+    registry = ProviderRegistry()
+    release = threading.Event()
+    created = []
+
+    def slow_factory():
+        created.append(1)
+        release.wait(5)
+        return {'client': object(), 'model': 'slow'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry._get('gemini', slow_factory)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    # While Gemini resolves, another provider and status() answer immediately
+    fast = registry._get('openai', lambda: {'client': object(), 'model': 'fast'})
+    assert fast is not None and registry.status()['gemini'] == {'state': 'cold'}
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(created) == 1 and len(results) == 3 and all(r is results[0] for r in results)
+
+
+def test_only_auth_and_missing_model_errors_reresolve_gemini():
+    """Transient failures keep the resolved Gemini model."""
+    from src.analyzer.provider_registry import needs_reresolve
+
+    class NotFound(Exception):
+        pass
+
+    class ApiError(Exception):
+        def __init__(self, code):
+            super().__init__(code)
+            self.code = code
+
+    assert needs_reresolve(NotFound("model retired"))
+    assert needs_reresolve(ApiError(403))
+    assert not needs_reresolve(ApiError(503)) and not needs_reresolve(ApiError(429))
+    assert not needs_reresolve(TimeoutError("read timed out"))
@@ -0,0 +1,125 @@
+import pytest
+import os
+import sys
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer import provider_router
+from src.analyzer.provider_router import ProviderRouter, ProviderUnavailable
+
+
+def _answer(name, delay=0.0):
+    def review(code, prompt):
+        time.sleep(delay)
+        return {'summary': f'from {name}'}
+    return review
+
+
+def _broken(code, prompt):
+    raise RuntimeError("503 Service Unavailable")
+
+
+def _unconfigured(code, prompt):
+    raise ProviderUnavailable("API key not set")
+
+
+def test_failover_and_circuit_breaker():
+    """A failing provider fails over to the next and is skipped once its breaker opens."""
+    calls = []
+
+    def flaky(code, prompt):
+        calls.append(1)
+        return _broken(code, prompt)
+
+    router = ProviderRouter({'a': flaky, 'b': _answer('b')}, order=['a', 'b'])
+    for _ in range(provider_router.CONSECUTIVE_FAILURES_TO_OPEN + 2):
+        assert router.review('x = 1')['provider'] == 'b'
+
+    assert len(calls) == provider_router.CONSECUTIVE_FAILURES_TO_OPEN
+    assert router.stats()['providers']['a']['state'] == 'open'
+
+
+def test_unconfigured_providers_are_skipped_without_penalty():
+    """Providers without credentials are passed over but their breaker stays closed."""
+    router = ProviderRouter({'a': _unconfigured, 'b': _answer('b')}, order=['a', 'b'])
+
+    assert router.review('x = 1', preferred='a')['summary'] == 'from b'
+    assert router.stats()['providers']['a']['state'] == 'closed'
+    assert router.stats()['failovers'] == 0
+
+    with pytest.raises(ProviderUnavailable):
+        ProviderRouter({'a': _unconfigured}, order=['a']).review('x = 1')
+
+
+def test_hedges_when_primary_exceeds_p95(monkeypatch):
+    """A slow primary triggers a hedged request and the first good answer wins."""
+    router = ProviderRouter({'slow': _answer('slow', delay=1.0), 'fast': _answer('fast')},
+                           order=['slow', 'fast'])
+    for _ in range(provider_router.MIN_SAMPLES_FOR_P95):
+        router.health['slow'].record_success(0.05)
+
+    start = time.monotonic()
+    review = router.review('x = 1')
+
+    assert review['provider'] == 'fast'
+    assert review['hedged'] is True
+    assert time.monotonic() - start < 0.5
+    assert router.stats()['hedges'] == 1
+
+
+def test_auto_routing_prefers_the_faster_healthy_provider():
+    """Without a preferred provider, the one with the lower rolling latency goes first."""
+    router = ProviderRouter({'slow': _answer('slow'), 'fast': _answer('fast'), 'down': _broken},
+                           order=['down', 'slow', 'fast'])
+    for _ in range(provider_router.MIN_SAMPLES_FOR_P95):
+        router.health['slow'].record_success(2.0)
+        router.health['fast'].record_success(0.2)
+        router.health['down'].record_success(0.1)
+    for _ in range(provider_router.CONSECUTIVE_FAILURES_TO_OPEN):
+        router.health['down'].record_failure(0.1)
+
+    assert router._ordered() == ['fast', 'slow', 'down']
+    assert router.review('x = 1')['provider'] == 'fast'
+    # An explicit choice still wins over latency
+    assert router.review('x = 1', preferred='slow')['provider'] == 'slow'
+
+
+def test_stream_fails_over_before_first_piece():
+    """A stream that fails before producing text moves on to the next provider."""
+    def broken_stream(code, prompt):
+        raise RuntimeError("connection reset")
+        yield
+
+    def good_stream(code, prompt):
+        yield "SUMMARY: ok\n"
+        yield "QUALITY_RATING: 8"
+
+    router = ProviderRouter({'a': _broken, 'b': _answer('b')}, order=['a', 'b'],
+                            streamers={'a': broken_stream, 'b': good_stream})
+
+    pieces = list(router.stream('x = 1'))
+
+    assert pieces == [('b', "SUMMARY: ok\n"), ('b', "QUALITY_RATING: 8")]
+    assert router.stats()['failovers'] == 1
+
+
+def test_throttled_provider_fails_over_instead_of_holding_pool_threads():
+    """Quota waits beyond POOLED_MAX_WAIT_SECONDS on the executor fail over; other threads still queue."""
+    from src.analyzer.rate_limiter import ProviderRateLimiter
+
+    limiter = ProviderRateLimiter('a', requests_per_minute=6, max_wait=30)
+    limiter.requests.level = 0  # quota used up: the next request is 10s away
+
+    def throttled(code, prompt):
+        limiter.acquire()
+        return {'summary': 'from a'}
+
+    router = ProviderRouter({'a': throttled, 'b': _answer('b')}, order=['a', 'b'], max_workers=2)
+    start = time.monotonic()
+    assert router.review('x = 1', preferred='a')['provider'] == 'b'
+    assert time.monotonic() - start < provider_router.POOLED_MAX_WAIT_SECONDS
+    assert limiter.stats()['rejected'] == 1 and router.health['a'].state == 'closed'
+    assert provider_router.queue_wait_limit(30) == 30  # outside the pool the full wait applies
@@ -0,0 +1,40 @@
+import pytest
+import os
+import sys
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.provider_router import ProviderUnavailable
+from src.analyzer.rate_limiter import ProviderRateLimiter, RateLimitExceeded
+
+
+def test_bursts_queue_instead_of_failing():
+    """Requests beyond the per-minute quota wait for the bucket to refill."""
+    limiter = ProviderRateLimiter('test', requests_per_minute=600, max_wait=1.0)  # one every 0.1s
+    limiter.requests.level = 1
+
+    start = time.monotonic()
+    waits = [limiter.acquire() for _ in range(3)]
+
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.1, abs=0.03)
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.05)
+    stats = limiter.stats()
+    assert stats['admitted'] == 3
+    assert stats['max_wait_seconds'] >= 0.09
+
+
+def test_token_limit_rejects_beyond_max_wait():
+    """A request whose tokens won't be available within max_wait is rejected so the router can fail over."""
+    limiter = ProviderRateLimiter('test', tokens_per_minute=6000, max_wait=0.5)
+
+    assert limiter.acquire(tokens=6000) == 0
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.acquire(tokens=1000)  # 10 seconds away
+
+    assert isinstance(excinfo.value, ProviderUnavailable)
+    assert limiter.stats()['rejected'] == 1
+    assert limiter.stats()['remaining_tokens'] < 100
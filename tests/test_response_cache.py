@@ -0,0 +1,58 @@
+import pytest
+import os
+import sys
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer import ai_reviewer
+from src.analyzer.response_cache import ResponseCache
+
+REVIEW_TEXT = "SUMMARY: Adds numbers\nSUGGESTIONS:\n- Add type hints\nQUALITY_RATING: 8"
+
+
+def test_hit_skips_generation_and_parsing(tmp_path, monkeypatch):
+    """A repeated request is served from the cache without calling the provider."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(ai_reviewer, 'get_response_cache', lambda: cache)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return REVIEW_TEXT
+
+    first = ai_reviewer._cached_review('gemini', 'gemini-2.5-flash', 'x = 1', 'x = 1', generate)
+    second = ai_reviewer._cached_review('gemini', 'gemini-2.5-flash', 'x = 1', 'x = 1', generate)
+
+    assert len(calls) == 1
+    assert second['suggestions'] == first['suggestions'] == ['Add type hints']
+    assert second['cache_hit'] is True
+    assert cache.stats()['hit_ratio'] == 0.5
+
+
+def test_ignore_formatting_keys(tmp_path):
+    """Whitespace/comment-insensitive keys match reformatted code only when enabled."""
+    strict = ResponseCache(str(tmp_path / "strict.sqlite3"))
+    loose = ResponseCache(str(tmp_path / "loose.sqlite3"), ignore_formatting=True)
+    original = "def f(a, b):\n    return a + b\n"
+    reformatted = "def f(a,b):  # add\n\n    return a+b\n"
+
+    assert strict.make_key('gemini', 'm', '1', original) != strict.make_key('gemini', 'm', '1', reformatted)
+    assert loose.make_key('gemini', 'm', '1', original) == loose.make_key('gemini', 'm', '1', reformatted)
+
+
+def test_ttl_and_size_bound(tmp_path):
+    """Expired entries miss and the least recently used entries are evicted."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.05, max_entries=2)
+    cache.put('a', 'gemini', 'm', 'raw', {})
+    time.sleep(0.1)
+    assert cache.get('a') is None
+
+    cache.ttl_seconds = 60
+    for key in ('b', 'c', 'd'):
+        cache.put(key, 'gemini', 'm', 'raw', {})
+    assert cache.get('b') is None
+    assert cache.get('d') == {'raw': 'raw', 'parsed': {}}
+    assert cache.stats()['evictions'] == 1
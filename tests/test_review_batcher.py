@@ -0,0 +1,69 @@
+import pytest
+import os
+import sys
+import threading
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.review_batcher import ReviewBatcher, build_batch_prompt, parse_batch_response
+
+BATCH_RESPONSE = """Here are the reviews.
+
+=== REVIEW S1 ===
+SUMMARY: Adds numbers.
+SUGGESTIONS:
+- Add type hints
+QUALITY_RATING: 7
+
+**=== REVIEW S2 ===**
+SUMMARY: Prints a greeting.
+ISSUES: None
+QUALITY_RATING: 9
+"""
+
+
+def test_batch_prompt_and_response_round_trip():
+    """Snippets are delimited by id and the response is split back per id."""
+    prompt = build_batch_prompt(["def add(a, b):\n    return a + b", "print('hi')"])
+    assert "=== SNIPPET S1 ===" in prompt and "=== SNIPPET S2 ===" in prompt
+
+    reviews = parse_batch_response(BATCH_RESPONSE)
+
+    assert set(reviews) == {'S1', 'S2'}
+    assert reviews['S1']['suggestions'] == ['Add type hints']
+    assert reviews['S2']['summary'] == 'Prints a greeting.'
+    assert reviews['S2']['quality_rating'] == '9'
+
+
+def test_concurrent_snippets_share_one_call():
+    """Snippets submitted within the linger window go out as one batch; gaps are retried alone."""
+    batch_calls, single_calls = [], []
+
+    def review_batch(snippets):
+        batch_calls.append(snippets)
+        # The response leaves out the last snippet
+        return [{'summary': code} for code in snippets[:-1]] + [None]
+
+    def review_single(code):
+        single_calls.append(code)
+        return {'summary': code, 'single': True}
+
+    batcher = ReviewBatcher(review_batch, review_single, linger=0.2)
+    snippets = [f"x{i} = {i}" for i in range(4)]
+    results = [None] * len(snippets)
+
+    def review(i):
+        results[i] = batcher.review(snippets[i], timeout=5)
+
+    threads = [threading.Thread(target=review, args=(i,)) for i in range(len(snippets))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(batch_calls) == 1 and sorted(batch_calls[0]) == snippets
+    assert len(single_calls) == 1
+    assert [r['summary'] for r in results] == snippets
+    assert batcher.stats()['retried_individually'] == 1
@@ -0,0 +1,57 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.review_scheduler import ReviewScheduler
+
+SAMPLE_CODE = """
+def risky(values):
+    count = 0
+    total = sum(values)
+    return total / 0
+
+def simple():
+    return 1
+"""
+
+
+def test_rank_prefers_critical_units(tmp_path):
+    """Units with critical logic issues should be ranked first."""
+    scheduler = ReviewScheduler(state_path=str(tmp_path / "state.json"), repo_root=str(tmp_path))
+    ranked = scheduler.rank({"sample.py": SAMPLE_CODE})
+
+    assert [c['qualname'] for c in ranked] == ['risky', 'simple']
+    assert ranked[0]['signals']['critical'] >= 1
+
+
+def test_budget_skips_low_priority_units(tmp_path):
+    """Only units that fit in the budget are reviewed; the rest are reported as skipped."""
+    scheduler = ReviewScheduler(token_budget=200, state_path=str(tmp_path / "state.json"),
+                                repo_root=str(tmp_path))
+    schedule = scheduler.run({"sample.py": SAMPLE_CODE}, model_name="test-model")
+
+    assert [u['qualname'] for u in schedule['reviewed']] == ['risky']
+    assert [u['qualname'] for u in schedule['skipped']] == ['simple']
+    assert 'summary' in schedule['reviewed'][0]['ai_review']
+    assert schedule['budget']['tokens_used'] <= 200
+
+
+@pytest.mark.parametrize('extra', [['--token-budget', '500', '--prune'], ['--time-budget', '10', '--chunked']])
+def test_cli_rejects_prompt_options_for_scheduled_reviews(tmp_path, monkeypatch, capsys, extra):
+    """--prune/--chunked would be ignored by budgeted (or directory) reviews, so the CLI refuses them."""
+    from src import main as cli
+
+    source = tmp_path / "sample.py"
+    source.write_text(SAMPLE_CODE)
+    monkeypatch.setattr(sys, 'argv', ['main.py', str(source)] + extra)
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main()
+    assert excinfo.value.code == 2 and "--prune and --chunked" in capsys.readouterr().err
+
+    monkeypatch.setattr(sys, 'argv', ['main.py', str(tmp_path), '--prune'])
+    with pytest.raises(SystemExit):
+        cli.main()
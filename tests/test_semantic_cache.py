@@ -0,0 +1,64 @@
+import pytest
+import os
+import sys
+import re
+
+import numpy as np
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.semantic_cache import SemanticCache
+
+
+def _bag_of_words(code):
+    """Stand-in embedding: normalized counts of a few keywords"""
+    words = re.findall(r'\w+', code)
+    vector = np.array([words.count(w) for w in ("def", "return", "for", "if", "print", "class")] + [1.0],
+                      dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_lookup_hits_near_duplicates_per_model(tmp_path):
+    """Similar code reuses a review for the same model only; dissimilar code misses."""
+    cache = SemanticCache(_bag_of_words, threshold=0.95, path=str(tmp_path / "index.npz"))
+    cache.add("def add(a, b):\n    return a + b", "gemini-pro", {'summary': 'Adds numbers'})
+
+    hit = cache.lookup("def plus(x, y):\n    return x + y", "gemini-pro")
+    assert hit['summary'] == 'Adds numbers'
+    assert hit['semantic_cache_hit'] is True and hit['similarity'] >= 0.95
+    assert cache.lookup("def plus(x, y):\n    return x + y", "gpt-4") is None
+    assert cache.lookup("class A:\n    pass\nfor i in x:\n    print(i)", "gemini-pro") is None
+
+    cache.save()
+    reloaded = SemanticCache(_bag_of_words, threshold=0.95, path=str(tmp_path / "index.npz"))
+    assert reloaded.lookup("def f(q, r):\n    return q - r", "gemini-pro")['summary'] == 'Adds numbers'
+    assert cache.stats()['hits'] == 1 and cache.stats()['lookups'] == 3
+
+
+def test_full_index_evicts_least_recently_used():
+    """Once full, the entry not used for the longest time is replaced."""
+    cache = SemanticCache(_bag_of_words, threshold=0.99, max_entries=2)
+    cache.add("def f():\n    return 1", "m", {'summary': 'function'})
+    cache.add("class A:\n    pass", "m", {'summary': 'class'})
+    assert cache.lookup("def g():\n    return 2", "m")['summary'] == 'function'
+
+    cache.add("for i in x:\n    print(i)", "m", {'summary': 'loop'})
+    assert cache.lookup("class B:\n    pass", "m") is None
+    assert cache.lookup("def h():\n    return 3", "m")['summary'] == 'function'
+    assert cache.stats()['entries'] == 2
+
+
+def test_codebert_embeddings_are_unit_vectors(tiny_codebert):
+    """CodeBertAnalyzer.embed returns normalized vectors ranking a renamed copy above unrelated code."""
+    from src.analyzer.custom_models import CodeBertAnalyzer
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    original = analyzer.embed("def add(a, b):\n    return a + b")
+    renamed = analyzer.embed("def add(x, y):\n    return x + y")
+    unrelated = analyzer.embed("import os\nprint(os.listdir('.'))\n" * 5)
+
+    assert original.dtype == np.float32 and original.shape == (32,)
+    assert abs(float(np.linalg.norm(original)) - 1.0) < 1e-5
+    assert float(original @ renamed) > float(original @ unrelated)
@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+
+import numpy as np
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.similarity_index import SimilarityIndex, sync_directory
+
+
+def _functions(vectors, prefix="f"):
+    """analyze_functions-style results for the given embeddings"""
+    return [{'qualname': f"{prefix}{i}", 'kind': 'function', 'start_line': 3 * i + 1, 'end_line': 3 * i + 2,
+             'embedding': vector / np.linalg.norm(vector)} for i, vector in enumerate(vectors)]
+
+
+def test_exact_index_follows_file_changes_and_persists(tmp_path):
+    """Files are replaced and removed as a whole; searches, duplicates and reloads see the current state."""
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(3, 16)).astype(np.float32)
+    index = SimilarityIndex(path=str(tmp_path / "index.npz"))
+    index.add_file("a.py", _functions(base), file_hash="h1")
+    index.add_file("b.py", _functions([base[0] + 0.01, rng.normal(size=16)], prefix="g"), file_hash="h2")
+
+    query = base[0] / np.linalg.norm(base[0])
+    matches = index.search(query, k=2)
+    assert {(m['path'], m['qualname']) for m in matches} == {("a.py", "f0"), ("b.py", "g0")}
+    assert index.search(index.vector("a.py", "f0"), k=1, exclude={'path': "a.py", 'qualname': "f0"})[0]['path'] == "b.py"
+    pairs = index.duplicates(threshold=0.99)
+    assert len(pairs) == 1 and {pairs[0]['a']['qualname'], pairs[0]['b']['qualname']} == {"f0", "g0"}
+
+    index.add_file("a.py", _functions(base[1:]), file_hash="h3")
+    assert index.remove_file("b.py") and not index.remove_file("b.py")
+    assert len(index) == 2 and index.file_hash("a.py") == "h3"
+    assert all(m['path'] == "a.py" for m in index.search(query, k=5))
+
+    index.save()
+    reloaded = SimilarityIndex(path=str(tmp_path / "index.npz"))
+    assert len(reloaded) == 2 and reloaded.paths() == ["a.py"] and reloaded.file_hash("a.py") == "h3"
+    assert reloaded.search(query, k=5) == index.search(query, k=5)
+
+
+def test_large_index_is_partitioned_and_keeps_recall():
+    """Past exact_limit, IVF searches find (nearly) the exact nearest neighbours and see removals."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(40, 32))
+    index = SimilarityIndex(exact_limit=500, n_probe=4)
+    exact = SimilarityIndex(exact_limit=10 ** 6)
+    for f in range(60):
+        vectors = centers[rng.integers(0, 40, size=50)] + rng.normal(scale=0.3, size=(50, 32))
+        index.add_file(f"file{f}.py", _functions(vectors))
+        exact.add_file(f"file{f}.py", _functions(vectors))
+    assert index.stats()['search'] == 'ivf' and index.stats()['lists'] >= 30
+    assert exact.stats()['search'] == 'exact'
+    queries = centers[rng.integers(0, 40, size=100)] + rng.normal(scale=0.3, size=(100, 32))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    found = sum(index.search(q, k=1)[0] == exact.search(q, k=1)[0] for q in queries)
+    assert found >= 90
+
+    top = index.search(queries[0], k=1)[0]
+    index.remove_file(top['path'])
+    assert all(m['path'] != top['path'] for m in index.search(queries[0], k=10))
+
+
+def test_similar_endpoint_searches_synced_directory(tiny_codebert, tmp_path, monkeypatch):
+    """sync_directory re-embeds only changed files; /api/similar answers by code or by indexed function."""
+    from src.analyzer import model_loader, similarity_index
+    from src.analyzer.custom_models import CodeBertAnalyzer
+    from src.app import app
+
+    analyzer = CodeBertAnalyzer(tiny_codebert)
+    calls = []
+    analyze = lambda code: calls.append(code) or analyzer.analyze_functions(code, include_classes=False)
+    (tmp_path / "a.py").write_text("def add(a, b):\n    return a + b\n\n\ndef greet(name):\n    print(name)\n")
+    (tmp_path / "b.py").write_text("def plus(x, y):\n    return x + y\n")
+    index = SimilarityIndex()
+    assert sync_directory(index, str(tmp_path), analyze) == {'indexed': 2, 'unchanged': 0, 'removed': 0,
+                                                             'functions': 3}
+    os.remove(tmp_path / "b.py")
+    assert sync_directory(index, str(tmp_path), analyze) == {'indexed': 0, 'unchanged': 1, 'removed': 1,
+                                                             'functions': 2}
+    assert len(calls) == 2
+
+    load = model_loader.BackgroundLoad("CodeBERT (test)", lambda report: analyzer)
+    load.get(timeout=5)
+    monkeypatch.setattr(model_loader, "_loads", {model_loader.resolve_model_source(model_loader.CODEBERT_HUB_ID): load})
+    monkeypatch.setenv('SIMILARITY_INDEX_PATH', str(tmp_path / "unused.npz"))
+    monkeypatch.setattr(similarity_index, "_similarity_index", index)
+    client = app.test_client()
+
+    path = str(tmp_path / "a.py")
+    response = client.post('/api/similar', json={'code': "def add(a, b):\n    return a + b", 'k': 1})
+    assert response.status_code == 200
+    assert response.get_json()['matches'][0]['qualname'] == "add"
+    matches = client.post('/api/similar', json={'path': path, 'qualname': "add"}).get_json()['matches']
+    assert [m['qualname'] for m in matches] == ["greet"]
+    assert client.post('/api/similar', json={'path': path, 'qualname': "nope"}).status_code == 404
+
+
+def test_process_index_reloads_after_a_rebuild(tmp_path, monkeypatch):
+    """The server's index picks up a file rebuilt by another process, without a restart."""
+    from src.analyzer import similarity_index
+
+    path = str(tmp_path / "index.npz")
+    monkeypatch.setenv('SIMILARITY_INDEX_PATH', path)
+    monkeypatch.setattr(similarity_index, "_similarity_index", None)
+    served = similarity_index.get_similarity_index()
+    assert len(served) == 0 and similarity_index.get_similarity_index() is served
+
+    rebuilt = SimilarityIndex(path=path)
+    rebuilt.add_file("a.py", _functions(np.eye(2, 8, dtype=np.float32)), file_hash="h1")
+    rebuilt.save()
+    reloaded = similarity_index.get_similarity_index()
+    assert reloaded is not served and len(reloaded) == 2
+    assert similarity_index.get_similarity_index() is reloaded
@@ -0,0 +1,51 @@
+import pytest
+import os
+import sys
+import threading
+import time
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    """Callers with the same key all get the result of a single execution."""
+    flights = SingleFlight()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'answer': 42}
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do('key', compute, timeout=5)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'answer': 42}] * 5
+    assert flights.stats()['coalesced_waiters'] == 4
+
+
+def test_deadline_is_per_caller():
+    """A caller with a short deadline times out without cancelling the shared work."""
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return 'done'
+
+    with pytest.raises(TimeoutError):
+        flights.do('key', compute, timeout=0.05)
+
+    release.set()
+    assert flights.do('key', compute, timeout=5) == 'done'
+    assert flights.stats()['timeouts'] == 1
@@ -0,0 +1,42 @@
+import pytest
+import os
+import sys
+
+# Add the project root to the sys.path to allow absolute imports from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.analyzer.ai_reviewer import _parse_gemini_response
+from src.analyzer.stream_parser import StreamingReviewParser
+
+COMPLETION = """SUMMARY: Adds two numbers.
+SUGGESTIONS:
+- Add type hints
+- Add a docstring
+ISSUES: None
+QUALITY_RATING: 7/10
+RECOMMENDATION: Fine as is."""
+
+
+def test_sections_emitted_as_lines_complete():
+    """Each section is emitted once its line is complete, even when split mid-token."""
+    parser = StreamingReviewParser()
+
+    assert parser.feed("SUMMARY: Adds two num") == []
+    assert parser.feed("bers.\nSUGG") == [{'event': 'summary', 'data': 'Adds two numbers.'}]
+    assert parser.feed("ESTIONS:\n- Add type hints\n- Add a") == [{'event': 'suggestion', 'data': 'Add type hints'}]
+
+    events = parser.feed(COMPLETION.split("- Add a", 1)[1])
+    events += parser.close()
+    assert [e['event'] for e in events] == ['suggestion', 'issues', 'quality_rating', 'recommendation']
+
+
+def test_streamed_sections_match_whole_response_parsing():
+    """Parsing a completion piece by piece gives the same result as parsing it at once."""
+    parser = StreamingReviewParser()
+    for i in range(0, len(COMPLETION), 7):
+        parser.feed(COMPLETION[i:i + 7])
+    parser.close()
+
+    assert parser.sections == _parse_gemini_response(COMPLETION)
+    assert parser.sections['suggestions'] == ['Add type hints', 'Add a docstring']